@@ -0,0 +1,127 @@
+"""
+Búsqueda A* dirigida al destino
+La heurística usa las coordenadas de `posiciones` escaladas para que la
+distancia euclidiana nunca supere la distancia real en km (cota admisible)
+"""
+
+from array import array
+from math import hypot
+import heapq
+
+from grafo_csr import INF, como_csr, dijkstra_csr, reconstruir_camino, traducir_resultado
+
+
+class HeuristicaEuclidiana:
+    """Cota inferior euclidiana construida a partir de las posiciones de los nodos"""
+
+    def __init__(self, g, posiciones):
+        n = g.num_nodos
+        self.xs = array('d', [0.0]) * n
+        self.ys = array('d', [0.0]) * n
+        for u, etiqueta in enumerate(g.etiquetas):
+            if etiqueta not in posiciones:
+                raise ValueError(f"El nodo {etiqueta} no tiene posición; use la heurística ALT")
+            self.xs[u], self.ys[u] = posiciones[etiqueta]
+        self.escala = factor_escala(g, self.xs, self.ys)
+
+    def hacia(self, destino):
+        """Devuelve la función h(v) que acota la distancia de v a destino"""
+        xs, ys, escala = self.xs, self.ys, self.escala
+        tx, ty = xs[destino], ys[destino]
+        return lambda v: escala * hypot(xs[v] - tx, ys[v] - ty)
+
+
+def factor_escala(g, xs, ys):
+    """
+    Mayor factor k tal que k * distancia_euclidiana(u, v) <= peso(u, v) en toda arista
+    Por la desigualdad triangular la cota resultante es admisible y consistente
+    """
+    desp = g.desplazamientos
+    dest = g.destinos
+    pesos = g.pesos
+    escala = INF
+
+    for u in range(g.num_nodos):
+        for i in range(desp[u], desp[u + 1]):
+            v = dest[i]
+            largo = hypot(xs[u] - xs[v], ys[u] - ys[v])
+            if largo > 0:
+                escala = min(escala, pesos[i] / largo)
+
+    if escala == INF:
+        return 0.0
+    # Margen para que el redondeo nunca sobreestime
+    return escala * (1 - 1e-12)
+
+
+def a_estrella_csr(g, origen, destino, h):
+    """
+    A* sobre ids enteros con una heurística admisible h(v)
+    Si h no es consistente un nodo puede reabrirse, así que el resultado sigue siendo óptimo
+    Devuelve (distancia, camino_ids, distancias, asentados)
+    """
+    n = g.num_nodos
+    desp = g.desplazamientos
+    dest = g.destinos
+    pesos = g.pesos
+
+    distancias = array('d', [INF]) * n
+    previos = array('i', [-1]) * n
+    distancias[origen] = 0.0
+    asentados = 0
+
+    # Cola de prioridad: (distancia + h, distancia, nodo)
+    cola = [(h(origen), 0.0, origen)]
+    heappop = heapq.heappop
+    heappush = heapq.heappush
+
+    while cola:
+        _, distancia_actual, u = heappop(cola)
+
+        # Entrada obsoleta: ya se encontró un camino mejor a u
+        if distancia_actual > distancias[u]:
+            continue
+
+        asentados += 1
+
+        if u == destino:
+            break
+
+        for i in range(desp[u], desp[u + 1]):
+            v = dest[i]
+            nueva_distancia = distancia_actual + pesos[i]
+
+            if nueva_distancia < distancias[v]:
+                distancias[v] = nueva_distancia
+                previos[v] = u
+                heappush(cola, (nueva_distancia + h(v), nueva_distancia, v))
+
+    return distancias[destino], reconstruir_camino(previos, destino), distancias, asentados
+
+
+def a_estrella(grafo, inicio, fin, posiciones, heuristica=None):
+    """
+    A* con la misma salida que dijkstra(): (camino, distancia, distancias)
+    Se puede pasar una HeuristicaEuclidiana ya construida para no recalcular la escala
+    """
+    g = como_csr(grafo)
+    if heuristica is None:
+        heuristica = HeuristicaEuclidiana(g, posiciones)
+    origen = g.id_de(inicio)
+    destino = g.id_de(fin)
+
+    _, camino_ids, distancias, _ = a_estrella_csr(g, origen, destino, heuristica.hacia(destino))
+    return traducir_resultado(g, camino_ids, distancias, destino)
+
+
+def comparar_asentados(grafo, inicio, fin, posiciones, heuristica=None):
+    """Cuenta los nodos asentados por A* y por Dijkstra para la misma consulta"""
+    g = como_csr(grafo)
+    if heuristica is None:
+        heuristica = HeuristicaEuclidiana(g, posiciones)
+    origen = g.id_de(inicio)
+    destino = g.id_de(fin)
+
+    _, _, asentados_dijkstra = dijkstra_csr(g, origen, destino)
+    _, _, _, asentados_a_estrella = a_estrella_csr(g, origen, destino, heuristica.hacia(destino))
+    return {'dijkstra': asentados_dijkstra, 'a_estrella': asentados_a_estrella}
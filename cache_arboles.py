@@ -0,0 +1,92 @@
+"""
+Caché de árboles de caminos mínimos por origen
+Guarda los arreglos de distancias y previos de cada origen consultado, responde
+cualquier consulta posterior desde ese origen en O(largo del camino), desaloja
+por LRU bajo un presupuesto de memoria y se invalida si el grafo cambia
+"""
+
+from collections import OrderedDict
+
+from grafo_csr import INF, como_csr, reconstruir_camino
+from delta_stepping import arbol_completo
+from sssp_dinamico import aplicar_pesos, reparar_arbol
+
+PRESUPUESTO_POR_DEFECTO = 64 * 1024 * 1024  # bytes
+
+
+class CacheArboles:
+    """Árboles de Dijkstra completos indexados por origen, con desalojo LRU"""
+
+    def __init__(self, grafo, presupuesto_bytes=PRESUPUESTO_POR_DEFECTO):
+        self.g = como_csr(grafo)
+        self.presupuesto_bytes = presupuesto_bytes
+        self.bytes_usados = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self._arboles = OrderedDict()
+        self._version = self.g.version
+
+    def __len__(self):
+        return len(self._arboles)
+
+    def __contains__(self, origen):
+        return self.g.version == self._version and origen in self._arboles
+
+    def invalidar(self):
+        """Descarta todos los árboles guardados"""
+        self._arboles.clear()
+        self.bytes_usados = 0
+        self._version = self.g.version
+
+    def arbol(self, origen):
+        """Devuelve (distancias, previos) desde origen, calculándolo si hace falta"""
+        if self.g.version != self._version:
+            self.invalidar()
+
+        arbol = self._arboles.get(origen)
+        if arbol is not None:
+            self._arboles.move_to_end(origen)
+            self.aciertos += 1
+            return arbol
+
+        self.fallos += 1
+        distancias, previos, _ = arbol_completo(self.g, origen)
+        arbol = (distancias, previos)
+        self._arboles[origen] = arbol
+        self.bytes_usados += _tamano(arbol)
+
+        # Desalojar los menos usados recientemente, conservando siempre el actual
+        while self.bytes_usados > self.presupuesto_bytes and len(self._arboles) > 1:
+            _, desalojado = self._arboles.popitem(last=False)
+            self.bytes_usados -= _tamano(desalojado)
+
+        return arbol
+
+    def aplicar_actualizaciones(self, actualizaciones):
+        """
+        Aplica (u, v, nuevo_peso) al grafo y repara en el lugar los árboles guardados
+        en lugar de descartarlos. Devuelve la cantidad de nodos recalculados
+        """
+        if self.g.version != self._version:
+            self.invalidar()
+        originales = aplicar_pesos(self.g, actualizaciones)
+        tocados = sum(reparar_arbol(self.g, distancias, previos, originales)
+                      for distancias, previos in self._arboles.values())
+        self._version = self.g.version
+        return tocados
+
+    def consulta_ids(self, origen, destino):
+        """Devuelve (distancia, camino_ids) usando el árbol de origen"""
+        distancias, previos = self.arbol(origen)
+        if distancias[destino] == INF:
+            return INF, [destino]
+        return distancias[destino], reconstruir_camino(previos, destino)
+
+    def consulta(self, inicio, fin):
+        """Devuelve (camino, distancia) entre dos etiquetas"""
+        distancia, camino_ids = self.consulta_ids(self.g.id_de(inicio), self.g.id_de(fin))
+        return [self.g.etiquetas[i] for i in camino_ids], distancia
+
+
+def _tamano(arbol):
+    return sum(arreglo.itemsize * len(arreglo) for arreglo in arbol)
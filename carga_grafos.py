@@ -0,0 +1,363 @@
+"""
+Carga de grafos grandes desde archivo
+Lectores por bloques de DIMACS (.gr/.co) y listas de aristas CSV que nunca
+crean una tupla de Python por arista: cada bloque se convierte con NumPy y
+el CSR se arma en dos pasadas (primero los grados, luego cada arista en su
+lugar). El formato binario propio guarda la cabecera y los arreglos CSR tal
+cual y se abre con mmap sin copiar nada
+"""
+
+from array import array
+import io
+import mmap
+import struct
+
+import numpy as np
+
+from grafo_csr import GrafoCSR
+
+# Bytes leídos por bloque (se completan hasta el siguiente salto de línea)
+TAMANO_BLOQUE = 32 * 1024 * 1024
+# En CSV cada etiqueta ocupa LARGO_ETIQUETA bytes en memoria: bloques más chicos
+TAMANO_BLOQUE_CSV = 8 * 1024 * 1024
+# Las etiquetas CSV deben tener menos de LARGO_ETIQUETA bytes
+LARGO_ETIQUETA = 64
+
+MAGICO = b'CSR1'
+# mágico, n, m, tipo de etiquetas, primera etiqueta (rango) o bytes de etiquetas (texto)
+CABECERA = struct.Struct('<4sqqBq31x')  # 64 bytes
+ETIQUETAS_RANGO = 0  # etiquetas = range(primera, primera + n)
+ETIQUETAS_TEXTO = 1  # etiquetas UTF-8 separadas por '\n' al final del archivo
+
+
+def _bloques(ruta, tamano=TAMANO_BLOQUE):
+    """Itera el archivo en bloques de bytes que terminan en un salto de línea"""
+    with open(ruta, 'rb') as archivo:
+        while True:
+            bloque = archivo.read(tamano)
+            if not bloque:
+                return
+            if not bloque.endswith(b'\n'):
+                bloque += archivo.readline()
+            yield bloque
+
+
+def _a_array(tipo, datos):
+    """Copia un arreglo NumPy a un array.array del tipo indicado"""
+    arreglo = array(tipo)
+    arreglo.frombytes(np.ascontiguousarray(datos).tobytes())
+    return arreglo
+
+
+class _ArmadoCSR:
+    """Arma el CSR en dos pasadas: contar grados y luego colocar las aristas"""
+
+    def __init__(self, n=0):
+        self.grados = np.zeros(n, dtype=np.int64)
+
+    def contar(self, origenes, n=0):
+        """Suma los grados de salida; el arreglo crece hasta n nodos si aparecen nuevos"""
+        cuentas = np.bincount(origenes, minlength=max(n, len(self.grados)))
+        cuentas[:len(self.grados)] += self.grados
+        self.grados = cuentas
+
+    def preparar(self):
+        self.desplazamientos = np.zeros(len(self.grados) + 1, dtype=np.int64)
+        np.cumsum(self.grados, out=self.desplazamientos[1:])
+        self.cursor = self.desplazamientos[:-1].copy()
+        m = int(self.desplazamientos[-1])
+        self.destinos = np.empty(m, dtype=np.int32)
+        self.pesos = np.empty(m, dtype=np.float64)
+
+    def colocar(self, origenes, destinos, pesos):
+        # Orden estable: las aristas de cada nodo quedan en el orden del archivo
+        orden = np.argsort(origenes, kind='stable')
+        ordenados = origenes[orden]
+        primero_del_grupo = np.searchsorted(ordenados, ordenados, side='left')
+        posiciones = self.cursor[ordenados] + (np.arange(len(ordenados)) - primero_del_grupo)
+        self.destinos[posiciones] = destinos[orden]
+        self.pesos[posiciones] = pesos[orden]
+        self.cursor += np.bincount(origenes, minlength=len(self.cursor))
+
+    def grafo(self, etiquetas):
+        if not np.array_equal(self.cursor, self.desplazamientos[1:]):
+            raise ValueError("El archivo cambió entre las dos pasadas")
+        return GrafoCSR(etiquetas, _a_array('q', self.desplazamientos),
+                        _a_array('i', self.destinos), _a_array('d', self.pesos))
+
+
+def desde_aristas(n, origenes, destinos, pesos, etiquetas=None):
+    """
+    GrafoCSR a partir de arreglos NumPy de aristas ya en memoria (ids 0..n-1)
+    Las aristas de cada nodo conservan el orden de los arreglos; sin
+    etiquetas, se usan range(n)
+    """
+    armado = _ArmadoCSR(n)
+    armado.contar(origenes, n)
+    armado.preparar()
+    armado.colocar(origenes, destinos, pesos)
+    return armado.grafo(range(n) if etiquetas is None else etiquetas)
+
+
+def _sin_comentarios(bloque):
+    """Quita las líneas DIMACS que no son datos: comentarios ('c') y la del problema ('p')"""
+    if b'c' not in bloque and b'p' not in bloque:
+        return bloque
+    texto = b'\n' + bloque
+    trozos = []
+    inicio = 0
+    while True:
+        # Suelen ser unas pocas líneas al comienzo: bytes.find las ubica sin recorrer línea a línea
+        encontrados = [i for i in (texto.find(b'\nc', inicio), texto.find(b'\np', inicio)) if i >= 0]
+        if not encontrados:
+            trozos.append(texto[inicio:])
+            return b''.join(trozos)
+        linea = min(encontrados)
+        trozos.append(texto[inicio:linea + 1])
+        fin = texto.find(b'\n', linea + 1)
+        if fin == -1:
+            return b''.join(trozos)
+        inicio = fin
+
+
+def _datos_dimacs(bloque, columnas, tipo):
+    """Columnas pedidas de las líneas de datos ('a ...' o 'v ...') de un bloque DIMACS"""
+    # Se quitan antes: con comments de loadtxt cada línea pasaría por Python
+    bloque = _sin_comentarios(bloque)
+    datos = np.loadtxt(io.BytesIO(bloque), comments=None, usecols=columnas,
+                       dtype=tipo, ndmin=2)
+    return [datos[:, j] for j in range(len(columnas))]
+
+
+def cargar_dimacs(ruta_gr, ruta_co=None):
+    """
+    Carga un grafo DIMACS (.gr: 'p sp n m' y 'a u v w', ids desde 1)
+    Las etiquetas son los ids originales; con ruta_co también devuelve las
+    posiciones {id: (x, y)}. Devuelve (GrafoCSR, posiciones o None)
+    """
+    n = None
+    with open(ruta_gr, 'rb') as archivo:
+        for linea in archivo:
+            if linea.startswith(b'p'):
+                n = int(linea.split()[2])
+                break
+    if n is None:
+        raise ValueError(f"{ruta_gr} no tiene línea 'p sp n m'")
+
+    armado = _ArmadoCSR(n)
+    for bloque in _bloques(ruta_gr):
+        (origenes,) = _datos_dimacs(bloque, (1,), np.int64)
+        armado.contar(origenes - 1)
+
+    armado.preparar()
+    for bloque in _bloques(ruta_gr):
+        origenes, destinos, pesos = _datos_dimacs(bloque, (1, 2, 3), np.int64)
+        armado.colocar(origenes - 1, destinos - 1, pesos.astype(np.float64))
+
+    g = armado.grafo(range(1, n + 1))
+    posiciones = cargar_coordenadas(ruta_co) if ruta_co else None
+    return g, posiciones
+
+
+def cargar_coordenadas(ruta_co):
+    """Posiciones {id: (x, y)} de un archivo DIMACS .co ('v id x y')"""
+    posiciones = {}
+    for bloque in _bloques(ruta_co):
+        ids, xs, ys = _datos_dimacs(bloque, (1, 2, 3), np.float64)
+        posiciones.update(zip(ids.astype(np.int64).tolist(), zip(xs.tolist(), ys.tolist())))
+    return posiciones
+
+
+def _aristas_csv(bloque, separador, saltar):
+    """(origenes, destinos, pesos) de un bloque CSV; las etiquetas quedan como bytes"""
+    tipo = [('origen', f'S{LARGO_ETIQUETA}'), ('destino', f'S{LARGO_ETIQUETA}'), ('peso', 'f8')]
+    datos = np.loadtxt(io.BytesIO(bloque), delimiter=separador, dtype=tipo,
+                       skiprows=saltar, comments='#', usecols=(0, 1, 2), ndmin=1)
+    return datos['origen'], datos['destino'], datos['peso']
+
+
+def _resumen(etiquetas):
+    """Hash de 64 bits (FNV por palabras) de cada etiqueta de ancho fijo"""
+    palabras = etiquetas.view(np.uint64).reshape(len(etiquetas), -1)
+    resumen = np.zeros(len(etiquetas), dtype=np.uint64)
+    # Sólo las palabras que alguna etiqueta usa (las etiquetas cortas ocupan una o dos)
+    for j in np.nonzero(palabras.any(axis=0))[0]:
+        resumen = (resumen ^ palabras[:, j]) * np.uint64(0x100000001b3)
+    return resumen
+
+
+class _Internador:
+    """
+    Asigna ids densos a etiquetas por bloques sin consultar un dict por etiqueta:
+    se ordenan hashes de 64 bits y se buscan con searchsorted. Si dos etiquetas
+    distintas llegaran a chocar se pasa a un dict para el resto de la carga
+    """
+
+    def __init__(self):
+        self.claves = np.zeros(0, dtype=np.uint64)   # hashes ordenados
+        self.ids_claves = np.zeros(0, dtype=np.int64)
+        self.etiquetas = np.zeros(0, dtype=f'S{LARGO_ETIQUETA}')  # por id
+        self.diccionario = None
+
+    def __len__(self):
+        return len(self.etiquetas)
+
+    def ids(self, etiquetas, nuevas):
+        """Id de cada etiqueta; con nuevas=False toda etiqueta debe ser conocida"""
+        if self.diccionario is None:
+            ids = self._por_resumen(etiquetas, nuevas)
+            if ids is not None:
+                return ids
+            self.diccionario = {e: i for i, e in enumerate(self.etiquetas.tolist())}
+        return self._por_diccionario(etiquetas, nuevas)
+
+    def _por_resumen(self, etiquetas, nuevas):
+        claves, primeras, inversa = np.unique(_resumen(etiquetas), return_index=True,
+                                              return_inverse=True)
+        distintas = etiquetas[primeras]
+        if not np.array_equal(distintas[inversa], etiquetas):
+            return None
+
+        posiciones = np.searchsorted(self.claves, claves)
+        acotadas = np.minimum(posiciones, max(0, len(self.claves) - 1))
+        conocidas = (posiciones < len(self.claves)) & (self.claves[acotadas] == claves) \
+            if len(self.claves) else np.zeros(len(claves), dtype=bool)
+        ids = np.empty(len(claves), dtype=np.int64)
+        ids[conocidas] = self.ids_claves[acotadas[conocidas]]
+        if not np.array_equal(self.etiquetas[ids[conocidas]], distintas[conocidas]):
+            return None
+
+        faltan = np.nonzero(~conocidas)[0]
+        if len(faltan):
+            if not nuevas:
+                raise ValueError("El archivo cambió entre las dos pasadas")
+            # Las nuevas reciben ids en el orden en que aparecen en el archivo
+            faltan = faltan[np.argsort(primeras[faltan], kind='stable')]
+            ids[faltan] = np.arange(len(self.etiquetas), len(self.etiquetas) + len(faltan))
+            self.etiquetas = np.concatenate([self.etiquetas, distintas[faltan]])
+            faltan = np.sort(faltan)  # claves es creciente: se insertan en orden
+            self.claves = np.insert(self.claves, posiciones[faltan], claves[faltan])
+            self.ids_claves = np.insert(self.ids_claves, posiciones[faltan], ids[faltan])
+        return ids[inversa]
+
+    def _por_diccionario(self, etiquetas, nuevas):
+        distintas, inversa = np.unique(etiquetas, return_inverse=True)
+        ids = []
+        for etiqueta in distintas.tolist():
+            if etiqueta not in self.diccionario:
+                if not nuevas:
+                    raise ValueError("El archivo cambió entre las dos pasadas")
+                self.diccionario[etiqueta] = len(self.etiquetas)
+                self.etiquetas = np.append(self.etiquetas, np.array([etiqueta], self.etiquetas.dtype))
+            ids.append(self.diccionario[etiqueta])
+        return np.array(ids, dtype=np.int64)[inversa]
+
+
+def _tiene_encabezado(ruta, separador):
+    """True si el tercer campo de la primera línea no es un número"""
+    with open(ruta, 'rb') as archivo:
+        campos = archivo.readline().split(separador.encode())
+    try:
+        float(campos[2])
+        return False
+    except (IndexError, ValueError):
+        return True
+
+
+def cargar_csv(ruta, separador=',', dirigido=True):
+    """
+    Carga una lista de aristas 'origen,destino,peso' (con o sin encabezado)
+    Con dirigido=False cada línea agrega también la arista inversa
+    """
+    encabezado = _tiene_encabezado(ruta, separador)
+
+    def aristas():
+        for numero, bloque in enumerate(_bloques(ruta, TAMANO_BLOQUE_CSV)):
+            yield _aristas_csv(bloque, separador, 1 if encabezado and numero == 0 else 0)
+
+    def ids_del_bloque(origenes, destinos, nuevas):
+        etiquetas = np.concatenate([origenes, destinos])
+        if len(etiquetas) and etiquetas.view(np.uint8).reshape(len(etiquetas), -1)[:, -1].any():
+            raise ValueError(f"Hay etiquetas de {LARGO_ETIQUETA} bytes o más en {ruta}")
+        return internador.ids(etiquetas, nuevas)
+
+    # Primera pasada: internar etiquetas y contar grados
+    internador = _Internador()
+    armado = _ArmadoCSR()
+    for origenes, destinos, _ in aristas():
+        ids = ids_del_bloque(origenes, destinos, nuevas=True)
+        armado.contar(ids if not dirigido else ids[:len(origenes)], len(internador))
+
+    # Segunda pasada: colocar cada arista en su lugar
+    armado.preparar()
+    for origenes, destinos, pesos in aristas():
+        ids = ids_del_bloque(origenes, destinos, nuevas=False)
+        u, v = ids[:len(origenes)], ids[len(origenes):]
+        if dirigido:
+            armado.colocar(u, v, pesos)
+        else:
+            armado.colocar(np.concatenate([u, v]), np.concatenate([v, u]),
+                           np.concatenate([pesos, pesos]))
+
+    etiquetas = [etiqueta.decode('utf-8') for etiqueta in internador.etiquetas.tolist()]
+    return armado.grafo(etiquetas)
+
+
+def _relleno(tamano):
+    """Bytes necesarios para alinear tamano a 8"""
+    return -tamano % 8
+
+
+def guardar_binario(g, ruta):
+    """
+    Escribe el grafo en el formato binario: cabecera, desplazamientos (int64),
+    destinos (int32), pesos (float64) y las etiquetas
+    """
+    n, m = g.num_nodos, g.num_aristas
+    etiquetas = g.etiquetas
+    if isinstance(etiquetas, range) and etiquetas.step == 1:
+        tipo, primera, texto = ETIQUETAS_RANGO, etiquetas.start, b''
+    else:
+        # Se guardan como texto: al abrir el archivo las etiquetas son str
+        textos = [str(etiqueta) for etiqueta in etiquetas]
+        if any('\n' in texto for texto in textos) or len(set(textos)) != n:
+            raise ValueError("Las etiquetas deben ser textos distintos sin saltos de línea")
+        texto = '\n'.join(textos).encode('utf-8')
+        tipo, primera = ETIQUETAS_TEXTO, len(texto)
+
+    with open(ruta, 'wb') as archivo:
+        archivo.write(CABECERA.pack(MAGICO, n, m, tipo, primera))
+        for arreglo in (g.desplazamientos, g.destinos, g.pesos):
+            datos = memoryview(arreglo).cast('B')
+            archivo.write(datos)
+            archivo.write(b'\0' * _relleno(len(datos)))
+        archivo.write(texto)
+
+
+def abrir_binario(ruta):
+    """
+    Abre un grafo binario con mmap (copia al escribir: actualizar_peso no
+    modifica el archivo). Los arreglos son vistas sobre las páginas del archivo
+    """
+    with open(ruta, 'rb') as archivo:
+        mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_COPY)
+    magico, n, m, tipo, primera = CABECERA.unpack_from(mapa)
+    if magico != MAGICO:
+        raise ValueError(f"{ruta} no es un grafo binario")
+
+    vista = memoryview(mapa)
+    inicio = CABECERA.size
+    arreglos = []
+    for formato, cantidad in (('q', n + 1), ('i', m), ('d', m)):
+        tamano = struct.calcsize(formato) * cantidad
+        arreglos.append(vista[inicio:inicio + tamano].cast(formato))
+        inicio += tamano + _relleno(tamano)
+
+    if tipo == ETIQUETAS_RANGO:
+        etiquetas = range(primera, primera + n)
+    else:
+        etiquetas = bytes(vista[inicio:inicio + primera]).decode('utf-8').split('\n') if n else []
+
+    g = GrafoCSR(etiquetas, *arreglos)
+    g.ruta_binaria = ruta
+    return g
@@ -0,0 +1,489 @@
+"""
+Colas de prioridad intercambiables para el bucle de Dijkstra
+Todas ofrecen la misma interfaz: agregar(nodo, prioridad) inserta el nodo o
+reduce su prioridad, y extraer() devuelve (prioridad, nodo) del mínimo, cada
+nodo una sola vez y con su prioridad final. Las de borrado perezoso cuentan
+las entradas obsoletas que descartan; las de reducción real no dejan ninguna
+
+- heapq:       montículo binario de la biblioteca estándar, borrado perezoso
+- indexado:    montículo binario con la posición de cada nodo (reducción real)
+- emparejamiento: montículo de emparejamiento (pairing heap, reducción real)
+- radix:       montículo radix para prioridades enteras monótonas
+- dial:        cubetas circulares de Dial para pesos enteros pequeños
+"""
+
+from array import array
+import heapq
+import weakref
+
+import numpy as np
+
+from grafo_csr import INF
+
+# Peso entero máximo con el que Dial (una cubeta por unidad de distancia) conviene:
+# recorre todas las distancias hasta la mayor, así que su costo crece con los pesos
+LIMITE_DIAL = 1024
+
+
+class _Cola:
+    """Contadores comunes a todas las colas"""
+
+    nombre = ''
+
+    def __init__(self, n):
+        self.inserciones = 0
+        self.reducciones = 0
+        self.extracciones = 0
+        self.obsoletas = 0       # entradas extraídas de un nodo ya asentado o mejorado
+        self.tamano_maximo = 0   # entradas guardadas a la vez, incluidas las obsoletas
+
+    def estadisticas(self):
+        return {'cola': self.nombre, 'inserciones': self.inserciones,
+                'reducciones': self.reducciones, 'extracciones': self.extracciones,
+                'obsoletas': self.obsoletas, 'tamano_maximo': self.tamano_maximo}
+
+
+class ColaHeapq(_Cola):
+    """heapq con borrado perezoso: cada mejora agrega una entrada nueva"""
+
+    nombre = 'heapq'
+
+    def __init__(self, n):
+        super().__init__(n)
+        self._monticulo = []
+        self._mejor = [INF] * n
+        self._extraido = bytearray(n)
+
+    def agregar(self, nodo, prioridad):
+        mejor = self._mejor[nodo]
+        if prioridad >= mejor or self._extraido[nodo]:
+            return
+        if mejor == INF:
+            self.inserciones += 1
+        else:
+            self.reducciones += 1
+        self._mejor[nodo] = prioridad
+        heapq.heappush(self._monticulo, (prioridad, nodo))
+        if len(self._monticulo) > self.tamano_maximo:
+            self.tamano_maximo = len(self._monticulo)
+
+    def extraer(self):
+        monticulo = self._monticulo
+        while monticulo:
+            prioridad, nodo = heapq.heappop(monticulo)
+            if self._extraido[nodo] or prioridad > self._mejor[nodo]:
+                self.obsoletas += 1
+                continue
+            self._extraido[nodo] = 1
+            self.extracciones += 1
+            return prioridad, nodo
+        return None
+
+
+class MonticuloIndexado(_Cola):
+    """Montículo binario con la posición de cada nodo: reduce la prioridad en su lugar"""
+
+    nombre = 'indexado'
+
+    def __init__(self, n):
+        super().__init__(n)
+        self._claves = []
+        self._nodos = []
+        self._posicion = [-1] * n
+        self._extraido = bytearray(n)
+
+    def _subir(self, i, prioridad, nodo):
+        claves, nodos, posicion = self._claves, self._nodos, self._posicion
+        while i > 0:
+            padre = (i - 1) >> 1
+            if claves[padre] <= prioridad:
+                break
+            claves[i] = claves[padre]
+            nodos[i] = nodos[padre]
+            posicion[nodos[i]] = i
+            i = padre
+        claves[i] = prioridad
+        nodos[i] = nodo
+        posicion[nodo] = i
+
+    def agregar(self, nodo, prioridad):
+        i = self._posicion[nodo]
+        if i == -1:
+            if self._extraido[nodo]:
+                return
+            i = len(self._nodos)
+            self._claves.append(prioridad)
+            self._nodos.append(nodo)
+            self.inserciones += 1
+            if i >= self.tamano_maximo:
+                self.tamano_maximo = i + 1
+        elif prioridad < self._claves[i]:
+            self.reducciones += 1
+        else:
+            return
+        self._subir(i, prioridad, nodo)
+
+    def extraer(self):
+        claves, nodos, posicion = self._claves, self._nodos, self._posicion
+        if not nodos:
+            return None
+        minimo, nodo_minimo = claves[0], nodos[0]
+        posicion[nodo_minimo] = -1
+        self._extraido[nodo_minimo] = 1
+        self.extracciones += 1
+
+        # El último elemento baja desde la raíz
+        prioridad, nodo = claves.pop(), nodos.pop()
+        tamano = len(nodos)
+        if tamano:
+            i = 0
+            while True:
+                hijo = 2 * i + 1
+                if hijo >= tamano:
+                    break
+                if hijo + 1 < tamano and claves[hijo + 1] < claves[hijo]:
+                    hijo += 1
+                if claves[hijo] >= prioridad:
+                    break
+                claves[i] = claves[hijo]
+                nodos[i] = nodos[hijo]
+                posicion[nodos[i]] = i
+                i = hijo
+            claves[i] = prioridad
+            nodos[i] = nodo
+            posicion[nodo] = i
+        return minimo, nodo_minimo
+
+
+class MonticuloEmparejamiento(_Cola):
+    """
+    Montículo de emparejamiento sobre arreglos indexados por nodo
+    hijo: primer hijo; hermano: siguiente hermano; previo: hermano anterior,
+    o el padre si es el primer hijo (para cortar el subárbol al reducir)
+    """
+
+    nombre = 'emparejamiento'
+
+    def __init__(self, n):
+        super().__init__(n)
+        self._clave = [INF] * n
+        self._hijo = [-1] * n
+        self._hermano = [-1] * n
+        self._previo = [-1] * n
+        self._estado = bytearray(n)  # 0 nunca visto, 1 en la cola, 2 extraído
+        self._raiz = -1
+        self._tamano = 0
+
+    def _unir(self, a, b):
+        """Une dos raíces; la de mayor clave pasa a ser el primer hijo de la otra"""
+        clave = self._clave
+        if clave[b] < clave[a]:
+            a, b = b, a
+        primero = self._hijo[a]
+        self._hermano[b] = primero
+        if primero != -1:
+            self._previo[primero] = b
+        self._previo[b] = a
+        self._hijo[a] = b
+        return a
+
+    def agregar(self, nodo, prioridad):
+        estado = self._estado[nodo]
+        if estado == 0:
+            self._estado[nodo] = 1
+            self._clave[nodo] = prioridad
+            self.inserciones += 1
+            self._tamano += 1
+            if self._tamano > self.tamano_maximo:
+                self.tamano_maximo = self._tamano
+            self._raiz = nodo if self._raiz == -1 else self._unir(self._raiz, nodo)
+            return
+        if estado == 2 or prioridad >= self._clave[nodo]:
+            return
+
+        self.reducciones += 1
+        self._clave[nodo] = prioridad
+        if nodo == self._raiz:
+            return
+        # Cortar el subárbol del nodo y unirlo a la raíz
+        previo, hermano = self._previo[nodo], self._hermano[nodo]
+        if self._hijo[previo] == nodo:
+            self._hijo[previo] = hermano
+        else:
+            self._hermano[previo] = hermano
+        if hermano != -1:
+            self._previo[hermano] = previo
+        self._hermano[nodo] = self._previo[nodo] = -1
+        self._raiz = self._unir(self._raiz, nodo)
+
+    def extraer(self):
+        raiz = self._raiz
+        if raiz == -1:
+            return None
+        self._estado[raiz] = 2
+        self._tamano -= 1
+        self.extracciones += 1
+
+        # Dos pasadas: unir los hijos de a pares y luego de derecha a izquierda
+        hijos = []
+        hijo = self._hijo[raiz]
+        hermano = self._hermano
+        previo = self._previo
+        while hijo != -1:
+            siguiente = hermano[hijo]
+            hermano[hijo] = previo[hijo] = -1
+            hijos.append(hijo)
+            hijo = siguiente
+        self._hijo[raiz] = -1
+
+        pares = [self._unir(hijos[i], hijos[i + 1]) if i + 1 < len(hijos) else hijos[i]
+                 for i in range(0, len(hijos), 2)]
+        nueva = -1
+        for arbol in reversed(pares):
+            nueva = arbol if nueva == -1 else self._unir(arbol, nueva)
+        self._raiz = nueva
+        return self._clave[raiz], raiz
+
+
+class ColaRadix(_Cola):
+    """
+    Montículo radix (prioridades enteras que nunca bajan del último mínimo)
+    La cubeta de una clave es la posición del bit más alto en que difiere del
+    último mínimo; al vaciarse la cubeta 0 se redistribuye la primera no vacía
+    """
+
+    nombre = 'radix'
+
+    def __init__(self, n):
+        super().__init__(n)
+        self._cubetas = [[] for _ in range(65)]
+        self._ultimo = 0
+        self._tamano = 0
+        self._mejor = [INF] * n
+        self._extraido = bytearray(n)
+
+    def agregar(self, nodo, prioridad):
+        mejor = self._mejor[nodo]
+        if prioridad >= mejor or self._extraido[nodo]:
+            return
+        if mejor == INF:
+            self.inserciones += 1
+        else:
+            self.reducciones += 1
+        self._mejor[nodo] = prioridad
+        self._cubetas[(prioridad ^ self._ultimo).bit_length()].append((prioridad, nodo))
+        self._tamano += 1
+        if self._tamano > self.tamano_maximo:
+            self.tamano_maximo = self._tamano
+
+    def extraer(self):
+        cubetas = self._cubetas
+        mejor, extraido = self._mejor, self._extraido
+        while self._tamano:
+            if not cubetas[0]:
+                i = 1
+                while not cubetas[i]:
+                    i += 1
+                cubeta, cubetas[i] = cubetas[i], []
+                # Las obsoletas se descartan aquí en lugar de redistribuirse
+                vigentes = [(p, v) for p, v in cubeta if p == mejor[v] and not extraido[v]]
+                self.obsoletas += len(cubeta) - len(vigentes)
+                self._tamano -= len(cubeta) - len(vigentes)
+                if not vigentes:
+                    continue
+                ultimo = self._ultimo = min(vigentes)[0]
+                for entrada in vigentes:
+                    cubetas[(entrada[0] ^ ultimo).bit_length()].append(entrada)
+
+            prioridad, nodo = cubetas[0].pop()
+            self._tamano -= 1
+            if extraido[nodo] or prioridad != mejor[nodo]:
+                self.obsoletas += 1
+                continue
+            extraido[nodo] = 1
+            self.extracciones += 1
+            return prioridad, nodo
+        return None
+
+
+class ColaDial(_Cola):
+    """
+    Cubetas de Dial: una por distancia entera, en un anillo de peso_maximo + 1
+    Todas las claves vivas caen en [actual, actual + peso_maximo], así que cada
+    cubeta del anillo guarda una sola distancia a la vez
+    """
+
+    nombre = 'dial'
+
+    def __init__(self, n, peso_maximo):
+        super().__init__(n)
+        self._anillo = int(peso_maximo) + 1
+        self._cubetas = [[] for _ in range(self._anillo)]
+        self._actual = 0
+        self._tamano = 0
+        self._mejor = [INF] * n
+        self._extraido = bytearray(n)
+
+    def agregar(self, nodo, prioridad):
+        mejor = self._mejor[nodo]
+        if prioridad >= mejor or self._extraido[nodo]:
+            return
+        if mejor == INF:
+            self.inserciones += 1
+        else:
+            self.reducciones += 1
+        self._mejor[nodo] = prioridad
+        self._cubetas[prioridad % self._anillo].append(nodo)
+        self._tamano += 1
+        if self._tamano > self.tamano_maximo:
+            self.tamano_maximo = self._tamano
+
+    def extraer(self):
+        cubetas, anillo = self._cubetas, self._anillo
+        mejor, extraido = self._mejor, self._extraido
+        actual = self._actual
+        while self._tamano:
+            cubeta = cubetas[actual % anillo]
+            while cubeta:
+                nodo = cubeta.pop()
+                self._tamano -= 1
+                if extraido[nodo] or mejor[nodo] != actual:
+                    self.obsoletas += 1
+                    continue
+                extraido[nodo] = 1
+                self.extracciones += 1
+                self._actual = actual
+                return actual, nodo
+            actual += 1
+        self._actual = actual
+        return None
+
+
+COLAS = {
+    'heapq': ColaHeapq,
+    'indexado': MonticuloIndexado,
+    'emparejamiento': MonticuloEmparejamiento,
+    'radix': ColaRadix,
+    'dial': ColaDial,
+}
+
+# Colas que sólo admiten prioridades enteras
+ENTERAS = ('radix', 'dial')
+
+
+# grafo -> (versión, escala, pesos enteros o None, peso entero máximo)
+_enteros = weakref.WeakKeyDictionary()
+
+
+def _pesos_enteros(g, escala):
+    """(pesos enteros o None, máximo de ellos), guardados por grafo, versión y escala"""
+    guardado = _enteros.get(g)
+    if guardado is not None and guardado[:2] == (g.version, escala):
+        return guardado[2:]
+
+    pesos = np.frombuffer(g.pesos, dtype=np.float64) * escala
+    redondeados = np.rint(pesos)
+    if len(pesos) and (redondeados.min() < 0 or
+                       np.abs(pesos - redondeados).max() > 1e-9 * max(1.0, np.abs(pesos).max())):
+        enteros, maximo = None, 0
+    else:
+        enteros = redondeados.astype(np.int64).tolist()
+        maximo = int(redondeados.max()) if len(pesos) else 0
+    _enteros[g] = (g.version, escala, enteros, maximo)
+    return enteros, maximo
+
+
+def pesos_enteros(g, escala=1):
+    """
+    Pesos multiplicados por escala como lista de enteros (p. ej. escala=1000
+    para pasar de km a metros), o None si alguno no queda entero o es negativo
+    Se guarda por grafo y versión, para no recalcularla en cada consulta
+    """
+    return _pesos_enteros(g, escala)[0]
+
+
+def elegir_cola(g, escala=1):
+    """
+    Cola por defecto según el rango de pesos: dial si son enteros de a lo sumo
+    LIMITE_DIAL, heapq en otro caso. Medido en CPython, heapq (escrito en C)
+    supera a los montículos indexado, de emparejamiento y radix escritos en
+    Python, que quedan para medir y comparar
+    """
+    enteros, maximo = _pesos_enteros(g, escala)
+    if enteros and maximo <= LIMITE_DIAL:
+        return 'dial'
+    return 'heapq'
+
+
+def crear_cola(nombre, n, peso_maximo=0):
+    """Instancia la cola por nombre"""
+    if nombre not in COLAS:
+        raise ValueError(f"Cola desconocida: {nombre} (opciones: {', '.join(COLAS)})")
+    if nombre == 'dial':
+        return ColaDial(n, peso_maximo)
+    return COLAS[nombre](n)
+
+
+def dijkstra_cola(g, origen, destino=-1, objetivos=None, cola=None, escala=1):
+    """
+    Dijkstra sobre ids con la cola indicada (o la elegida por elegir_cola)
+    Con radix y dial las distancias se calculan en enteros (pesos * escala) y se
+    devuelven divididas por escala
+    Devuelve (distancias, previos, asentados, estadísticas de la cola)
+    """
+    n = g.num_nodos
+    desp = g.desplazamientos
+    dest = g.destinos
+    nombre = cola or elegir_cola(g, escala)
+
+    peso_maximo = 0
+    if nombre in ENTERAS:
+        pesos, peso_maximo = _pesos_enteros(g, escala)
+        if pesos is None:
+            raise ValueError(f"La cola {nombre} requiere pesos enteros (escala={escala})")
+        cero = 0
+    else:
+        pesos = g.pesos
+        cero = 0.0
+    q = crear_cola(nombre, n, peso_maximo)
+
+    distancias = [INF] * n
+    previos = array('i', [-1]) * n
+    distancias[origen] = cero
+    asentados = 0
+
+    marcados = None
+    if objetivos is not None:
+        marcados = bytearray(n)
+        for t in objetivos:
+            marcados[t] = 1
+        pendientes = sum(marcados)
+
+    agregar = q.agregar
+    extraer = q.extraer
+    agregar(origen, cero)
+    while True:
+        par = extraer()
+        if par is None:
+            break
+        distancia_actual, u = par
+        asentados += 1
+
+        if u == destino:
+            break
+        if marcados is not None and marcados[u]:
+            pendientes -= 1
+            if pendientes == 0:
+                break
+
+        for i in range(desp[u], desp[u + 1]):
+            v = dest[i]
+            nueva_distancia = distancia_actual + pesos[i]
+            if nueva_distancia < distancias[v]:
+                distancias[v] = nueva_distancia
+                previos[v] = u
+                agregar(v, nueva_distancia)
+
+    if nombre in ENTERAS and escala != 1:
+        distancias = [d / escala for d in distancias]
+    return array('d', distancias), previos, asentados, q.estadisticas()
@@ -1,6 +1,6 @@
-import matplotlib.pyplot as plt
-import networkx as nx
-import heapq
+from grafo_csr import dijkstra as dijkstra_etiquetas
+from matriz_distancias import calcular_rutas
+from k_caminos import rutas_alternativas
 
 # Definir el grafo con las conexiones y distancias
 grafo = {
@@ -40,122 +40,138 @@ posiciones = {
     'Ñ': (9, 1)
 }
 
+# Paneles por fila en la comparación lado a lado
+COLUMNAS_MAXIMAS = 4
+
 def dijkstra(grafo, inicio, fin):
-    """Implementa el algoritmo de Dijkstra"""
-    distancias = {nodo: float('inf') for nodo in grafo}
-    distancias[inicio] = 0
-    previos = {nodo: None for nodo in grafo}
-    visitados = set()
-    
-    cola = [(0, inicio)]
-    
-    while cola:
-        distancia_actual, nodo_actual = heapq.heappop(cola)
-        
-        if nodo_actual in visitados:
-            continue
-        
-        visitados.add(nodo_actual)
-        
-        for vecino, peso in grafo[nodo_actual]:
-            if vecino not in visitados:
-                nueva_distancia = distancia_actual + peso
-                
-                if nueva_distancia < distancias[vecino]:
-                    distancias[vecino] = nueva_distancia
-                    previos[vecino] = nodo_actual
-                    heapq.heappush(cola, (nueva_distancia, vecino))
-    
-    # Construir el camino
-    camino = []
-    nodo = fin
-    while nodo is not None:
-        camino.insert(0, nodo)
-        nodo = previos[nodo]
-    
-    return camino, distancias[fin]
+    """Implementa el algoritmo de Dijkstra (motor CSR con ids enteros)"""
+    camino, distancia, _ = dijkstra_etiquetas(grafo, inicio, fin)
+    return camino, distancia
+
+def _resumir(camino, maximo=8):
+    """Texto de la ruta; las largas se acortan en el medio"""
+    nombres = [str(nodo) for nodo in camino]
+    if len(nombres) > maximo:
+        mitad = maximo // 2 - 1
+        nombres = nombres[:mitad] + [f'… ({len(camino) - 2 * mitad} nodos) …'] + nombres[-mitad:]
+    return " → ".join(nombres)
 
-def comparar_rutas(rutas_info):
-    """Compara múltiples rutas en una sola visualización"""
-    G = nx.Graph()
-    for nodo, vecinos in grafo.items():
-        for vecino, peso in vecinos:
-            G.add_edge(nodo, vecino, weight=peso)
+def comparar_rutas(rutas_info, superpuestas=False, grafo=grafo, posiciones=posiciones):
+    """
+    Compara múltiples rutas en una sola visualización
+    El mapa estático se renderiza una sola vez como imagen y cada panel sólo
+    dibuja encima su ruta; con superpuestas=True todas van en un mismo panel
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+    from dibujo_mapa import CapaBase, LIMITE_ETIQUETAS
     
-    num_rutas = len(rutas_info)
-    fig, axes = plt.subplots(1, num_rutas, figsize=(8 * num_rutas, 8))
+    capa = CapaBase(grafo, posiciones)
+    g = capa.g
+    xs, ys = capa.xs, capa.ys
+    xlim, ylim = capa.limites()
     
-    if num_rutas == 1:
-        axes = [axes]
+    num_rutas = len(rutas_info)
+    num_paneles = 1 if superpuestas else num_rutas
+    columnas = min(num_paneles, COLUMNAS_MAXIMAS)
+    filas = -(-num_paneles // columnas)
+    lado = 8 if num_paneles <= 3 else 6
+    tamano = (16, 10) if superpuestas else (lado * columnas, lado * filas)
+    fig, axes = plt.subplots(filas, columnas, figsize=tamano, squeeze=False)
+    axes = list(axes.ravel())
+    for ax in axes[num_paneles:]:
+        ax.axis('off')
+    axes = axes[:num_paneles]
     
     colores_caminos = ['green', 'blue', 'red', 'purple', 'orange', 'brown']
+    if num_rutas > len(colores_caminos):
+        colores_caminos += [plt.cm.tab20(i % 20) for i in range(num_rutas - len(colores_caminos))]
     
-    for idx, (ax, info) in enumerate(zip(axes, rutas_info)):
-        inicio, fin, camino, distancia = info
-        
-        # Dibujar todas las aristas
-        nx.draw_networkx_edges(G, posiciones, edge_color='gray', 
-                              width=2, alpha=0.3, ax=ax)
-        
-        # Resaltar el camino
-        aristas_camino = [(camino[i], camino[i+1]) for i in range(len(camino)-1)]
-        color_camino = colores_caminos[idx % len(colores_caminos)]
-        nx.draw_networkx_edges(G, posiciones, edgelist=aristas_camino,
-                              width=5, edge_color=color_camino, ax=ax, alpha=0.8)
+    # Títulos primero: el tamaño final de los paneles depende de ellos
+    if superpuestas:
+        axes[0].set_title(f'{num_rutas} rutas superpuestas', fontsize=14, fontweight='bold')
+    else:
+        for idx, (ax, (inicio, fin, camino, distancia)) in enumerate(zip(axes, rutas_info)):
+            ax.set_title(f'Ruta {idx + 1}: {inicio} → {fin}\n'
+                       f'{_resumir(camino)}\n'
+                       f'Distancia: {distancia:.2f} km',
+                       fontsize=12, fontweight='bold')
+    for ax in axes:
+        ax.set_xlim(xlim)
+        ax.set_ylim(ylim)
+        ax.axis('off')
+    plt.tight_layout()
+    if superpuestas:
+        # Espacio a la derecha para la leyenda
+        fig.subplots_adjust(right=0.75 if num_rutas <= 20 else 0.6)
+    
+    # Mapa base: una sola vez, al tamaño en píxeles de un panel
+    caja = axes[0].get_window_extent()
+    fondo = capa.imagen(xlim, ylim, max(1, int(caja.width)), max(1, int(caja.height)),
+                        tamano_nodo=800, fuente=12)
+    for ax in axes:
+        ax.imshow(fondo, extent=(*xlim, *ylim), interpolation='nearest',
+                  aspect='auto', zorder=0)
+        ax.set_xlim(xlim)
+        ax.set_ylim(ylim)
+    
+    # Cada ruta: su camino, sus nodos resaltados y sus nombres
+    pocos_nodos = g.num_nodos <= 50
+    for idx, (inicio, fin, camino, distancia) in enumerate(rutas_info):
+        ax = axes[0] if superpuestas else axes[idx]
+        color_camino = colores_caminos[idx]
+        camino_ids = [g.id_de(nodo) for nodo in camino]
         
-        # Dibujar etiquetas de peso
-        edge_labels = nx.get_edge_attributes(G, 'weight')
-        edge_labels = {k: f'{v:.1f}' for k, v in edge_labels.items()}
-        nx.draw_networkx_edge_labels(G, posiciones, edge_labels, 
-                                    font_size=8, ax=ax)
+        # Superpuestas, las rutas anteriores van más anchas para que asomen debajo
+        ancho = max(2, 8 - 5 * idx / max(1, num_rutas - 1)) if superpuestas else 5
+        segmentos = [((xs[u], ys[u]), (xs[v], ys[v])) for u, v in zip(camino_ids, camino_ids[1:])]
+        ax.add_collection(LineCollection(segmentos, colors=[color_camino], linewidths=ancho,
+                                         alpha=0.8, zorder=1,
+                                         label=f'Ruta {idx + 1}: {inicio} → {fin} '
+                                               f'({distancia:.2f} km)'),
+                          autolim=False)
         
         # Colores de los nodos
+        if len(camino_ids) > LIMITE_ETIQUETAS or superpuestas:
+            nodos = [camino_ids[0], camino_ids[-1]]
+        else:
+            nodos = camino_ids
         colores = []
-        for nodo in G.nodes():
-            if nodo in camino:
-                if nodo == inicio:
-                    colores.append('lightgreen')
-                elif nodo == fin:
-                    colores.append('lightcoral')
-                else:
-                    colores.append('gold')
+        for u in nodos:
+            nodo = g.etiquetas[u]
+            if nodo == inicio:
+                colores.append('lightgreen')
+            elif nodo == fin:
+                colores.append('lightcoral')
             else:
-                colores.append('lightgray')
+                colores.append('gold')
         
         # Dibujar nodos
-        nx.draw_networkx_nodes(G, posiciones, node_color=colores,
-                              node_size=800, ax=ax, edgecolors='black', linewidths=2)
-        nx.draw_networkx_labels(G, posiciones, font_size=12,
-                               font_weight='bold', ax=ax)
-        
-        # Título
-        ax.set_title(f'Ruta {idx + 1}: {inicio} → {fin}\n'
-                   f'{" → ".join(camino)}\n'
-                   f'Distancia: {distancia:.2f} km',
-                   fontsize=12, fontweight='bold')
-        
-        ax.set_xlim(-1, 11)
-        ax.set_ylim(-1, 7)
-        ax.axis('off')
+        ax.scatter(xs[nodos], ys[nodos], s=800 if pocos_nodos else 60, c=colores,
+                   edgecolors='black', linewidths=2, zorder=3)
+        if g.num_nodos <= LIMITE_ETIQUETAS:
+            for u in nodos:
+                ax.text(xs[u], ys[u], str(g.etiquetas[u]), fontsize=12, fontweight='bold',
+                        ha='center', va='center', zorder=4)
+    
+    if superpuestas:
+        # Fuera del mapa para no tapar las rutas
+        axes[0].legend(loc='upper left', bbox_to_anchor=(1.0, 1.0),
+                       fontsize=10 if num_rutas <= 20 else 8,
+                       ncol=1 if num_rutas <= 20 else 2)
     
-    plt.tight_layout()
     return fig
 
-def main():
-    print("=" * 70)
-    print(" " * 15 + "COMPARADOR DE RUTAS - DIJKSTRA")
-    print("=" * 70)
-    print("\nEste programa permite comparar múltiples rutas simultáneamente")
-    print("\nNodos disponibles: A, B, C, D, E, F, G, H, I, J, K, L, M, N, Ñ")
-    
-    print("\n¿Cuántas rutas deseas comparar? (1-6): ", end="")
+def pedir_pares():
+    """Pide los pares origen/destino y calcula sus rutas"""
+    print("\n¿Cuántas rutas deseas comparar?: ", end="")
     num_rutas = int(input().strip())
     
-    if num_rutas < 1 or num_rutas > 6:
-        print("❌ Número de rutas inválido. Debe ser entre 1 y 6.")
-        return
+    if num_rutas < 1:
+        print("❌ Número de rutas inválido. Debe ser al menos 1.")
+        return None
     
-    rutas_info = []
+    pares = []
     
     for i in range(num_rutas):
         print(f"\n--- Ruta {i + 1} ---")
@@ -167,17 +183,70 @@ def main():
         
         if inicio not in grafo or fin not in grafo:
             print(f"❌ Error: Nodos inválidos para la ruta {i + 1}")
-            return
-        
-        camino, distancia = dijkstra(grafo, inicio, fin)
+            return None
         
+        pares.append((inicio, fin))
+    
+    # Una sola búsqueda por cada origen distinto
+    rutas_info = []
+    
+    for (inicio, fin), (camino, distancia) in zip(pares, calcular_rutas(grafo, pares)):
         if distancia == float('inf'):
             print(f"❌ No existe un camino entre {inicio} y {fin}")
-            return
+            return None
         
         rutas_info.append((inicio, fin, camino, distancia))
         print(f"✅ Ruta calculada: {' → '.join(camino)} ({distancia:.2f} km)")
     
+    return rutas_info
+
+def pedir_alternativas():
+    """Pide un par origen/destino y K, y calcula las K mejores rutas sin ciclos (Yen)"""
+    print("\nNodo de inicio: ", end="")
+    inicio = input().strip().upper()
+    
+    print("Nodo de destino: ", end="")
+    fin = input().strip().upper()
+    
+    if inicio not in grafo or fin not in grafo:
+        print("❌ Error: Uno o ambos nodos no existen en el grafo.")
+        return None
+    
+    print("¿Cuántas rutas alternativas (K)?: ", end="")
+    k = int(input().strip())
+    
+    if k < 1:
+        print("❌ Número de rutas inválido. Debe ser al menos 1.")
+        return None
+    
+    rutas_info = rutas_alternativas(grafo, inicio, fin, k)
+    if not rutas_info:
+        print(f"❌ No existe un camino entre {inicio} y {fin}")
+        return None
+    if len(rutas_info) < k:
+        print(f"ℹ️  Sólo existen {len(rutas_info)} rutas sin ciclos entre {inicio} y {fin}")
+    
+    for _, _, camino, distancia in rutas_info:
+        print(f"✅ Ruta calculada: {' → '.join(camino)} ({distancia:.2f} km)")
+    return rutas_info
+
+def main():
+    print("=" * 70)
+    print(" " * 15 + "COMPARADOR DE RUTAS - DIJKSTRA")
+    print("=" * 70)
+    print("\nEste programa permite comparar múltiples rutas simultáneamente")
+    print("\nNodos disponibles: A, B, C, D, E, F, G, H, I, J, K, L, M, N, Ñ")
+    
+    print("\n¿Buscar las K mejores rutas alternativas entre un mismo par? (s/n): ", end="")
+    alternativas = input().strip().lower() == 's'
+    
+    if alternativas:
+        rutas_info = pedir_alternativas()
+    else:
+        rutas_info = pedir_pares()
+    if not rutas_info:
+        return
+    
     # Mostrar tabla comparativa
     print("\n" + "=" * 70)
     print(" " * 25 + "COMPARACIÓN DE RUTAS")
@@ -198,8 +267,12 @@ def main():
     
     print("\n📊 Generando comparación visual...")
     
+    print("¿Superponer todas las rutas en un solo panel? (s/n): ", end="")
+    superpuestas = input().strip().lower() == 's'
+    
     # Visualizar comparación
-    fig = comparar_rutas(rutas_info)
+    import matplotlib.pyplot as plt
+    fig = comparar_rutas(rutas_info, superpuestas=superpuestas)
     
     print("✅ Visualización lista. Cierra la ventana para terminar.")
     plt.show()
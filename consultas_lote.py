@@ -0,0 +1,223 @@
+"""
+Consultas por lotes sin ventana, desde la línea de comandos
+Lee una consulta por línea ({"inicio": "A", "fin": "J"} o simplemente "A J")
+de un archivo o de la entrada estándar y escribe un resultado JSON por línea a
+medida que se resuelven. Las líneas se agrupan en bloques que se reparten entre
+procesos; dentro de un bloque se hace una sola búsqueda por origen distinto.
+Sólo se importa el motor: NumPy al leer archivos de grafo y matplotlib al dibujar
+
+Uso:
+    python consultas_lote.py consultas.jsonl --grafo red.bin --caminos > rutas.jsonl
+    cat pares.txt | python consultas_lote.py --procesos 8
+"""
+
+import argparse
+from itertools import islice
+import json
+import os
+import sys
+
+from grafo_csr import INF, GrafoCSR, dijkstra_csr, reconstruir_camino
+from paralelo import mapear_en_flujo
+
+# Líneas de consulta por tarea enviada a un proceso
+TAM_BLOQUE = 4096
+
+
+def leer_grafo(ruta=None, formato='auto', dirigido=True):
+    """
+    (GrafoCSR, posiciones o None) desde un archivo; sin ruta, el grafo de ejemplo
+    formato: 'csv', 'dimacs' (.gr, con su .co al lado si existe), 'binario' o 'auto'
+    """
+    if ruta is None:
+        from dijkstra_simple import grafo, posiciones
+        return GrafoCSR.desde_diccionario(grafo), posiciones
+
+    if formato == 'auto':
+        extension = os.path.splitext(ruta)[1].lower()
+        formato = {'.gr': 'dimacs', '.csv': 'csv', '.tsv': 'csv'}.get(extension, 'binario')
+
+    from carga_grafos import abrir_binario, cargar_csv, cargar_dimacs
+    if formato == 'dimacs':
+        ruta_co = os.path.splitext(ruta)[0] + '.co'
+        return cargar_dimacs(ruta, ruta_co if os.path.exists(ruta_co) else None)
+    if formato == 'csv':
+        separador = '\t' if ruta.lower().endswith('.tsv') else ','
+        return cargar_csv(ruta, separador, dirigido=dirigido), None
+    if formato == 'binario':
+        return abrir_binario(ruta), None
+    raise ValueError(f"Formato de grafo desconocido: {formato}")
+
+
+def _id_de(g, etiqueta):
+    """
+    Id de la etiqueta; acepta 7 y "7" indistintamente (KeyError si no existe,
+    ValueError si no es texto ni entero, p. ej. una lista en la consulta JSON)
+    """
+    if not isinstance(etiqueta, (str, int)):
+        raise ValueError(f"Etiqueta de nodo inválida: {json.dumps(etiqueta, ensure_ascii=False)}")
+    if etiqueta in g:
+        return g.id_de(etiqueta)
+    if isinstance(etiqueta, str):
+        if etiqueta.lstrip('-').isdigit() and int(etiqueta) in g:
+            return g.id_de(int(etiqueta))
+    elif str(etiqueta) in g:
+        return g.id_de(str(etiqueta))
+    raise KeyError(etiqueta)
+
+
+def _leer_consulta(texto):
+    """Diccionario de la consulta con al menos 'inicio' y 'fin'"""
+    if texto.startswith('{'):
+        consulta = json.loads(texto)
+        if 'inicio' not in consulta or 'fin' not in consulta:
+            raise ValueError("La consulta debe tener 'inicio' y 'fin'")
+        return consulta
+    partes = texto.split()
+    if len(partes) != 2:
+        raise ValueError("Se esperaba 'inicio fin' o un objeto JSON")
+    return {'inicio': partes[0], 'fin': partes[1]}
+
+
+def _dibujar(g, posiciones, carpeta, linea, inicio, fin, camino_ids, distancias):
+    """Guarda la ruta como PNG con visualizar_resultado, sin abrir ventanas"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from dijkstra_simple import visualizar_resultado
+
+    etiquetas = g.etiquetas
+    todas_distancias = {etiquetas[i]: distancias[i] for i in range(g.num_nodos)}
+    camino = [etiquetas[i] for i in camino_ids]
+    fig = visualizar_resultado(g, camino, distancias[camino_ids[-1]], inicio, fin,
+                               todas_distancias, posiciones=posiciones)
+    fig.savefig(os.path.join(carpeta, f'{linea:08d}_{inicio}_{fin}.png'))
+    plt.close(fig)
+
+
+def resolver_bloque(g, lineas, primera, caminos=False, carpeta=None, posiciones=None):
+    """
+    Resuelve un bloque de líneas de consulta y devuelve la salida como texto,
+    una línea JSON por consulta en el mismo orden. primera es el número de la
+    primera línea, para ubicar los errores. Las líneas vacías se ignoran
+    """
+    consultas = []  # (número de línea, consulta, origen, destino) o (número, error)
+    for numero, texto in enumerate(lineas, primera):
+        texto = texto.strip()
+        if not texto:
+            continue
+        try:
+            consulta = _leer_consulta(texto)
+            origen = _id_de(g, consulta['inicio'])
+            destino = _id_de(g, consulta['fin'])
+        except KeyError as error:
+            consultas.append((numero, f"Nodo inexistente: {error.args[0]}"))
+        except ValueError as error:
+            consultas.append((numero, str(error)))
+        else:
+            consultas.append((numero, consulta, origen, destino))
+
+    # Una búsqueda por origen distinto, que se detiene al asentar todos sus destinos
+    grupos = {}
+    for entrada in consultas:
+        if len(entrada) == 4:
+            grupos.setdefault(entrada[2], set()).add(entrada[3])
+    arboles = {origen: dijkstra_csr(g, origen, objetivos=objetivos)[:2]
+               for origen, objetivos in grupos.items()}
+
+    salida = []
+    for entrada in consultas:
+        if len(entrada) == 2:
+            numero, error = entrada
+            salida.append(json.dumps({'linea': numero, 'error': error}, ensure_ascii=False))
+            continue
+
+        numero, consulta, origen, destino = entrada
+        distancias, previos = arboles[origen]
+        distancia = distancias[destino]
+        resultado = dict(consulta)
+        resultado['distancia'] = distancia if distancia != INF else None
+        if caminos or carpeta:
+            camino_ids = reconstruir_camino(previos, destino) if distancia != INF else []
+            if caminos:
+                resultado['camino'] = [g.etiquetas[i] for i in camino_ids]
+            if carpeta and camino_ids:
+                _dibujar(g, posiciones, carpeta, numero, consulta['inicio'], consulta['fin'],
+                         camino_ids, distancias)
+        salida.append(json.dumps(resultado, ensure_ascii=False))
+
+    return ''.join(linea + '\n' for linea in salida)
+
+
+def _bloques(entrada, tam_bloque):
+    """(líneas, número de la primera) de a tam_bloque líneas, sin leer más de la cuenta"""
+    primera = 1
+    while True:
+        lineas = list(islice(entrada, tam_bloque))
+        if not lineas:
+            return
+        yield lineas, primera
+        primera += len(lineas)
+
+
+def resolver_flujo(g, entrada, salida, procesos=None, tam_bloque=TAM_BLOQUE,
+                   caminos=False, carpeta=None, posiciones=None):
+    """
+    Resuelve todas las consultas de entrada (iterable de líneas) y escribe cada
+    bloque en salida apenas está listo. Con procesos=1 no se crea ningún proceso
+    """
+    tareas = ((lineas, primera, caminos, carpeta, posiciones)
+              for lineas, primera in _bloques(entrada, tam_bloque))
+    if procesos == 1:
+        resultados = (resolver_bloque(g, *tarea) for tarea in tareas)
+    else:
+        resultados = mapear_en_flujo(g, resolver_bloque, tareas, procesos)
+
+    for texto in resultados:
+        salida.write(texto)
+        salida.flush()
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(
+        description="Resuelve consultas de ruta más corta por lotes y escribe líneas JSON")
+    parser.add_argument('consultas', nargs='?', default='-',
+                        help="archivo de consultas, una por línea ('-' = entrada estándar)")
+    parser.add_argument('--grafo', help="archivo del grafo (por defecto, el grafo de ejemplo)")
+    parser.add_argument('--formato', default='auto', choices=['auto', 'csv', 'dimacs', 'binario'])
+    parser.add_argument('--no-dirigido', action='store_true',
+                        help="en CSV, cada línea agrega también la arista inversa")
+    parser.add_argument('--caminos', action='store_true', help="incluir el camino en la salida")
+    parser.add_argument('--procesos', type=int, default=None,
+                        help="procesos trabajadores (por defecto, uno por CPU)")
+    parser.add_argument('--bloque', type=int, default=TAM_BLOQUE,
+                        help="consultas por tarea enviada a un proceso")
+    parser.add_argument('--dibujar', metavar='CARPETA',
+                        help="guardar cada ruta como PNG (requiere posiciones)")
+    opciones = parser.parse_args(argumentos)
+
+    g, posiciones = leer_grafo(opciones.grafo, opciones.formato, not opciones.no_dirigido)
+    if opciones.dibujar:
+        if posiciones is None:
+            parser.error("--dibujar requiere un grafo con posiciones")
+        os.makedirs(opciones.dibujar, exist_ok=True)
+    else:
+        posiciones = None  # no se envían a los procesos si no se dibuja
+
+    if opciones.consultas == '-':
+        entrada = open(sys.stdin.fileno(), encoding='utf-8', closefd=False)
+    else:
+        entrada = open(opciones.consultas, encoding='utf-8')
+    salida = open(sys.stdout.fileno(), 'w', encoding='utf-8', closefd=False)
+
+    try:
+        with entrada, salida:
+            resolver_flujo(g, entrada, salida, opciones.procesos, opciones.bloque,
+                           opciones.caminos, opciones.dibujar, posiciones)
+    except BrokenPipeError:
+        # El lector cerró la tubería (p. ej. `| head`): no es un error
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+
+
+if __name__ == "__main__":
+    main()
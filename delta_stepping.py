@@ -0,0 +1,244 @@
+"""
+Delta-stepping: árbol de caminos mínimos desde un origen a todos los nodos
+Los nodos se agrupan en cubetas de ancho Δ según su distancia tentativa y cada
+cubeta se procesa en lotes vectorizados con NumPy: primero se relajan, todas a
+la vez, las aristas livianas (peso <= Δ) de los nodos de la cubeta hasta que
+ésta no cambia, y luego una sola vez sus aristas pesadas. Con procesos > 1 las
+fases grandes se reparten entre procesos que leen el CSR desde memoria compartida
+"""
+
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import os
+import weakref
+
+import numpy as np
+
+from grafo_csr import INF, como_csr, dijkstra_csr
+
+# Nodos a partir de los cuales delta-stepping supera al Dijkstra con heapq (medido)
+UMBRAL_NODOS = 10000
+# Aristas por fase a partir de las cuales conviene repartir la relajación entre procesos
+UMBRAL_PROCESOS = 200000
+
+
+class _Particion:
+    """Aristas livianas y pesadas del grafo para un Δ, cada grupo en su propio CSR"""
+
+    def __init__(self, g, delta):
+        desplazamientos = np.frombuffer(g.desplazamientos, dtype=np.int64)
+        destinos = np.frombuffer(g.destinos, dtype=np.int32)
+        pesos = np.frombuffer(g.pesos, dtype=np.float64)
+        self.delta = delta
+        self.livianas = self._sub_csr(desplazamientos, destinos, pesos, pesos <= delta)
+        self.pesadas = self._sub_csr(desplazamientos, destinos, pesos, pesos > delta)
+
+    @staticmethod
+    def _sub_csr(desplazamientos, destinos, pesos, mascara):
+        cuentas = np.concatenate(([0], np.cumsum(mascara, dtype=np.int64)))
+        return cuentas[desplazamientos], destinos[mascara], pesos[mascara]
+
+
+_particiones = weakref.WeakKeyDictionary()  # grafo -> (versión, _Particion)
+
+
+def _particion(g, delta):
+    guardada = _particiones.get(g)
+    if guardada is not None and guardada[0] == g.version and guardada[1].delta == delta:
+        return guardada[1]
+    particion = _Particion(g, delta)
+    _particiones[g] = (g.version, particion)
+    return particion
+
+
+def elegir_delta(g):
+    """
+    Δ automático: el peso medio por el grado medio de salida, de modo que una
+    cubeta abarque en promedio un salto y las fases livianas reencuentren pocos
+    nodos, acotado por el peso máximo (Δ mayor es Bellman-Ford por cubeta)
+    """
+    pesos = np.frombuffer(g.pesos, dtype=np.float64)
+    if not len(pesos):
+        return 1.0
+    grado_medio = len(pesos) / max(1, g.num_nodos)
+    delta = float(pesos.mean()) * max(1.0, grado_medio)
+    positivos = pesos[pesos > 0]
+    if not len(positivos):
+        return 1.0  # Todos los pesos son 0: cualquier Δ positivo sirve
+    return max(min(delta, float(pesos.max())), float(positivos.min()))
+
+
+def _aristas_de(csr, nodos):
+    """(origen, destino, peso) de todas las aristas que salen de nodos, sin bucles"""
+    desplazamientos, destinos, pesos = csr
+    inicio = desplazamientos[nodos]
+    cuentas = desplazamientos[nodos + 1] - inicio
+    total = int(cuentas.sum())
+    if total == 0:
+        return nodos[:0], destinos[:0], pesos[:0]
+    # Índice de cada arista: inicio de su nodo más su posición dentro del grupo
+    base = np.repeat(inicio - (np.cumsum(cuentas) - cuentas), cuentas)
+    indices = base + np.arange(total)
+    return np.repeat(nodos, cuentas), destinos[indices], pesos[indices]
+
+
+def _mejoras(distancias, origenes, destinos, pesos):
+    """(destino, nueva distancia, previo) de las relajaciones que mejoran, una por destino"""
+    return _elegir(distancias, destinos, distancias[origenes] + pesos, origenes)
+
+
+def _elegir(distancias, destinos, candidatas, origenes):
+    """Se queda con la menor candidata de cada destino, si mejora su distancia"""
+    mejora = candidatas < distancias[destinos]
+    destinos, candidatas, origenes = destinos[mejora], candidatas[mejora], origenes[mejora]
+    if len(destinos) > 1:
+        orden = np.lexsort((candidatas, destinos))
+        destinos, candidatas, origenes = destinos[orden], candidatas[orden], origenes[orden]
+        primeras = np.concatenate(([True], destinos[1:] != destinos[:-1]))
+        destinos, candidatas, origenes = destinos[primeras], candidatas[primeras], origenes[primeras]
+    return destinos, candidatas, origenes
+
+
+# --- Trabajadores: el CSR y las distancias viven en memoria compartida ---
+
+_compartido = None
+
+
+def _adjuntar(nombres):
+    """Inicializador de cada proceso: mapea los bloques de memoria compartida"""
+    global _compartido
+    _compartido = {}
+    for clave, (nombre, tipo, largo) in nombres.items():
+        bloque = shared_memory.SharedMemory(name=nombre)
+        _compartido[clave] = (bloque, np.ndarray(largo, dtype=tipo, buffer=bloque.buf))
+
+
+def _relajar_en_trabajador(grupo, nodos):
+    """Mejoras de las aristas de un tramo de nodos, leídas del CSR compartido"""
+    csr = tuple(_compartido[f'{grupo}_{parte}'][1] for parte in ('desp', 'dest', 'pesos'))
+    distancias = _compartido['distancias'][1]
+    return _mejoras(distancias, *_aristas_de(csr, nodos))
+
+
+class _Reparto:
+    """Pool de procesos sobre copias en memoria compartida de la partición y las distancias"""
+
+    def __init__(self, particion, n, procesos):
+        self.bloques = []
+        self.arreglos = {}
+        nombres = {}
+        fuentes = {'distancias': np.full(n, INF)}
+        for grupo in ('livianas', 'pesadas'):
+            for parte, arreglo in zip(('desp', 'dest', 'pesos'), getattr(particion, grupo)):
+                fuentes[f'{grupo}_{parte}'] = arreglo
+        for clave, arreglo in fuentes.items():
+            bloque = shared_memory.SharedMemory(create=True, size=max(1, arreglo.nbytes))
+            copia = np.ndarray(arreglo.shape, dtype=arreglo.dtype, buffer=bloque.buf)
+            copia[:] = arreglo
+            self.bloques.append(bloque)
+            self.arreglos[clave] = copia
+            nombres[clave] = (bloque.name, arreglo.dtype.str, len(arreglo))
+        self.procesos = procesos
+        self.ejecutor = ProcessPoolExecutor(max_workers=procesos, initializer=_adjuntar,
+                                            initargs=(nombres,))
+
+    def relajar(self, grupo, nodos, distancias):
+        """Reparte los nodos en tramos de aristas parejas y junta las mejoras"""
+        desplazamientos = self.arreglos[f'{grupo}_desp']
+        cuentas = np.cumsum(desplazamientos[nodos + 1] - desplazamientos[nodos])
+        cortes = np.searchsorted(cuentas, cuentas[-1] * np.arange(1, self.procesos) / self.procesos)
+        tramos = [tramo for tramo in np.split(nodos, cortes) if len(tramo)]
+        partes = list(self.ejecutor.map(_relajar_en_trabajador, [grupo] * len(tramos), tramos))
+        # Cada tramo eligió su mejor candidata por destino; falta elegir entre tramos
+        return _elegir(distancias, *(np.concatenate([p[i] for p in partes]) for i in range(3)))
+
+    def cerrar(self):
+        self.ejecutor.shutdown()
+        del self.arreglos
+        for bloque in self.bloques:
+            bloque.close()
+            bloque.unlink()
+
+
+def delta_stepping_csr(g, origen, delta=None, procesos=1):
+    """
+    Árbol de caminos mínimos desde origen (id) con delta-stepping
+    delta: ancho de las cubetas (por defecto elegir_delta); procesos > 1 reparte
+    las fases con más de UMBRAL_PROCESOS aristas entre procesos
+    Devuelve (distancias, previos, asentados) como dijkstra_csr sin destino
+    """
+    n = g.num_nodos
+    delta = delta or elegir_delta(g)
+    if delta <= 0:
+        raise ValueError(f"Δ debe ser positivo: {delta}")
+    particion = _particion(g, delta)
+    procesos = procesos or os.cpu_count() or 1
+    reparto = _Reparto(particion, n, procesos) if procesos > 1 else None
+
+    distancias = np.full(n, INF)
+    previos = np.full(n, -1, dtype=np.int64)
+    distancias[origen] = 0.0
+    if reparto is not None:
+        compartidas = reparto.arreglos['distancias']  # copia que leen los procesos
+        compartidas[origen] = 0.0
+
+    def relajar(grupo, nodos):
+        csr = getattr(particion, grupo)
+        if reparto is not None and (csr[0][nodos + 1] - csr[0][nodos]).sum() >= UMBRAL_PROCESOS:
+            destinos, candidatas, origenes = reparto.relajar(grupo, nodos, distancias)
+        else:
+            destinos, candidatas, origenes = _mejoras(distancias, *_aristas_de(csr, nodos))
+        distancias[destinos] = candidatas
+        previos[destinos] = origenes
+        if reparto is not None:
+            compartidas[destinos] = candidatas
+        return destinos
+
+    try:
+        pendientes = np.array([origen], dtype=np.int64)
+        while len(pendientes):
+            # La cubeta no vacía de menor índice
+            pendientes = np.unique(pendientes)
+            tentativas = distancias[pendientes]
+            limite = (np.floor(tentativas.min() / delta) + 1) * delta
+            en_cubeta = tentativas < limite
+            actuales = pendientes[en_cubeta]
+            pendientes = [pendientes[~en_cubeta]]
+
+            # Fases livianas hasta que la cubeta no recibe más nodos
+            procesados = [actuales]
+            while len(actuales):
+                mejorados = relajar('livianas', actuales).astype(np.int64)
+                en_cubeta = distancias[mejorados] < limite
+                actuales = mejorados[en_cubeta]
+                pendientes.append(mejorados[~en_cubeta])
+                procesados.append(actuales)
+
+            # Aristas pesadas: sus destinos siempre caen en cubetas posteriores
+            pendientes.append(relajar('pesadas', np.unique(np.concatenate(procesados)))
+                              .astype(np.int64))
+            pendientes = np.concatenate(pendientes)
+            pendientes = pendientes[distancias[pendientes] >= limite]
+
+        resultado = (array('d', distancias.tobytes()),
+                     array('i', previos.astype(np.int32).tobytes()),
+                     int(np.count_nonzero(np.isfinite(distancias))))
+    finally:
+        if reparto is not None:
+            reparto.cerrar()
+    return resultado
+
+
+def arbol_completo(g, origen):
+    """Árbol completo desde origen con el motor más rápido para el tamaño del grafo"""
+    if g.num_nodos < UMBRAL_NODOS:
+        return dijkstra_csr(g, origen)
+    return delta_stepping_csr(g, origen)
+
+
+def distancias_desde(grafo, inicio, delta=None, procesos=1):
+    """{nodo: distancia} desde inicio a todos los nodos con delta-stepping"""
+    g = como_csr(grafo)
+    distancias, _, _ = delta_stepping_csr(g, g.id_de(inicio), delta, procesos)
+    return {g.etiquetas[i]: distancias[i] for i in range(g.num_nodos)}
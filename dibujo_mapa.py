@@ -0,0 +1,215 @@
+"""
+Dibujo vectorizado de redes grandes con nivel de detalle
+Toda la red es una sola LineCollection; al cambiar el zoom se descartan las
+aristas fuera de la vista y, si aun así quedan más de las que la pantalla
+puede distinguir, se agregan en una imagen de densidad a resolución de píxel.
+Las etiquetas de peso sólo se dibujan cuando caben; las del camino tienen prioridad
+"""
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba
+from matplotlib.figure import Figure
+
+from grafo_csr import como_csr
+
+# Aristas visibles por encima de las cuales la capa base pasa a ser una imagen
+LIMITE_SEGMENTOS = 50000
+# Aristas visibles por debajo de las cuales se rotulan todos los pesos
+LIMITE_ETIQUETAS = 200
+# Nodos por encima de los cuales sólo se dibujan los de las rutas
+LIMITE_NODOS = 2000
+
+
+def coordenadas(g, posiciones):
+    """Arreglos (xs, ys) alineados con los ids; ValueError si falta alguna posición"""
+    try:
+        puntos = np.array([posiciones[nodo] for nodo in g.etiquetas], dtype=float)
+    except KeyError as error:
+        raise ValueError(f"Falta la posición del nodo {error.args[0]}") from None
+    puntos = puntos.reshape(-1, 2)
+    return puntos[:, 0].copy(), puntos[:, 1].copy()
+
+
+def aristas_unicas(g):
+    """
+    Una arista sin dirección por par de nodos: (u, v, peso) con u < v
+    Si hay varias entre el mismo par se conserva la primera
+    """
+    desplazamientos = np.frombuffer(g.desplazamientos, dtype=np.int64)
+    v = np.frombuffer(g.destinos, dtype=np.int32).astype(np.int64)
+    u = np.repeat(np.arange(g.num_nodos, dtype=np.int64), np.diff(desplazamientos))
+    pesos = np.frombuffer(g.pesos, dtype=np.float64)
+
+    fuera_de_lazo = u != v
+    menor = np.minimum(u, v)[fuera_de_lazo]
+    mayor = np.maximum(u, v)[fuera_de_lazo]
+    claves, primeras = np.unique(menor * g.num_nodos + mayor, return_index=True)
+    return (claves // g.num_nodos, claves % g.num_nodos,
+            pesos[fuera_de_lazo][primeras], claves)
+
+
+class CapaBase:
+    """Capa estática de la red (aristas grises y sus pesos) con nivel de detalle por zoom"""
+
+    def __init__(self, grafo, posiciones):
+        self.g = como_csr(grafo)
+        self.xs, self.ys = coordenadas(self.g, posiciones)
+        self.u, self.v, self.pesos, self._claves = aristas_unicas(self.g)
+        self.segmentos = np.stack([np.column_stack([self.xs[self.u], self.ys[self.u]]),
+                                   np.column_stack([self.xs[self.v], self.ys[self.v]])], axis=1)
+        self.fijas = np.zeros(0, dtype=np.int64)  # aristas rotuladas siempre (el camino)
+        self._ax = None
+        self._rotulos = []
+
+    @property
+    def num_aristas(self):
+        return len(self.u)
+
+    def indices_aristas(self, pares_ids):
+        """Posición en la capa de cada par (a, b) de ids; -1 si no existe la arista"""
+        if not pares_ids:
+            return np.zeros(0, dtype=np.int64)
+        pares = np.asarray(pares_ids, dtype=np.int64).reshape(-1, 2)
+        claves = pares.min(axis=1) * self.g.num_nodos + pares.max(axis=1)
+        posiciones = np.searchsorted(self._claves, claves)
+        posiciones = np.minimum(posiciones, len(self._claves) - 1)
+        return np.where(self._claves[posiciones] == claves, posiciones, -1)
+
+    def limites(self, margen=0.1):
+        """(xlim, ylim) que abarcan todos los nodos con un margen relativo"""
+        if not len(self.xs):
+            return (0.0, 1.0), (0.0, 1.0)
+        ancho = self.xs.max() - self.xs.min()
+        alto = self.ys.max() - self.ys.min()
+        espacio = margen * max(ancho, alto, 1e-9)
+        return ((self.xs.min() - espacio, self.xs.max() + espacio),
+                (self.ys.min() - espacio, self.ys.max() + espacio))
+
+    def visibles(self, xlim, ylim):
+        """Índices de las aristas cuya caja envolvente toca la vista"""
+        x = self.segmentos[:, :, 0]
+        y = self.segmentos[:, :, 1]
+        dentro = ((x.max(axis=1) >= min(xlim)) & (x.min(axis=1) <= max(xlim)) &
+                  (y.max(axis=1) >= min(ylim)) & (y.min(axis=1) <= max(ylim)))
+        return np.nonzero(dentro)[0]
+
+    def densidad(self, indices, xlim, ylim, ancho_px, alto_px):
+        """
+        Cuenta de aristas que pasan por cada píxel de la vista (alto_px, ancho_px)
+        Cada segmento se muestrea a paso de un píxel, sin bucles en Python
+        """
+        x0, x1 = sorted(xlim)
+        y0, y1 = sorted(ylim)
+        escala_x = ancho_px / (x1 - x0)
+        escala_y = alto_px / (y1 - y0)
+        segmentos = self.segmentos[indices]
+        px = (segmentos[:, :, 0] - x0) * escala_x
+        py = (segmentos[:, :, 1] - y0) * escala_y
+
+        largo = np.hypot(px[:, 1] - px[:, 0], py[:, 1] - py[:, 0])
+        muestras = np.minimum(np.ceil(largo), ancho_px + alto_px).astype(np.int64) + 1
+        segmento = np.repeat(np.arange(len(indices)), muestras)
+        inicio = np.cumsum(muestras) - muestras
+        t = (np.arange(len(segmento)) - inicio[segmento]) / np.maximum(muestras - 1, 1)[segmento]
+
+        columnas = (px[segmento, 0] + t * (px[segmento, 1] - px[segmento, 0])).astype(np.int64)
+        filas = (py[segmento, 0] + t * (py[segmento, 1] - py[segmento, 0])).astype(np.int64)
+        dentro = (columnas >= 0) & (columnas < ancho_px) & (filas >= 0) & (filas < alto_px)
+        cuentas = np.bincount(filas[dentro] * ancho_px + columnas[dentro],
+                              minlength=ancho_px * alto_px)
+        return cuentas.reshape(alto_px, ancho_px)
+
+    def dibujar(self, ax, color='gray', ancho=2, alpha=0.3, rotular=True, fuente=9):
+        """
+        Agrega la capa al eje y la mantiene al día cuando cambian los límites
+        Debe llamarse después de fijar los límites del eje
+        """
+        self._ax = ax
+        self._estilo = dict(color=color, ancho=ancho, alpha=alpha, rotular=rotular,
+                            fuente=fuente)
+        self._lineas = LineCollection([], colors=color, linewidths=ancho, alpha=alpha,
+                                      zorder=1, rasterized=True)
+        ax.add_collection(self._lineas, autolim=False)
+        xlim, ylim = ax.get_xlim(), ax.get_ylim()
+        self._imagen = ax.imshow(np.zeros((1, 1, 4)), extent=(0, 1, 0, 1), origin='lower',
+                                 interpolation='nearest', zorder=1, aspect='auto')
+        self._imagen.set_visible(False)
+        ax.set_xlim(xlim)
+        ax.set_ylim(ylim)
+        self.actualizar()
+        ax.callbacks.connect('xlim_changed', lambda _: self.actualizar())
+        ax.callbacks.connect('ylim_changed', lambda _: self.actualizar())
+
+    def actualizar(self):
+        """Recalcula lo que se dibuja para la vista actual del eje"""
+        ax = self._ax
+        xlim, ylim = ax.get_xlim(), ax.get_ylim()
+        indices = self.visibles(xlim, ylim)
+
+        if len(indices) > LIMITE_SEGMENTOS:
+            caja = ax.get_window_extent()
+            ancho_px = max(1, int(caja.width))
+            alto_px = max(1, int(caja.height))
+            cuentas = self.densidad(indices, xlim, ylim, ancho_px, alto_px)
+            rgba = np.zeros((alto_px, ancho_px, 4))
+            rgba[..., :3] = to_rgba(self._estilo['color'])[:3]
+            hay = cuentas > 0
+            rgba[..., 3][hay] = self._estilo['alpha'] * (
+                1 + np.log(cuentas[hay]) / np.log(max(2, cuentas.max())))
+            self._imagen.set_data(np.clip(rgba, 0, 1))
+            self._imagen.set_extent((*sorted(xlim), *sorted(ylim)))
+            self._imagen.set_visible(True)
+            self._lineas.set_segments([])
+        else:
+            self._lineas.set_segments(self.segmentos[indices])
+            self._imagen.set_visible(False)
+
+        # Los rótulos del camino siempre; los demás sólo si caben
+        for rotulo in self._rotulos:
+            rotulo.remove()
+        self._rotulos = []
+        if not self._estilo['rotular']:
+            return
+        if len(indices) <= LIMITE_ETIQUETAS:
+            rotuladas = np.union1d(self.fijas[self.fijas >= 0], indices)
+        else:
+            # Sólo el camino visible, si sus rótulos caben
+            fijas = self.fijas[self.fijas >= 0]
+            visible = np.zeros(self.num_aristas, dtype=bool)
+            visible[indices] = True
+            rotuladas = np.unique(fijas[visible[fijas]])
+            if len(rotuladas) > LIMITE_ETIQUETAS:
+                rotuladas = rotuladas[:0]
+        for i in rotuladas:
+            (xa, ya), (xb, yb) = self.segmentos[i]
+            self._rotulos.append(ax.text(
+                (xa + xb) / 2, (ya + yb) / 2, f'{self.pesos[i]:.1f}',
+                fontsize=self._estilo['fuente'], ha='center', va='center', zorder=2,
+                bbox=dict(boxstyle='round', fc='white', ec='none')))
+
+    def imagen(self, xlim, ylim, ancho_px, alto_px, tamano_nodo=800, fuente=12):
+        """
+        Renderiza una sola vez el mapa estático (aristas, pesos, nodos grises y
+        sus nombres) fuera de pantalla; devuelve un arreglo RGBA (alto_px, ancho_px, 4)
+        para reutilizarlo como fondo de varios paneles con imshow
+        """
+        fig = Figure(figsize=(ancho_px / 100, alto_px / 100), dpi=100)
+        FigureCanvasAgg(fig)
+        ax = fig.add_axes((0, 0, 1, 1))
+        ax.set_xlim(xlim)
+        ax.set_ylim(ylim)
+        ax.axis('off')
+        self.dibujar(ax, fuente=fuente - 4)
+
+        if self.g.num_nodos <= LIMITE_NODOS:
+            ax.scatter(self.xs, self.ys, s=tamano_nodo if self.g.num_nodos <= 50 else 30,
+                       c='lightgray', edgecolors='black', linewidths=2, zorder=3)
+        if self.g.num_nodos <= LIMITE_ETIQUETAS:
+            for x, y, nodo in zip(self.xs, self.ys, self.g.etiquetas):
+                ax.text(x, y, str(nodo), fontsize=fuente, fontweight='bold',
+                        ha='center', va='center', zorder=4)
+
+        fig.canvas.draw()
+        return np.asarray(fig.canvas.buffer_rgba()).copy()
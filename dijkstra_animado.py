@@ -1,8 +1,20 @@
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
-import networkx as nx
-from collections import defaultdict
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba
+import numpy as np
+from PIL import Image
+from array import array
 import heapq
+import os
+import shutil
+import subprocess
+import tempfile
+import warnings
+
+from grafo_csr import INF, como_csr, reconstruir_camino
+from traza_dijkstra import TrazaDijkstra, ASENTAR, RELAJAR, INSERTAR, OBSOLETO
+from paralelo import mapear_en_procesos
 
 # Definir el grafo con las conexiones y distancias
 grafo = {
@@ -42,203 +54,324 @@ posiciones = {
     'Ñ': (9, 1)
 }
 
+# Colores de los nodos según su estado
+COLORES = {
+    'inicio': 'lightgreen',
+    'destino': 'lightcoral',
+    'actual': 'gold',
+    'visitado': 'lightblue',
+    'en_cola': 'lightyellow',
+    'no_visitado': 'lightgray'
+}
+
+# Por encima de esta cantidad de nodos o aristas no se dibujan textos
+LIMITE_TEXTOS = 300
+
+class _VistaPasos:
+    """Secuencia de solo lectura de los pasos; cada acceso reconstruye el estado desde la traza"""
+    
+    def __init__(self, animado):
+        self.animado = animado
+    
+    def __len__(self):
+        return len(self.animado.traza)
+    
+    def __getitem__(self, paso):
+        if paso < 0:
+            paso += len(self)
+        return self.animado.estado_en(paso)
+
 class DijkstraAnimado:
-    def __init__(self, grafo, inicio, fin):
+    def __init__(self, grafo, inicio, fin, intervalo_puntos=None, posiciones=posiciones):
         self.grafo = grafo
+        self.posiciones = posiciones
+        self.g = como_csr(grafo)
         self.inicio = inicio
         self.fin = fin
-        self.pasos = []
+        self.traza = TrazaDijkstra(self.g.num_nodos, intervalo_puntos)
+        self.pasos = _VistaPasos(self)
         
-        # Ejecutar Dijkstra y guardar los pasos
+        # Ejecutar Dijkstra y guardar la traza de eventos
         self.ejecutar_dijkstra()
         
     def ejecutar_dijkstra(self):
-        """Ejecuta el algoritmo de Dijkstra y guarda cada paso para la animación"""
-        distancias = {nodo: float('inf') for nodo in self.grafo}
-        distancias[self.inicio] = 0
-        previos = {nodo: None for nodo in self.grafo}
-        visitados = set()
+        """Ejecuta el algoritmo de Dijkstra y registra cada evento en la traza para la animación"""
+        g = self.g
+        traza = self.traza
+        origen = g.id_de(self.inicio)
+        destino = g.id_de(self.fin)
+        
+        distancias = array('d', [INF]) * g.num_nodos
+        previos = array('i', [-1]) * g.num_nodos
+        visitados = bytearray(g.num_nodos)
+        distancias[origen] = 0.0
         
         # Cola de prioridad: (distancia, nodo)
-        cola = [(0, self.inicio)]
+        cola = [(0.0, origen)]
+        traza.registrar(INSERTAR, origen, 0.0)
         
         while cola:
             distancia_actual, nodo_actual = heapq.heappop(cola)
             
-            if nodo_actual in visitados:
+            if visitados[nodo_actual]:
+                traza.registrar(OBSOLETO, nodo_actual)
                 continue
             
-            visitados.add(nodo_actual)
-            
-            # Guardar el estado actual
-            self.pasos.append({
-                'nodo_actual': nodo_actual,
-                'visitados': visitados.copy(),
-                'distancias': distancias.copy(),
-                'previos': previos.copy(),
-                'cola': [n for _, n in cola]
-            })
+            visitados[nodo_actual] = 1
+            traza.registrar(ASENTAR, nodo_actual, distancia_actual)
             
             # Explorar vecinos
-            for vecino, peso in self.grafo[nodo_actual]:
-                if vecino not in visitados:
+            for vecino, peso in g.vecinos(nodo_actual):
+                if not visitados[vecino]:
                     nueva_distancia = distancia_actual + peso
+                    traza.registrar(RELAJAR, vecino, nueva_distancia, nodo_actual)
                     
                     if nueva_distancia < distancias[vecino]:
                         distancias[vecino] = nueva_distancia
                         previos[vecino] = nodo_actual
                         heapq.heappush(cola, (nueva_distancia, vecino))
+                        traza.registrar(INSERTAR, vecino, nueva_distancia, nodo_actual)
         
         # Construir el camino óptimo
-        self.camino_optimo = []
-        nodo = self.fin
-        while nodo is not None:
-            self.camino_optimo.insert(0, nodo)
-            nodo = previos[nodo]
+        self.camino_optimo = [g.etiquetas[i] for i in reconstruir_camino(previos, destino)]
+        self.distancia_total = distancias[destino]
+    
+    def estado_en(self, paso):
+        """Estado del paso indicado con el formato por etiquetas que usa la animación"""
+        estado = self.traza.estado_en(paso)
+        etiquetas = self.g.etiquetas
+        return {
+            'nodo_actual': etiquetas[estado.nodo_actual],
+            'visitados': {etiquetas[i] for i in range(self.g.num_nodos) if estado.visitados[i]},
+            'distancias': {etiquetas[i]: estado.distancias[i] for i in range(self.g.num_nodos)},
+            'previos': {etiquetas[i]: etiquetas[p] if p != -1 else None
+                        for i, p in enumerate(estado.previos)},
+            'cola': [etiquetas[i] for i in range(self.g.num_nodos) if estado.en_cola[i] > 0]
+        }
         
-        self.distancia_total = distancias[self.fin]
+    def _crear_artistas(self, ax):
+        """Crea una sola vez todos los elementos gráficos; devuelve los que cambian por cuadro"""
+        g = self.g
+        n = g.num_nodos
+        xs = np.array([self.posiciones[nodo][0] for nodo in g.etiquetas], dtype=float)
+        ys = np.array([self.posiciones[nodo][1] for nodo in g.etiquetas], dtype=float)
+        self._xs, self._ys = xs, ys
         
-    def animar(self):
-        """Crea la animación del algoritmo"""
-        # Crear el grafo de NetworkX para visualización
-        G = nx.Graph()
-        for nodo, vecinos in self.grafo.items():
-            for vecino, peso in vecinos:
-                G.add_edge(nodo, vecino, weight=peso)
+        # Aristas sin dirección, una sola vez cada una
+        aristas = {}
+        for u in range(n):
+            for v, peso in g.vecinos(u):
+                aristas.setdefault((min(u, v), max(u, v)), peso)
+        segmentos = [((xs[u], ys[u]), (xs[v], ys[v])) for u, v in aristas]
+        ax.add_collection(LineCollection(segmentos, colors='gray', linewidths=2,
+                                         alpha=0.5, zorder=1))
         
-        fig, ax = plt.subplots(figsize=(16, 10))
+        # Etiquetas estáticas (sólo en grafos pequeños)
+        if len(aristas) <= LIMITE_TEXTOS:
+            for (u, v), peso in aristas.items():
+                ax.text((xs[u] + xs[v]) / 2, (ys[u] + ys[v]) / 2, f'{peso:.1f}',
+                        fontsize=8, ha='center', va='center', zorder=2,
+                        bbox=dict(boxstyle='round', fc='white', ec='none'))
         
-        def actualizar(frame):
-            ax.clear()
-            
-            if frame < len(self.pasos):
-                paso = self.pasos[frame]
-                nodo_actual = paso['nodo_actual']
-                visitados = paso['visitados']
-                distancias = paso['distancias']
-                cola = paso['cola']
-                
-                # Título con información del paso actual
-                ax.set_title(f'Algoritmo de Dijkstra - Paso {frame + 1}/{len(self.pasos)}\n'
-                           f'Explorando: {nodo_actual} | '
-                           f'Distancia desde {self.inicio}: {distancias[nodo_actual]:.1f} km',
-                           fontsize=16, fontweight='bold')
-            else:
-                # Mostrar resultado final
-                ax.set_title(f'Camino Óptimo de {self.inicio} a {self.fin}\n'
-                           f'Distancia Total: {self.distancia_total:.1f} km\n'
-                           f'Ruta: {" → ".join(self.camino_optimo)}',
-                           fontsize=16, fontweight='bold', color='darkgreen')
-                
-                # Resaltar el camino óptimo
-                aristas_camino = [(self.camino_optimo[i], self.camino_optimo[i+1]) 
-                                 for i in range(len(self.camino_optimo)-1)]
-                nx.draw_networkx_edges(G, posiciones, edgelist=aristas_camino,
-                                      width=5, edge_color='green', ax=ax)
+        # Elementos animados: se actualizan en cada cuadro sin recrearse
+        camino = LineCollection([], colors='green', linewidths=5, zorder=2, animated=True)
+        ax.add_collection(camino)
+        tamano = 800 if n <= 100 else max(4.0, 80000 / n)
+        nodos = ax.scatter(xs, ys, s=tamano, c=[COLORES['no_visitado']] * n,
+                           zorder=3, animated=True)
+        textos = []
+        nombres = []
+        if n <= LIMITE_TEXTOS:
+            textos = [ax.text(xs[u], ys[u] - 0.4, '', fontsize=9, color='red',
+                              ha='center', va='center', zorder=4, animated=True)
+                      for u in range(n)]
+            # Los nombres van sobre los nodos: con blitting deben animarse para
+            # dibujarse después del scatter y no quedar tapados por él
+            nombres = [ax.text(xs[u], ys[u], nodo, fontsize=12, fontweight='bold',
+                               ha='center', va='center', zorder=4, animated=True)
+                       for u, nodo in enumerate(g.etiquetas)]
+        titulo = ax.text(0.5, 0.99, '', transform=ax.transAxes, ha='center', va='top',
+                         fontsize=16, fontweight='bold', animated=True)
+        
+        # Leyenda
+        legend_elements = [
+            plt.Line2D([0], [0], marker='o', color='w', 
+                      markerfacecolor='lightgreen', markersize=10, 
+                      label=f'Inicio ({self.inicio})'),
+            plt.Line2D([0], [0], marker='o', color='w',
+                      markerfacecolor='lightcoral', markersize=10,
+                      label=f'Destino ({self.fin})'),
+            plt.Line2D([0], [0], marker='o', color='w',
+                      markerfacecolor='gold', markersize=10,
+                      label='Nodo Actual'),
+            plt.Line2D([0], [0], marker='o', color='w',
+                      markerfacecolor='lightblue', markersize=10,
+                      label='Visitado'),
+            plt.Line2D([0], [0], marker='o', color='w',
+                      markerfacecolor='lightyellow', markersize=10,
+                      label='En Cola'),
+            plt.Line2D([0], [0], marker='o', color='w',
+                      markerfacecolor='lightgray', markersize=10,
+                      label='No Visitado')
+        ]
+        ax.legend(handles=legend_elements, loc='upper left', fontsize=10)
+        
+        # Límites a partir de las posiciones, con espacio arriba para el título
+        alto = ys.max() - ys.min() if n else 1.0
+        ax.set_xlim(xs.min() - 1, xs.max() + 1)
+        ax.set_ylim(ys.min() - 1, ys.max() + 1 + 0.25 * alto)
+        ax.axis('off')
+        
+        self._origen_id = g.id_de(self.inicio)
+        self._destino_id = g.id_de(self.fin)
+        camino_ids = [g.id_de(nodo) for nodo in self.camino_optimo]
+        self._segmentos_camino = [((xs[u], ys[u]), (xs[v], ys[v]))
+                                  for u, v in zip(camino_ids, camino_ids[1:])]
+        self._en_camino = np.zeros(n, dtype=bool)
+        self._en_camino[camino_ids] = True
+        self._paleta = {estado: to_rgba(color) for estado, color in COLORES.items()}
+        
+        return {'camino': camino, 'nodos': nodos, 'textos': textos, 'nombres': nombres,
+                'titulo': titulo}
+    
+    def _dibujar_cuadro(self, artistas, frame):
+        """Actualiza colores, textos y título para el cuadro indicado; devuelve los artistas cambiados"""
+        n = self.g.num_nodos
+        paleta = self._paleta
+        colores = np.empty((n, 4))
+        
+        if frame < len(self.pasos):
+            estado = self.traza.estado_en(frame)
+            visitados = np.frombuffer(estado.visitados, dtype=np.uint8).astype(bool)
+            en_cola = np.frombuffer(estado.en_cola, dtype=np.int32) > 0
             
-            # Dibujar todas las aristas
-            nx.draw_networkx_edges(G, posiciones, edge_color='gray', 
-                                  width=2, alpha=0.5, ax=ax)
+            colores[:] = paleta['no_visitado']
+            colores[en_cola] = paleta['en_cola']
+            colores[visitados] = paleta['visitado']
+            colores[estado.nodo_actual] = paleta['actual']
             
-            # Dibujar etiquetas de peso en las aristas
-            edge_labels = nx.get_edge_attributes(G, 'weight')
-            edge_labels = {k: f'{v:.1f}' for k, v in edge_labels.items()}
-            nx.draw_networkx_edge_labels(G, posiciones, edge_labels, 
-                                        font_size=8, ax=ax)
+            nodo_actual = self.g.etiquetas[estado.nodo_actual]
+            artistas['titulo'].set_text(
+                f'Algoritmo de Dijkstra - Paso {frame + 1}/{len(self.pasos)}\n'
+                f'Explorando: {nodo_actual} | '
+                f'Distancia desde {self.inicio}: {estado.distancias[estado.nodo_actual]:.1f} km')
+            artistas['titulo'].set_color('black')
+            artistas['camino'].set_segments([])
+            for texto, distancia in zip(artistas['textos'], estado.distancias):
+                texto.set_text(f"{distancia:.1f}" if distancia != INF else "∞")
+        else:
+            # Resultado final - solo mostrar camino óptimo
+            colores[:] = paleta['no_visitado']
+            colores[self._en_camino] = paleta['actual']
             
-            if frame < len(self.pasos):
-                paso = self.pasos[frame]
-                nodo_actual = paso['nodo_actual']
-                visitados = paso['visitados']
-                distancias = paso['distancias']
-                cola = paso['cola']
-                
-                # Colores de los nodos
-                colores = []
-                for nodo in G.nodes():
-                    if nodo == self.inicio:
-                        colores.append('lightgreen')
-                    elif nodo == self.fin:
-                        colores.append('lightcoral')
-                    elif nodo == nodo_actual:
-                        colores.append('gold')
-                    elif nodo in visitados:
-                        colores.append('lightblue')
-                    elif nodo in cola:
-                        colores.append('lightyellow')
-                    else:
-                        colores.append('lightgray')
-                
-                # Dibujar nodos
-                nx.draw_networkx_nodes(G, posiciones, node_color=colores,
-                                      node_size=800, ax=ax)
-                nx.draw_networkx_labels(G, posiciones, font_size=12,
-                                       font_weight='bold', ax=ax)
-                
-                # Mostrar distancias calculadas
-                distancias_texto = {nodo: f"{dist:.1f}" if dist != float('inf') else "∞"
-                                   for nodo, dist in distancias.items()}
-                
-                # Posiciones para las etiquetas de distancia (ligeramente desplazadas)
-                pos_distancias = {nodo: (pos[0], pos[1] - 0.4) 
-                                 for nodo, pos in posiciones.items()}
-                
-                nx.draw_networkx_labels(G, pos_distancias, distancias_texto,
-                                       font_size=9, font_color='red', ax=ax)
-                
-                # Leyenda
-                legend_elements = [
-                    plt.Line2D([0], [0], marker='o', color='w', 
-                              markerfacecolor='lightgreen', markersize=10, 
-                              label=f'Inicio ({self.inicio})'),
-                    plt.Line2D([0], [0], marker='o', color='w',
-                              markerfacecolor='lightcoral', markersize=10,
-                              label=f'Destino ({self.fin})'),
-                    plt.Line2D([0], [0], marker='o', color='w',
-                              markerfacecolor='gold', markersize=10,
-                              label='Nodo Actual'),
-                    plt.Line2D([0], [0], marker='o', color='w',
-                              markerfacecolor='lightblue', markersize=10,
-                              label='Visitado'),
-                    plt.Line2D([0], [0], marker='o', color='w',
-                              markerfacecolor='lightyellow', markersize=10,
-                              label='En Cola'),
-                    plt.Line2D([0], [0], marker='o', color='w',
-                              markerfacecolor='lightgray', markersize=10,
-                              label='No Visitado')
-                ]
-                ax.legend(handles=legend_elements, loc='upper left', fontsize=10)
+            artistas['titulo'].set_text(
+                f'Camino Óptimo de {self.inicio} a {self.fin}\n'
+                f'Distancia Total: {self.distancia_total:.1f} km\n'
+                f'Ruta: {" → ".join(map(str, self.camino_optimo))}')
+            artistas['titulo'].set_color('darkgreen')
+            artistas['camino'].set_segments(self._segmentos_camino)
+            for texto in artistas['textos']:
+                texto.set_text('')
+        
+        colores[self._origen_id] = paleta['inicio']
+        colores[self._destino_id] = paleta['destino']
+        artistas['nodos'].set_facecolor(colores)
+        
+        return ([artistas['camino'], artistas['nodos'], artistas['titulo']]
+                + artistas['textos'] + artistas['nombres'])
+    
+    def exportar(self, ruta, fps=1, procesos=None, dpi=100):
+        """
+        Exporta la animación a MP4/GIF sin ventana (backend Agg)
+        Cada proceso renderiza un tramo contiguo de cuadros; luego se unen con
+        ffmpeg si está instalado o con Pillow (sólo GIF) en caso contrario
+        Devuelve la ruta del archivo escrito
+        """
+        frames_totales = len(self.pasos) + 5
+        procesos = procesos or os.cpu_count() or 1
+        procesos = max(1, min(procesos, frames_totales))
+        limites = [frames_totales * i // procesos for i in range(procesos + 1)]
+        
+        with tempfile.TemporaryDirectory() as carpeta:
+            tramos = [(primero, ultimo, carpeta, dpi)
+                      for primero, ultimo in zip(limites, limites[1:])]
+            if procesos == 1:
+                for tramo in tramos:
+                    _renderizar_tramo(self, *tramo)
             else:
-                # Resultado final - solo mostrar camino óptimo
-                colores = []
-                for nodo in G.nodes():
-                    if nodo in self.camino_optimo:
-                        if nodo == self.inicio:
-                            colores.append('lightgreen')
-                        elif nodo == self.fin:
-                            colores.append('lightcoral')
-                        else:
-                            colores.append('gold')
-                    else:
-                        colores.append('lightgray')
-                
-                nx.draw_networkx_nodes(G, posiciones, node_color=colores,
-                                      node_size=800, ax=ax)
-                nx.draw_networkx_labels(G, posiciones, font_size=12,
-                                       font_weight='bold', ax=ax)
+                # La traza ya calculada viaja una vez a cada proceso: sólo se renderiza
+                list(mapear_en_procesos(self, _renderizar_tramo, tramos, procesos))
             
-            ax.set_xlim(-1, 11)
-            ax.set_ylim(-1, 7)
-            ax.axis('off')
+            return _unir_cuadros(carpeta, ruta, fps)
+    
+    def animar(self):
+        """Crea la animación del algoritmo (artistas persistentes y blitting)"""
+        fig, ax = plt.subplots(figsize=(16, 10))
+        artistas = self._crear_artistas(ax)
+        
+        def actualizar(frame):
+            return self._dibujar_cuadro(artistas, frame)
         
         # Crear animación
         frames_totales = len(self.pasos) + 5  # Pasos + frames extras para mostrar resultado
         anim = animation.FuncAnimation(fig, actualizar, frames=frames_totales,
-                                      interval=1000, repeat=True)
+                                      init_func=lambda: actualizar(0),
+                                      interval=1000, repeat=True, blit=True)
         
         plt.tight_layout()
         return anim, fig
 
+def _renderizar_tramo(animado, primero, ultimo, carpeta, dpi):
+    """Renderiza los cuadros [primero, ultimo) de animado como PNG numerados en carpeta"""
+    plt.switch_backend('Agg')
+    fig, ax = plt.subplots(figsize=(16, 10), dpi=dpi)
+    artistas = animado._crear_artistas(ax)
+    plt.tight_layout()
+    
+    # El fondo estático se dibuja una vez; cada cuadro sólo dibuja los elementos animados,
+    # ordenados por zorder como hace FuncAnimation (los nombres quedan sobre los nodos)
+    lienzo = fig.canvas
+    lienzo.draw()
+    fondo = lienzo.copy_from_bbox(fig.bbox)
+    for frame in range(primero, ultimo):
+        lienzo.restore_region(fondo)
+        cambiados = animado._dibujar_cuadro(artistas, frame)
+        for artista in sorted(cambiados, key=lambda a: a.get_zorder()):
+            ax.draw_artist(artista)
+        imagen = Image.fromarray(np.asarray(lienzo.buffer_rgba())).convert('RGB')
+        imagen.save(os.path.join(carpeta, f'cuadro_{frame:06d}.png'))
+    plt.close(fig)
+
+def _unir_cuadros(carpeta, ruta, fps):
+    """Une los PNG de carpeta en un video/GIF; devuelve la ruta escrita"""
+    patron = os.path.join(carpeta, 'cuadro_%06d.png')
+    extension = os.path.splitext(ruta)[1].lower()
+    
+    if shutil.which('ffmpeg'):
+        comando = ['ffmpeg', '-y', '-loglevel', 'error', '-framerate', str(fps), '-i', patron]
+        if extension != '.gif':
+            # H.264 requiere dimensiones pares
+            comando += ['-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-pix_fmt', 'yuv420p']
+        subprocess.run(comando + [ruta], check=True)
+        return ruta
+    
+    if extension != '.gif':
+        ruta = os.path.splitext(ruta)[0] + '.gif'
+        warnings.warn(f"ffmpeg no está instalado; se exporta como GIF en {ruta}")
+    
+    rutas = [os.path.join(carpeta, archivo) for archivo in sorted(os.listdir(carpeta))]
+    with Image.open(rutas[0]) as primero:
+        primero.save(ruta, save_all=True, append_images=_leer_cuadros(rutas[1:]),
+                     duration=int(1000 / fps), loop=0)
+    return ruta
+
+def _leer_cuadros(rutas):
+    """Abre los cuadros de a uno y cierra cada archivo antes de pasar al siguiente"""
+    for ruta in rutas:
+        with Image.open(ruta) as cuadro:
+            cuadro.load()
+            yield cuadro
+
 # Ejemplo de uso
 if __name__ == "__main__":
     print("=" * 60)
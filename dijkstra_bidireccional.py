@@ -0,0 +1,103 @@
+"""
+Búsqueda de Dijkstra bidireccional para consultas punto a punto
+Avanza desde el origen sobre el grafo y desde el destino sobre el grafo
+invertido, y se detiene con la regla clásica basada en μ
+"""
+
+from array import array
+import heapq
+
+from grafo_csr import INF, como_csr, reconstruir_camino, traducir_resultado
+
+
+def dijkstra_bidireccional_csr(g, origen, destino):
+    """
+    Dijkstra bidireccional sobre ids enteros
+    Devuelve (distancia, camino_ids, distancias_adelante, asentados)
+    """
+    n = g.num_nodos
+    inv = g.invertido()
+
+    # Índice 0: búsqueda hacia adelante, índice 1: búsqueda hacia atrás
+    lados = (g, inv)
+    distancias = (array('d', [INF]) * n, array('d', [INF]) * n)
+    previos = (array('i', [-1]) * n, array('i', [-1]) * n)
+    visitados = (bytearray(n), bytearray(n))
+    colas = ([(0.0, origen)], [(0.0, destino)])
+    distancias[0][origen] = 0.0
+    distancias[1][destino] = 0.0
+
+    mu = 0.0 if origen == destino else INF
+    encuentro = origen if origen == destino else -1
+    asentados = 0
+
+    while colas[0] and colas[1]:
+        # Regla de parada: ningún camino mejor puede pasar por los frentes
+        if colas[0][0][0] + colas[1][0][0] >= mu:
+            break
+
+        # Expandir el lado con la cola más pequeña
+        lado = 0 if len(colas[0]) <= len(colas[1]) else 1
+        cola = colas[lado]
+        dist = distancias[lado]
+        dist_otro = distancias[1 - lado]
+        prev = previos[lado]
+        vis = visitados[lado]
+        grafo_lado = lados[lado]
+        desp = grafo_lado.desplazamientos
+        dest = grafo_lado.destinos
+        pesos = grafo_lado.pesos
+
+        distancia_actual, u = heapq.heappop(cola)
+        if vis[u]:
+            continue
+
+        vis[u] = 1
+        asentados += 1
+
+        for i in range(desp[u], desp[u + 1]):
+            v = dest[i]
+            if vis[v]:
+                continue
+
+            nueva_distancia = distancia_actual + pesos[i]
+            if nueva_distancia < dist[v]:
+                dist[v] = nueva_distancia
+                prev[v] = u
+                heapq.heappush(cola, (nueva_distancia, v))
+
+            # Actualizar el mejor camino conocido que cruza por v
+            total = dist[v] + dist_otro[v]
+            if total < mu:
+                mu = total
+                encuentro = v
+
+    if encuentro == -1:
+        return INF, [destino], distancias[0], asentados
+
+    # Unir la mitad hacia adelante con la mitad hacia atrás
+    camino = reconstruir_camino(previos[0], encuentro)
+    nodo = previos[1][encuentro]
+    while nodo != -1:
+        camino.append(nodo)
+        nodo = previos[1][nodo]
+
+    # Las distancias de la mitad trasera del camino se completan con μ
+    dist_adelante = distancias[0]
+    for nodo in camino:
+        restante = distancias[1][nodo]
+        if restante != INF:
+            dist_adelante[nodo] = min(dist_adelante[nodo], mu - restante)
+    dist_adelante[destino] = mu
+
+    return mu, camino, dist_adelante, asentados
+
+
+def dijkstra_bidireccional(grafo, inicio, fin):
+    """Dijkstra bidireccional con la misma salida que dijkstra(): (camino, distancia, distancias)"""
+    g = como_csr(grafo)
+    origen = g.id_de(inicio)
+    destino = g.id_de(fin)
+
+    _, camino_ids, distancias, _ = dijkstra_bidireccional_csr(g, origen, destino)
+    return traducir_resultado(g, camino_ids, distancias, destino)
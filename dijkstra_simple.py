@@ -1,6 +1,6 @@
-import matplotlib.pyplot as plt
-import networkx as nx
-import heapq
+from grafo_csr import como_csr, dijkstra as dijkstra_etiquetas
+from dijkstra_bidireccional import dijkstra_bidireccional
+from a_estrella import comparar_asentados
 
 # Definir el grafo con las conexiones y distancias
 grafo = {
@@ -40,72 +40,61 @@ posiciones = {
     'Ñ': (9, 1)
 }
 
-def dijkstra(grafo, inicio, fin):
-    """Implementa el algoritmo de Dijkstra"""
-    distancias = {nodo: float('inf') for nodo in grafo}
-    distancias[inicio] = 0
-    previos = {nodo: None for nodo in grafo}
-    visitados = set()
-    
-    cola = [(0, inicio)]
-    
-    while cola:
-        distancia_actual, nodo_actual = heapq.heappop(cola)
-        
-        if nodo_actual in visitados:
-            continue
-        
-        visitados.add(nodo_actual)
-        
-        if nodo_actual == fin:
-            break
-        
-        for vecino, peso in grafo[nodo_actual]:
-            if vecino not in visitados:
-                nueva_distancia = distancia_actual + peso
-                
-                if nueva_distancia < distancias[vecino]:
-                    distancias[vecino] = nueva_distancia
-                    previos[vecino] = nodo_actual
-                    heapq.heappush(cola, (nueva_distancia, vecino))
-    
-    # Construir el camino
-    camino = []
-    nodo = fin
-    while nodo is not None:
-        camino.insert(0, nodo)
-        nodo = previos[nodo]
-    
-    return camino, distancias[fin], distancias
+def dijkstra(grafo, inicio, fin, bidireccional=False):
+    """
+    Implementa el algoritmo de Dijkstra (motor CSR con ids enteros)
+    Con bidireccional=True busca a la vez desde el origen y desde el destino
+    """
+    if bidireccional:
+        return dijkstra_bidireccional(grafo, inicio, fin)
+    return dijkstra_etiquetas(grafo, inicio, fin)
 
-def visualizar_resultado(grafo, camino, distancia_total, inicio, fin, todas_distancias):
-    """Visualiza el resultado del algoritmo de Dijkstra"""
-    G = nx.Graph()
-    for nodo, vecinos in grafo.items():
-        for vecino, peso in vecinos:
-            G.add_edge(nodo, vecino, weight=peso)
+def visualizar_resultado(grafo, camino, distancia_total, inicio, fin, todas_distancias,
+                         posiciones=posiciones):
+    """
+    Visualiza el resultado del algoritmo de Dijkstra
+    La red se dibuja con nivel de detalle (dibujo_mapa.CapaBase), por lo que
+    también sirve para grafos de cientos de miles de aristas
+    """
+    # matplotlib se importa sólo al dibujar: el módulo se puede usar sin ventana
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+    from dibujo_mapa import CapaBase, LIMITE_ETIQUETAS, LIMITE_NODOS
+    
+    capa = CapaBase(grafo, posiciones)
+    g = capa.g
+    xs, ys = capa.xs, capa.ys
+    camino_ids = [g.id_de(nodo) for nodo in camino]
     
     fig, ax = plt.subplots(figsize=(16, 10))
+    xlim, ylim = capa.limites()
+    ax.set_xlim(xlim)
+    ax.set_ylim(ylim)
     
-    # Dibujar todas las aristas
-    nx.draw_networkx_edges(G, posiciones, edge_color='gray', 
-                          width=2, alpha=0.3, ax=ax)
+    # Dibujar todas las aristas; los pesos del camino se rotulan siempre
+    capa.fijas = capa.indices_aristas(list(zip(camino_ids, camino_ids[1:])))
+    capa.dibujar(ax, color='gray', ancho=2, alpha=0.3)
     
     # Resaltar el camino óptimo
-    aristas_camino = [(camino[i], camino[i+1]) for i in range(len(camino)-1)]
-    nx.draw_networkx_edges(G, posiciones, edgelist=aristas_camino,
-                          width=6, edge_color='green', ax=ax, alpha=0.8)
+    segmentos_camino = [((xs[u], ys[u]), (xs[v], ys[v]))
+                        for u, v in zip(camino_ids, camino_ids[1:])]
+    ax.add_collection(LineCollection(segmentos_camino, colors='green', linewidths=6,
+                                     alpha=0.8, zorder=1.5), autolim=False)
     
-    # Dibujar etiquetas de peso en las aristas
-    edge_labels = nx.get_edge_attributes(G, 'weight')
-    edge_labels = {k: f'{v:.1f}' for k, v in edge_labels.items()}
-    nx.draw_networkx_edge_labels(G, posiciones, edge_labels, 
-                                font_size=9, ax=ax)
+    # En grafos grandes sólo se dibujan los nodos del camino (o sus extremos si es largo)
+    en_camino = set(camino_ids)
+    if g.num_nodos <= LIMITE_NODOS:
+        nodos = range(g.num_nodos)
+    elif len(camino_ids) <= LIMITE_ETIQUETAS:
+        nodos = camino_ids
+    else:
+        nodos = [camino_ids[0], camino_ids[-1]]
     
     # Colores de los nodos
     colores = []
-    for nodo in G.nodes():
-        if nodo in camino:
+    for u in nodos:
+        nodo = g.etiquetas[u]
+        if u in en_camino:
             if nodo == inicio:
                 colores.append('lightgreen')
             elif nodo == fin:
@@ -116,24 +105,30 @@ def visualizar_resultado(grafo, camino, distancia_total, inicio, fin, todas_dist
             colores.append('lightgray')
     
     # Dibujar nodos
-    nx.draw_networkx_nodes(G, posiciones, node_color=colores,
-                          node_size=1000, ax=ax, edgecolors='black', linewidths=2)
-    nx.draw_networkx_labels(G, posiciones, font_size=14,
-                           font_weight='bold', ax=ax)
-    
-    # Mostrar distancias desde el origen
-    distancias_texto = {nodo: f"{dist:.1f}" if dist != float('inf') else "∞"
-                       for nodo, dist in todas_distancias.items()}
+    nodos = list(nodos)
+    pocos = len(nodos) <= 50
+    ax.scatter(xs[nodos], ys[nodos], s=1000 if pocos else 30, c=colores,
+               edgecolors='black', linewidths=2 if pocos else 0.5, zorder=3)
     
-    pos_distancias = {nodo: (pos[0], pos[1] - 0.5) 
-                     for nodo, pos in posiciones.items()}
+    # Nombres y distancias desde el origen, sólo donde caben
+    rotulados = nodos if len(nodos) <= LIMITE_ETIQUETAS else [camino_ids[0], camino_ids[-1]]
+    desfase = 0.04 * max(xlim[1] - xlim[0], ylim[1] - ylim[0])
+    for u in rotulados:
+        nodo = g.etiquetas[u]
+        ax.text(xs[u], ys[u], str(nodo), fontsize=14, fontweight='bold',
+                ha='center', va='center', zorder=4)
+        dist = todas_distancias.get(nodo, float('inf'))
+        ax.text(xs[u], ys[u] - desfase, f"{dist:.1f}" if dist != float('inf') else "∞",
+                fontsize=10, color='red', ha='center', va='center', zorder=4)
     
-    nx.draw_networkx_labels(G, pos_distancias, distancias_texto,
-                           font_size=10, font_color='red', ax=ax)
+    # Rutas largas se resumen en el título
+    nombres = [str(nodo) for nodo in camino]
+    if len(nombres) > 10:
+        nombres = nombres[:3] + [f'… ({len(camino) - 6} nodos) …'] + nombres[-3:]
     
     # Título
     ax.set_title(f'Camino Óptimo de {inicio} a {fin}\n'
-               f'Ruta: {" → ".join(camino)}\n'
+               f'Ruta: {" → ".join(nombres)}\n'
                f'Distancia Total: {distancia_total:.2f} km',
                fontsize=18, fontweight='bold', color='darkgreen', pad=20)
     
@@ -156,24 +151,42 @@ def visualizar_resultado(grafo, camino, distancia_total, inicio, fin, todas_dist
     ]
     ax.legend(handles=legend_elements, loc='upper left', fontsize=12, frameon=True, shadow=True)
     
-    ax.set_xlim(-1, 11)
-    ax.set_ylim(-1, 7)
     ax.axis('off')
     plt.tight_layout()
     
     return fig
 
+def leer_nodo(texto, indice):
+    """
+    Etiqueta del nodo escrito: una letra o coordenadas "x, y", que se ajustan
+    al nodo más cercano con el índice espacial
+    """
+    partes = texto.replace(',', ' ').split()
+    if len(partes) == 2:
+        try:
+            x, y = float(partes[0]), float(partes[1])
+        except ValueError:
+            return texto.upper()
+        nodo, distancia = indice.mas_cercano(x, y)
+        print(f"   ({x:g}, {y:g}) → nodo {nodo} (a {distancia:.2f})")
+        return nodo
+    return texto.upper()
+
 def main():
     print("=" * 70)
     print(" " * 15 + "ALGORITMO DE DIJKSTRA")
     print(" " * 20 + "(Versión Simple)")
     print("=" * 70)
     print("\nGrafo de 15 nodos: A, B, C, D, E, F, G, H, I, J, K, L, M, N, Ñ")
+    print("(también se aceptan coordenadas \"x, y\", que se ajustan al nodo más cercano)")
+    # NumPy (índice espacial) se importa sólo aquí: el módulo queda liviano para consultas_lote
+    from indice_espacial import IndiceEspacial
+    indice = IndiceEspacial(como_csr(grafo), posiciones)
     print("\nIngrese el nodo de inicio: ", end="")
-    inicio = input().strip().upper()
+    inicio = leer_nodo(input().strip(), indice)
     
     print("Ingrese el nodo de destino: ", end="")
-    fin = input().strip().upper()
+    fin = leer_nodo(input().strip(), indice)
     
     if inicio not in grafo or fin not in grafo:
         print("\n❌ Error: Uno o ambos nodos no existen en el grafo.")
@@ -197,6 +210,10 @@ def main():
     print(f"🔢 Número de nodos en el camino: {len(camino)}")
     print(f"🔢 Número de saltos: {len(camino) - 1}")
     
+    asentados = comparar_asentados(grafo, inicio, fin, posiciones)
+    print(f"🎯 Nodos asentados: Dijkstra {asentados['dijkstra']}, "
+          f"A* {asentados['a_estrella']}")
+    
     # Mostrar distancias intermedias
     print("\n📊 Distancias intermedias:")
     distancia_acumulada = 0
@@ -230,6 +247,7 @@ def main():
     print("\n📊 Generando visualización...")
     
     # Visualizar resultado
+    import matplotlib.pyplot as plt
     fig = visualizar_resultado(grafo, camino, distancia, inicio, fin, todas_distancias)
     
     print("✅ Visualización lista. Cierra la ventana para terminar.")
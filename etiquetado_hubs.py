@@ -0,0 +1,297 @@
+"""
+Etiquetado de hubs (hub labeling) con etiquetado podado por landmarks
+(pruned landmark labeling). Cada nodo guarda una etiqueta de salida con
+(hub, distancia del nodo al hub) y una de entrada con (hub, distancia del hub
+al nodo), de modo que d(s, t) es el mínimo de salida[s][h] + entrada[t][h]
+sobre los hubs comunes. Los nodos se procesan del más importante al menos
+importante (por defecto, según la jerarquía de contracción) con un Dijkstra
+desde cada uno hacia adelante y otro hacia atrás, que se poda en cuanto las
+etiquetas ya construidas dan una distancia igual o menor. Como los hubs se
+agregan en orden de rango, cada etiqueta queda ordenada por hub y la
+consulta es una mezcla de dos listas ordenadas
+
+Las etiquetas se guardan aplanadas como CSR (desplazamientos, hubs,
+distancias y el nodo previo en el árbol del hub, para reconstruir caminos)
+y se escriben tal cual a un archivo que se abre con mmap
+"""
+
+from array import array
+from bisect import bisect_left
+import heapq
+import mmap
+from operator import add
+import struct
+
+from grafo_csr import INF, como_csr
+from jerarquias_contraccion import JerarquiaContraccion
+
+MAGICO = b'HUBS'
+CABECERA = struct.Struct('<4s32sqqq4x')  # 64 bytes, alinea los arreglos
+FORMATOS = ('q', 'i', 'd', 'i')          # desplazamientos, hubs, distancias, previos
+
+
+def _orden_por_grado(g, invertido):
+    """Nodos de mayor a menor grado total: los de más grado cubren más caminos"""
+    grados = [g.desplazamientos[u + 1] - g.desplazamientos[u] +
+              invertido.desplazamientos[u + 1] - invertido.desplazamientos[u]
+              for u in range(g.num_nodos)]
+    return sorted(range(g.num_nodos), key=lambda u: -grados[u])
+
+
+def _busqueda_podada(g, raiz, rango, propias, etiquetas, temporal, distancias, previos):
+    """
+    Dijkstra desde raiz que agrega (rango, distancia, previo) a la etiqueta de
+    cada nodo alcanzado, salvo que las etiquetas actuales ya den una distancia
+    igual o menor: en ese caso el nodo no se etiqueta ni se expande.
+    propias es la etiqueta del otro lado de raiz y etiquetas las del lado que
+    se construye, ambas como ([hubs], [distancias], [previos]) por nodo
+    """
+    desp = g.desplazamientos
+    dest = g.destinos
+    pesos = g.pesos
+    hubs, dists, padres = etiquetas
+    leer = temporal.__getitem__
+
+    # temporal[h] = distancia entre raiz y el hub h según la etiqueta propia de raiz
+    for h, d in zip(propias[0], propias[1]):
+        temporal[h] = d
+
+    distancias[raiz] = 0.0
+    tocados = [raiz]
+    cola = [(0.0, raiz)]
+    heappop = heapq.heappop
+    heappush = heapq.heappush
+
+    while cola:
+        distancia_actual, u = heappop(cola)
+        if distancia_actual > distancias[u]:
+            continue
+        if min(map(add, map(leer, hubs[u]), dists[u]), default=INF) <= distancia_actual:
+            continue
+        hubs[u].append(rango)
+        dists[u].append(distancia_actual)
+        padres[u].append(previos[u])
+
+        for i in range(desp[u], desp[u + 1]):
+            v = dest[i]
+            nueva_distancia = distancia_actual + pesos[i]
+            if nueva_distancia < distancias[v]:
+                if distancias[v] == INF:
+                    tocados.append(v)
+                distancias[v] = nueva_distancia
+                previos[v] = u
+                heappush(cola, (nueva_distancia, v))
+
+    for v in tocados:
+        distancias[v] = INF
+        previos[v] = -1
+    for h in propias[0]:
+        temporal[h] = INF
+
+
+def _aplanar(hubs, dists, padres):
+    """Listas por nodo -> (desplazamientos, hubs, distancias, previos) en arreglos"""
+    desplazamientos = array('q', [0])
+    for lista in hubs:
+        desplazamientos.append(desplazamientos[-1] + len(lista))
+    return (desplazamientos,
+            array('i', (h for lista in hubs for h in lista)),
+            array('d', (d for lista in dists for d in lista)),
+            array('i', (p for lista in padres for p in lista)))
+
+
+def _relleno(tamano):
+    """Bytes necesarios para alinear tamano a 8"""
+    return -tamano % 8
+
+
+class EtiquetadoHubs:
+    """
+    Etiquetas de salida y de entrada de cada nodo, aplanadas
+    Los hubs son rangos (posición en el orden de procesamiento) y previos son
+    ids de nodo: en la salida, el siguiente nodo hacia el hub; en la entrada,
+    el nodo anterior desde el hub (-1 en el propio hub)
+    """
+
+    def __init__(self, g, salida, entrada):
+        self.g = g
+        self.etiquetas = g.etiquetas
+        self.salida = salida
+        self.entrada = entrada
+
+    @classmethod
+    def preprocesar(cls, grafo, orden=None):
+        """
+        Construye las etiquetas procesando los nodos en orden: una lista de ids,
+        'grado' (de mayor a menor grado) o, por defecto, el inverso del orden de
+        contracción de una JerarquiaContraccion (también se puede pasar una ya
+        construida). En redes viales el orden de la jerarquía da etiquetas
+        varias veces más chicas que el de grado y se construye más rápido
+        """
+        g = como_csr(grafo)
+        n = g.num_nodos
+        invertido = g.invertido()
+        if orden is None or isinstance(orden, JerarquiaContraccion):
+            jerarquia = orden or JerarquiaContraccion.preprocesar(g)
+            orden = sorted(range(n), key=lambda u: -jerarquia.rango[u])
+        elif orden == 'grado':
+            orden = _orden_por_grado(g, invertido)
+        elif sorted(orden) != list(range(n)):
+            raise ValueError("El orden debe contener cada id de nodo una vez")
+
+        salida = ([[] for _ in range(n)], [[] for _ in range(n)], [[] for _ in range(n)])
+        entrada = ([[] for _ in range(n)], [[] for _ in range(n)], [[] for _ in range(n)])
+        temporal = [INF] * n
+        distancias = array('d', [INF]) * n
+        previos = array('i', [-1]) * n
+
+        for rango, raiz in enumerate(orden):
+            propia_salida = tuple(lado[raiz] for lado in salida)
+            _busqueda_podada(g, raiz, rango, propia_salida, entrada,
+                             temporal, distancias, previos)
+            propia_entrada = tuple(lado[raiz] for lado in entrada)
+            _busqueda_podada(invertido, raiz, rango, propia_entrada, salida,
+                             temporal, distancias, previos)
+
+        return cls(g, _aplanar(*salida), _aplanar(*entrada))
+
+    @property
+    def num_entradas(self):
+        """Pares (hub, distancia) guardados entre las dos etiquetas de todos los nodos"""
+        return len(self.salida[1]) + len(self.entrada[1])
+
+    def _encuentro(self, origen, destino):
+        """(distancia, posición en la salida de origen, posición en la entrada de destino)"""
+        desp_s, hubs_s, dist_s, _ = self.salida
+        desp_e, hubs_e, dist_e, _ = self.entrada
+        a, fin_a = desp_s[origen], desp_s[origen + 1]
+        b, fin_b = desp_e[destino], desp_e[destino + 1]
+        mejor, mejor_a, mejor_b = INF, -1, -1
+
+        # Mezcla de las dos etiquetas, ordenadas por hub
+        while a < fin_a and b < fin_b:
+            hub_a = hubs_s[a]
+            hub_b = hubs_e[b]
+            if hub_a == hub_b:
+                distancia = dist_s[a] + dist_e[b]
+                if distancia < mejor:
+                    mejor, mejor_a, mejor_b = distancia, a, b
+                a += 1
+                b += 1
+            elif hub_a < hub_b:
+                a += 1
+            else:
+                b += 1
+        return mejor, mejor_a, mejor_b
+
+    def distancia_ids(self, origen, destino):
+        """Mínimo de salida[origen][h] + entrada[destino][h]; con pesos decimales, igual a Dijkstra salvo redondeo"""
+        return self._encuentro(origen, destino)[0]
+
+    @staticmethod
+    def _posicion(lado, nodo, hub):
+        """Posición del hub en la etiqueta de nodo (búsqueda binaria)"""
+        desp, hubs, _, _ = lado
+        return bisect_left(hubs, hub, desp[nodo], desp[nodo + 1])
+
+    def camino_ids(self, origen, destino):
+        """Camino mínimo de origen a destino por el hub común; lista vacía si no hay"""
+        distancia, a, b = self._encuentro(origen, destino)
+        if distancia == INF:
+            return []
+        hub = self.salida[1][a]
+
+        # origen -> hub siguiendo los siguientes de la etiqueta de salida
+        previos_s = self.salida[3]
+        camino = [origen]
+        while previos_s[a] != -1:
+            camino.append(previos_s[a])
+            a = self._posicion(self.salida, camino[-1], hub)
+
+        # hub -> destino: los previos de la etiqueta de entrada, desde el destino
+        previos_e = self.entrada[3]
+        tramo = []
+        nodo = destino
+        while previos_e[b] != -1:
+            tramo.append(nodo)
+            nodo = previos_e[b]
+            b = self._posicion(self.entrada, nodo, hub)
+        camino.extend(reversed(tramo))
+        return camino
+
+    def _acumuladas(self, camino):
+        """Distancia desde el origen a cada nodo de camino (ids), sumada arista por arista"""
+        g = self.g
+        acumuladas = [0.0]
+        for u, v in zip(camino, camino[1:]):
+            acumuladas.append(acumuladas[-1] + min(
+                g.pesos[i] for i in range(g.desplazamientos[u], g.desplazamientos[u + 1])
+                if g.destinos[i] == v))
+        return acumuladas
+
+    def consulta(self, inicio, fin):
+        """
+        Devuelve (camino, distancia) entre dos etiquetas
+        La distancia se suma arista por arista a lo largo del camino. Con
+        caminos empatados el del hub puede ser otro que el de Dijkstra y, con
+        pesos decimales, su suma diferir en el redondeo (error relativo del
+        orden de 1e-15 por arista); con pesos enteros coincide exactamente
+        """
+        origen = self.g.id_de(inicio)
+        destino = self.g.id_de(fin)
+        camino = self.camino_ids(origen, destino)
+        if not camino:
+            return [fin], INF
+        return [self.etiquetas[i] for i in camino], self._acumuladas(camino)[-1]
+
+    def guardar(self, ruta):
+        """Escribe las etiquetas en ruta: cabecera y los ocho arreglos alineados"""
+        g = self.g
+        with open(ruta, 'wb') as archivo:
+            archivo.write(CABECERA.pack(MAGICO, g.huella(), g.num_nodos,
+                                        len(self.salida[1]), len(self.entrada[1])))
+            for arreglo in self.salida + self.entrada:
+                datos = memoryview(arreglo).cast('B')
+                archivo.write(datos)
+                archivo.write(b'\0' * _relleno(len(datos)))
+
+    @classmethod
+    def abrir(cls, ruta, grafo):
+        """Abre las etiquetas con mmap; ValueError si son de otra versión del grafo"""
+        g = como_csr(grafo)
+        with open(ruta, 'rb') as archivo:
+            mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        magico, huella, n, m_salida, m_entrada = CABECERA.unpack_from(mapa)
+        if magico != MAGICO:
+            raise ValueError(f"{ruta} no es un archivo de etiquetas de hubs")
+        if huella != g.huella() or n != g.num_nodos:
+            raise ValueError(f"{ruta} corresponde a otra versión del grafo")
+
+        vista = memoryview(mapa)
+        inicio = CABECERA.size
+        lados = []
+        for cantidad in (m_salida, m_entrada):
+            arreglos = []
+            for formato, largo in zip(FORMATOS, (n + 1, cantidad, cantidad, cantidad)):
+                tamano = struct.calcsize(formato) * largo
+                arreglos.append(vista[inicio:inicio + tamano].cast(formato))
+                inicio += tamano + _relleno(tamano)
+            lados.append(tuple(arreglos))
+        return cls(g, *lados)
+
+
+def dijkstra_hubs(etiquetado, inicio, fin):
+    """
+    Consulta sobre el etiquetado con la salida de dijkstra(): (camino, distancia, distancias)
+    Las distancias sólo se reportan para los nodos del camino y, como la de
+    consulta(), se suman arista por arista: ante empates con pesos decimales
+    pueden diferir de las de Dijkstra en el redondeo (ver consulta())
+    """
+    g = etiquetado.g
+    camino = etiquetado.camino_ids(g.id_de(inicio), g.id_de(fin))
+    if not camino:
+        return [fin], INF, {inicio: 0.0, fin: INF}
+    etiquetas = etiquetado.etiquetas
+    acumuladas = etiquetado._acumuladas(camino)
+    distancias = {etiquetas[u]: d for u, d in zip(camino, acumuladas)}
+    return [etiquetas[u] for u in camino], acumuladas[-1], distancias
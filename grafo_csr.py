@@ -0,0 +1,375 @@
+"""
+Representación compacta del grafo en formato CSR (Compressed Sparse Row)
+Las etiquetas de los nodos se internan como ids enteros densos y las
+aristas se guardan en arreglos contiguos de desplazamientos, destinos y pesos
+"""
+
+from array import array
+import hashlib
+import heapq
+import time
+
+INF = float('inf')
+
+
+class _IndicesRango:
+    """Etiquetas consecutivas (p. ej. ids DIMACS): el id se calcula sin armar un diccionario"""
+
+    def __init__(self, etiquetas):
+        self.etiquetas = etiquetas
+
+    def __contains__(self, etiqueta):
+        return type(etiqueta) is int and etiqueta in self.etiquetas
+
+    def __getitem__(self, etiqueta):
+        if etiqueta not in self:
+            raise KeyError(etiqueta)
+        return etiqueta - self.etiquetas.start
+
+    def __len__(self):
+        return len(self.etiquetas)
+
+
+class GrafoCSR:
+    """Grafo dirigido con adyacencias en arreglos compactos"""
+
+    def __init__(self, etiquetas, desplazamientos, destinos, pesos):
+        self.etiquetas = etiquetas
+        self.desplazamientos = desplazamientos  # n + 1 enteros
+        self.destinos = destinos                # m ids de nodo
+        self.pesos = pesos                      # m pesos (km)
+        self._indices = None
+        self._invertido = None
+        self.version = 0  # aumenta con cada modificación del grafo
+        self.ruta_binaria = None  # archivo mapeado en memoria, si se abrió con abrir_binario
+
+    @classmethod
+    def desde_diccionario(cls, grafo):
+        """Construye el grafo CSR a partir del diccionario {nodo: [(vecino, peso)]}"""
+        etiquetas = list(grafo)
+        indices = {nodo: i for i, nodo in enumerate(etiquetas)}
+
+        # Los vecinos que no aparecen como clave también son nodos
+        for vecinos in grafo.values():
+            for vecino, _ in vecinos:
+                if vecino not in indices:
+                    indices[vecino] = len(etiquetas)
+                    etiquetas.append(vecino)
+
+        desplazamientos = array('q', [0])
+        destinos = array('i')
+        pesos = array('d')
+        for nodo in etiquetas:
+            for vecino, peso in grafo.get(nodo, ()):
+                destinos.append(indices[vecino])
+                pesos.append(peso)
+            desplazamientos.append(len(destinos))
+
+        g = cls(etiquetas, desplazamientos, destinos, pesos)
+        g._indices = indices
+        return g
+
+    @property
+    def num_nodos(self):
+        return len(self.desplazamientos) - 1
+
+    @property
+    def num_aristas(self):
+        return len(self.destinos)
+
+    @property
+    def indices(self):
+        """Diccionario etiqueta -> id, construido sólo cuando se necesita"""
+        if self._indices is None:
+            if isinstance(self.etiquetas, range) and self.etiquetas.step == 1:
+                self._indices = _IndicesRango(self.etiquetas)
+            else:
+                self._indices = {nodo: i for i, nodo in enumerate(self.etiquetas)}
+        return self._indices
+
+    def id_de(self, etiqueta):
+        """Devuelve el id entero de una etiqueta (KeyError si no existe)"""
+        return self.indices[etiqueta]
+
+    def __contains__(self, etiqueta):
+        return etiqueta in self.indices
+
+    def __len__(self):
+        return self.num_nodos
+
+    def vecinos(self, u):
+        """Itera los pares (vecino, peso) del nodo u"""
+        for i in range(self.desplazamientos[u], self.desplazamientos[u + 1]):
+            yield self.destinos[i], self.pesos[i]
+
+    def invertido(self):
+        """Devuelve (y guarda) el grafo con todas las aristas invertidas"""
+        if self._invertido is None:
+            n = self.num_nodos
+            desp = self.desplazamientos
+            dest = self.destinos
+
+            # Primera pasada: grado de entrada de cada nodo
+            grados = array('q', [0]) * (n + 1)
+            for v in dest:
+                grados[v + 1] += 1
+            for i in range(n):
+                grados[i + 1] += grados[i]
+
+            # Segunda pasada: colocar cada arista en su posición
+            posicion = array('q', grados)
+            destinos = array('i', [0]) * len(dest)
+            pesos = array('d', [0.0]) * len(dest)
+            for u in range(n):
+                for i in range(desp[u], desp[u + 1]):
+                    v = dest[i]
+                    j = posicion[v]
+                    destinos[j] = u
+                    pesos[j] = self.pesos[i]
+                    posicion[v] = j + 1
+
+            self._invertido = GrafoCSR(self.etiquetas, grados, destinos, pesos)
+            self._invertido._indices = self._indices
+            self._invertido._invertido = self
+        return self._invertido
+
+    def actualizar_peso(self, u, v, peso):
+        """Cambia el peso de las aristas u -> v (ids) e incrementa la versión del grafo"""
+        encontrada = False
+        for i in range(self.desplazamientos[u], self.desplazamientos[u + 1]):
+            if self.destinos[i] == v:
+                self.pesos[i] = peso
+                encontrada = True
+        if not encontrada:
+            raise KeyError(f"No existe la arista {self.etiquetas[u]} → {self.etiquetas[v]}")
+
+        if self._invertido is not None:
+            inv = self._invertido
+            for i in range(inv.desplazamientos[v], inv.desplazamientos[v + 1]):
+                if inv.destinos[i] == u:
+                    inv.pesos[i] = peso
+            inv.version += 1
+        self.version += 1
+
+    def a_diccionario(self):
+        """Convierte de vuelta al formato {nodo: [(vecino, peso)]}"""
+        return {self.etiquetas[u]: [(self.etiquetas[v], p) for v, p in self.vecinos(u)]
+                for u in range(self.num_nodos)}
+
+    def huella(self):
+        """Resumen SHA-256 de la estructura y los pesos, identifica la versión del grafo"""
+        resumen = hashlib.sha256()
+        for arreglo in (self.desplazamientos, self.destinos, self.pesos):
+            resumen.update(memoryview(arreglo).cast('B'))
+        return resumen.digest()
+
+    def __getstate__(self):
+        # Las estructuras derivadas se reconstruyen en el proceso que las necesite
+        estado = self.__dict__.copy()
+        estado['_indices'] = None
+        estado['_invertido'] = None
+        if self.ruta_binaria is not None:
+            if self.version == 0:
+                # El otro proceso vuelve a mapear el archivo y comparte sus páginas
+                del estado['desplazamientos'], estado['destinos'], estado['pesos']
+            else:
+                # Modificado en memoria: se envía una copia de los arreglos
+                estado['desplazamientos'] = array('q', self.desplazamientos)
+                estado['destinos'] = array('i', self.destinos)
+                estado['pesos'] = array('d', self.pesos)
+                estado['ruta_binaria'] = None
+        return estado
+
+    def __setstate__(self, estado):
+        if 'desplazamientos' not in estado:
+            from carga_grafos import abrir_binario
+            abierto = abrir_binario(estado['ruta_binaria'])
+            estado['desplazamientos'] = abierto.desplazamientos
+            estado['destinos'] = abierto.destinos
+            estado['pesos'] = abierto.pesos
+        self.__dict__.update(estado)
+
+    def memoria_bytes(self):
+        """Bytes ocupados por los arreglos de adyacencia"""
+        return sum(a.itemsize * len(a)
+                   for a in (self.desplazamientos, self.destinos, self.pesos))
+
+
+def como_csr(grafo):
+    """Acepta un GrafoCSR o un diccionario de adyacencias y devuelve un GrafoCSR"""
+    if isinstance(grafo, GrafoCSR):
+        return grafo
+    return GrafoCSR.desde_diccionario(grafo)
+
+
+def dijkstra_csr(g, origen, destino=-1, objetivos=None, instrumentacion=None):
+    """
+    Dijkstra sobre ids enteros
+    Se detiene al asentar destino o, si se indican, todos los objetivos
+    instrumentacion: una instrumentacion.Instrumentacion para medir la consulta
+    Devuelve (distancias, previos, asentados) como arreglos indexados por id
+    """
+    if instrumentacion is None:
+        return _dijkstra_csr(g, origen, destino, objetivos)
+    medicion = instrumentacion.comenzar(origen, destino)
+    resultado = _dijkstra_csr(g, origen, destino, objetivos, medicion, instrumentacion)
+    instrumentacion.terminar(medicion)
+    return resultado
+
+
+def _dijkstra_csr(g, origen, destino, objetivos, medicion=None, instrumentacion=None):
+    """
+    El bucle de dijkstra_csr(), también cuando se instrumenta: con medicion
+    (instrumentacion.MedicionConsulta) anota contadores y fases y, si la
+    instrumentación pide eventos, avisa a sus sumideros. Sin medicion sólo se
+    agrega una comparación por nodo asentado; nada por arista
+    """
+    medir = medicion is not None
+    if medir:
+        reloj = time.perf_counter
+        marca = reloj()
+    sumideros = instrumentacion.sumideros if medir and instrumentacion.eventos else ()
+
+    n = g.num_nodos
+    desp = g.desplazamientos
+    dest = g.destinos
+    pesos = g.pesos
+
+    distancias = array('d', [INF]) * n
+    previos = array('i', [-1]) * n
+    visitados = bytearray(n)
+    distancias[origen] = 0.0
+    asentados = 0
+    obsoletas = 0
+    relajaciones = 0
+    tamano_maximo = 1
+
+    marcados = None
+    if objetivos is not None:
+        marcados = bytearray(n)
+        for t in objetivos:
+            marcados[t] = 1
+        pendientes = sum(marcados)
+
+    cola = [(0.0, origen)]
+    heappop = heapq.heappop
+    heappush = heapq.heappush
+
+    if medir:
+        ahora = reloj()
+        medicion.fases['inicializacion'] = ahora - marca
+        marca = ahora
+
+    while cola:
+        distancia_actual, u = heappop(cola)
+
+        if visitados[u]:
+            obsoletas += 1
+            if sumideros:
+                for sumidero in sumideros:
+                    sumidero.evento(medicion, 'obsoleta', u, distancia_actual, len(cola), reloj())
+            continue
+
+        visitados[u] = 1
+        asentados += 1
+        if sumideros:
+            for sumidero in sumideros:
+                sumidero.evento(medicion, 'asentar', u, distancia_actual, len(cola), reloj())
+
+        if u == destino:
+            break
+        if marcados is not None and marcados[u]:
+            pendientes -= 1
+            if pendientes == 0:
+                break
+
+        for i in range(desp[u], desp[u + 1]):
+            v = dest[i]
+            if not visitados[v]:
+                nueva_distancia = distancia_actual + pesos[i]
+
+                if nueva_distancia < distancias[v]:
+                    distancias[v] = nueva_distancia
+                    previos[v] = u
+                    heappush(cola, (nueva_distancia, v))
+
+        if medir:
+            # Las relajaciones se cuentan aparte para no agregar trabajo por arista
+            # al bucle sin instrumentar; visitados no cambió durante la relajación
+            for i in range(desp[u], desp[u + 1]):
+                if not visitados[dest[i]]:
+                    relajaciones += 1
+            if len(cola) > tamano_maximo:
+                tamano_maximo = len(cola)
+
+    if medir:
+        # Cada extracción asienta un nodo o descarta una entrada obsoleta, y lo
+        # que quedó en la cola se insertó pero no se extrajo
+        extracciones = asentados + obsoletas
+        medicion.fases['busqueda'] = reloj() - marca
+        medicion.inserciones = extracciones + len(cola)
+        medicion.extracciones = extracciones
+        medicion.obsoletas = obsoletas
+        medicion.relajaciones = relajaciones
+        medicion.mejoras = medicion.inserciones - 1
+        medicion.asentados = asentados
+        medicion.tamano_maximo = tamano_maximo
+
+    return distancias, previos, asentados
+
+
+def reconstruir_camino(previos, destino):
+    """Reconstruye la lista de ids desde el origen hasta destino"""
+    camino = []
+    nodo = destino
+    while nodo != -1:
+        camino.append(nodo)
+        nodo = previos[nodo]
+    camino.reverse()
+    return camino
+
+
+def traducir_resultado(g, camino_ids, distancias, destino):
+    """Traduce el resultado por ids al formato (camino, distancia, distancias) por etiquetas"""
+    etiquetas = g.etiquetas
+    camino = [etiquetas[i] for i in camino_ids]
+    todas_distancias = dict(zip(etiquetas, distancias))
+    return camino, distancias[destino], todas_distancias
+
+
+def dijkstra(grafo, inicio, fin, cola=None, instrumentacion=None):
+    """
+    Implementa el algoritmo de Dijkstra sobre la representación CSR
+    Con un diccionario el GrafoCSR se arma en cada llamada: para consultas
+    repetidas conviene pasar un GrafoCSR ya construido
+    cola: 'heapq' (por defecto), 'indexado', 'emparejamiento', 'radix', 'dial'
+    o 'auto' para elegir según el rango de pesos (colas_prioridad, usa NumPy)
+    instrumentacion: mide la consulta (contadores, fases y eventos); sólo con la
+    cola heapq, que es el bucle de dijkstra_csr() (ValueError con otra cola)
+    """
+    g = como_csr(grafo)
+    origen = g.id_de(inicio)
+    destino = g.id_de(fin)
+
+    if instrumentacion is not None:
+        if cola not in (None, 'heapq'):
+            raise ValueError(f"La instrumentación mide la cola heapq, no {cola}")
+        medicion = instrumentacion.comenzar(origen, destino)
+        distancias, previos, _ = _dijkstra_csr(g, origen, destino, None,
+                                               medicion, instrumentacion)
+        marca = time.perf_counter()
+        resultado = traducir_resultado(g, reconstruir_camino(previos, destino),
+                                       distancias, destino)
+        medicion.fases['reconstruccion'] = time.perf_counter() - marca
+        instrumentacion.terminar(medicion)
+        return resultado
+
+    if cola is None or cola == 'heapq':
+        # El bucle con heapq en línea es el más rápido y sólo usa la biblioteca estándar
+        distancias, previos, _ = dijkstra_csr(g, origen, destino)
+    else:
+        from colas_prioridad import dijkstra_cola  # depende de este módulo
+        distancias, previos, _, _ = dijkstra_cola(g, origen, destino,
+                                                  cola=None if cola == 'auto' else cola)
+    camino_ids = reconstruir_camino(previos, destino)
+    return traducir_resultado(g, camino_ids, distancias, destino)
@@ -0,0 +1,269 @@
+"""
+Índice espacial sobre las posiciones de los nodos para ajustar coordenadas al grafo
+Una rejilla uniforme guardada como CSR (inicio de cada celda y elementos
+ordenados por celda, todo en arreglos de NumPy) indexa los nodos y, aparte,
+las aristas por las celdas que cubre su rectángulo. Las consultas recorren
+anillos de celdas alrededor del punto hasta que ningún anillo sin revisar
+puede tener algo más cerca, y se resuelven en lote: cada anillo procesa a la
+vez todos los puntos todavía pendientes, así que ajustar millones de puntos
+son unas pocas operaciones vectorizadas por anillo y no un recorrido O(V)
+por punto. Con geografico=True las posiciones son (longitud, latitud) en
+grados y las distancias se devuelven en metros (proyección equirrectangular)
+"""
+
+import math
+
+import numpy as np
+
+from grafo_csr import INF
+
+# Elementos promedio por celda de la rejilla de nodos
+POR_CELDA = 2
+# Puntos por lote en los ajustes masivos (acota la memoria de los candidatos)
+TAM_LOTE = 1 << 16
+RADIO_TIERRA = 6371008.8
+
+
+class _Rejilla:
+    """Rejilla uniforme en CSR: para cada celda, los elementos cuyo rectángulo la toca"""
+
+    def __init__(self, x0, y0, celda, columnas, filas, xmin, ymin, xmax, ymax):
+        self.x0, self.y0, self.celda = x0, y0, celda
+        self.columnas, self.filas = columnas, filas
+        cx0, cy0 = self.celdas(xmin, ymin)
+        cx1, cy1 = self.celdas(xmax, ymax)
+        ancho = cx1 - cx0 + 1
+        cuentas = ancho * (cy1 - cy0 + 1)
+
+        # Cada elemento se repite una vez por celda de su rectángulo
+        elementos = np.repeat(np.arange(len(cuentas), dtype=np.int64), cuentas)
+        local = np.arange(len(elementos)) - np.repeat(np.cumsum(cuentas) - cuentas, cuentas)
+        ancho = np.repeat(ancho, cuentas)
+        claves = ((np.repeat(cx0, cuentas) + local % ancho) * filas
+                  + np.repeat(cy0, cuentas) + local // ancho)
+        orden = np.argsort(claves, kind='stable')
+        self.elementos = elementos[orden].astype(np.int32)
+        self.inicio = np.searchsorted(claves[orden], np.arange(columnas * filas + 1))
+
+    def celdas(self, xs, ys):
+        """Celda (columna, fila) de cada punto, acotada a la rejilla"""
+        cx = np.clip(((xs - self.x0) // self.celda).astype(np.int64), 0, self.columnas - 1)
+        cy = np.clip(((ys - self.y0) // self.celda).astype(np.int64), 0, self.filas - 1)
+        return cx, cy
+
+    def buscar(self, xs, ys, k, distancia):
+        """
+        Los k elementos más cercanos a cada punto: distancia(puntos, elementos)
+        da la distancia de cada par candidato. Devuelve (elementos, distancias)
+        de forma (m, k), ordenados de menor a mayor; -1 e inf si faltan
+        """
+        m = len(xs)
+        mejores = np.full((m, k), -1, dtype=np.int64)
+        distancias = np.full((m, k), INF)
+        cx, cy = self.celdas(xs, ys)
+        pendientes = np.arange(m)
+
+        anillo = 0
+        while len(pendientes) and anillo <= max(self.columnas, self.filas):
+            for dx, dy in _anillo(anillo):
+                ox, oy = cx[pendientes] + dx, cy[pendientes] + dy
+                valida = (ox >= 0) & (ox < self.columnas) & (oy >= 0) & (oy < self.filas)
+                puntos, otra = pendientes[valida], (ox * self.filas + oy)[valida]
+                inicio = self.inicio[otra]
+                cuentas = self.inicio[otra + 1] - inicio
+                # El j-ésimo elemento de la celda de cada punto, para todos a la vez
+                j = 0
+                while len(puntos):
+                    tiene = cuentas > j
+                    puntos, inicio, cuentas = puntos[tiene], inicio[tiene], cuentas[tiene]
+                    elementos = self.elementos[inicio + j].astype(np.int64)
+                    _insertar(mejores, distancias, puntos, elementos,
+                              distancia(puntos, elementos), k)
+                    j += 1
+
+            # Lo que está a anillo + 1 celdas o más queda a distancia >= anillo * celda
+            pendientes = pendientes[distancias[pendientes, k - 1] > anillo * self.celda]
+            anillo += 1
+        return mejores, distancias
+
+
+def _insertar(mejores, distancias, puntos, elementos, candidatas, k):
+    """Inserta cada candidata en los k mejores de su punto (cada punto aparece una vez)"""
+    entra = candidatas < distancias[puntos, k - 1]
+    if k > 1:
+        # Un elemento que cubre varias celdas puede volver a aparecer
+        entra &= ~(mejores[puntos] == elementos[:, None]).any(axis=1)
+    puntos, elementos, candidatas = puntos[entra], elementos[entra], candidatas[entra]
+    if not len(puntos):
+        return
+    filas_e, filas_d = mejores[puntos], distancias[puntos]
+    lugar = (filas_d <= candidatas[:, None]).sum(axis=1)
+    correr = np.arange(k)[None, :] > lugar[:, None]
+    filas_e = np.where(correr, np.roll(filas_e, 1, axis=1), filas_e)
+    filas_d = np.where(correr, np.roll(filas_d, 1, axis=1), filas_d)
+    filas = np.arange(len(puntos))
+    filas_e[filas, lugar] = elementos
+    filas_d[filas, lugar] = candidatas
+    mejores[puntos] = filas_e
+    distancias[puntos] = filas_d
+
+
+def _anillo(r):
+    """Desplazamientos (dx, dy) de las celdas a distancia de Chebyshev r"""
+    if r == 0:
+        return [(0, 0)]
+    lado = range(-r, r + 1)
+    return ([(dx, -r) for dx in lado] + [(dx, r) for dx in lado] +
+            [(-r, dy) for dy in range(-r + 1, r)] + [(r, dy) for dy in range(-r + 1, r)])
+
+
+class IndiceEspacial:
+    """
+    Vecino más cercano, k vecinos y proyección sobre la arista más cercana
+    posiciones: {etiqueta: (x, y)} o un par (xs, ys) de arreglos alineados con
+    los ids de g. Los nodos sin posición no se indexan
+    """
+
+    def __init__(self, g, posiciones, geografico=False, tam_celda=None):
+        self.g = g
+        self.geografico = geografico
+        n = g.num_nodos
+        if isinstance(posiciones, dict):
+            xs = np.full(n, np.nan)
+            ys = np.full(n, np.nan)
+            for u, etiqueta in enumerate(g.etiquetas):
+                if etiqueta in posiciones:
+                    xs[u], ys[u] = posiciones[etiqueta]
+        else:
+            xs = np.array(posiciones[0], dtype=np.float64)
+            ys = np.array(posiciones[1], dtype=np.float64)
+        con_posicion = ~(np.isnan(xs) | np.isnan(ys))
+        if not con_posicion.any():
+            raise ValueError("Ningún nodo tiene posición")
+
+        self.latitud_media = float(np.mean(ys[con_posicion])) if geografico else 0.0
+        self.xs, self.ys = self.proyectar(xs, ys)
+        self.ids = np.flatnonzero(con_posicion)
+        px, py = self.xs[self.ids], self.ys[self.ids]
+
+        x0, y0 = float(px.min()), float(py.min())
+        ancho, alto = float(px.max()) - x0, float(py.max()) - y0
+        if tam_celda is None:
+            area = max(ancho * alto, max(ancho, alto, 1e-9) ** 2 / len(px))
+            tam_celda = math.sqrt(area * POR_CELDA / len(px))
+        self.celda = tam_celda
+        columnas = int(ancho // tam_celda) + 1
+        filas = int(alto // tam_celda) + 1
+        self.nodos = _Rejilla(x0, y0, tam_celda, columnas, filas, px, py, px, py)
+
+        # Aristas con ambos extremos ubicados, indexadas por su rectángulo
+        desplazamientos = np.frombuffer(g.desplazamientos, dtype=np.int64)
+        origenes = np.repeat(np.arange(n), np.diff(desplazamientos))
+        destinos = np.frombuffer(g.destinos, dtype=np.int32).astype(np.int64)
+        ubicada = con_posicion[origenes] & con_posicion[destinos] & (origenes != destinos)
+        # Las calles de doble sentido se indexan una sola vez (la arista u -> v con u < v)
+        claves = origenes * n + destinos
+        ubicada &= (origenes < destinos) | ~np.isin(destinos * n + origenes, claves)
+        self.aristas_u, self.aristas_v = origenes[ubicada], destinos[ubicada]
+        ux, uy = self.xs[self.aristas_u], self.ys[self.aristas_u]
+        vx, vy = self.xs[self.aristas_v], self.ys[self.aristas_v]
+        self.aristas = _Rejilla(x0, y0, tam_celda, columnas, filas, np.minimum(ux, vx),
+                                np.minimum(uy, vy), np.maximum(ux, vx), np.maximum(uy, vy))
+
+    def proyectar(self, xs, ys):
+        """Coordenadas planas del índice (metros si es geográfico)"""
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        if not self.geografico:
+            return xs, ys
+        escala = RADIO_TIERRA * math.pi / 180
+        return xs * escala * math.cos(math.radians(self.latitud_media)), ys * escala
+
+    # --- Por ids, en lote ---
+
+    def k_mas_cercanos_ids(self, xs, ys, k=1):
+        """(ids, distancias) de forma (m, k) de los k nodos más cercanos a cada punto"""
+        px, py = self.proyectar(np.atleast_1d(xs), np.atleast_1d(ys))
+        nodos_x, nodos_y = self.xs[self.ids], self.ys[self.ids]
+
+        def distancia(puntos, elementos):
+            return np.hypot(nodos_x[elementos] - px[puntos], nodos_y[elementos] - py[puntos])
+
+        ids = np.empty((len(px), k), dtype=np.int64)
+        distancias = np.empty((len(px), k))
+        for desde in range(0, len(px), TAM_LOTE):
+            lote = slice(desde, desde + TAM_LOTE)
+            elementos, distancias[lote] = self.nodos.buscar(px[lote], py[lote], k,
+                                                            _desplazada(distancia, desde))
+            ids[lote] = np.where(elementos >= 0, self.ids[elementos], -1)
+        return ids, distancias
+
+    def ajustar_ids(self, xs, ys):
+        """(ids, distancias) del nodo más cercano a cada punto"""
+        ids, distancias = self.k_mas_cercanos_ids(xs, ys, 1)
+        return ids[:, 0], distancias[:, 0]
+
+    def ajustar_aristas_ids(self, xs, ys):
+        """
+        Proyección de cada punto sobre la arista más cercana
+        Devuelve (origenes, destinos, fracciones, distancias, px, py): el punto
+        proyectado (px, py) está a fraccion del largo de origen -> destino. De
+        una calle de doble sentido se devuelve la arista con origen < destino
+        """
+        qx, qy = self.proyectar(np.atleast_1d(xs), np.atleast_1d(ys))
+        ux, uy = self.xs[self.aristas_u], self.ys[self.aristas_u]
+        dx, dy = self.xs[self.aristas_v] - ux, self.ys[self.aristas_v] - uy
+        largo2 = dx * dx + dy * dy
+
+        def fraccion(puntos, elementos):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                t = ((qx[puntos] - ux[elementos]) * dx[elementos] +
+                     (qy[puntos] - uy[elementos]) * dy[elementos]) / largo2[elementos]
+            return np.clip(np.nan_to_num(t), 0.0, 1.0)
+
+        def distancia(puntos, elementos):
+            t = fraccion(puntos, elementos)
+            return np.hypot(ux[elementos] + t * dx[elementos] - qx[puntos],
+                            uy[elementos] + t * dy[elementos] - qy[puntos])
+
+        aristas = np.empty(len(qx), dtype=np.int64)
+        distancias = np.empty(len(qx))
+        for desde in range(0, len(qx), TAM_LOTE):
+            lote = slice(desde, desde + TAM_LOTE)
+            elementos, cercanas = self.aristas.buscar(qx[lote], qy[lote], 1,
+                                                      _desplazada(distancia, desde))
+            aristas[lote], distancias[lote] = elementos[:, 0], cercanas[:, 0]
+
+        if (aristas < 0).any():
+            raise ValueError("El grafo no tiene aristas con posición")
+        t = fraccion(np.arange(len(qx)), aristas)
+        return (self.aristas_u[aristas], self.aristas_v[aristas], t, distancias,
+                ux[aristas] + t * dx[aristas], uy[aristas] + t * dy[aristas])
+
+    # --- Por etiquetas, de a un punto ---
+
+    def mas_cercano(self, x, y):
+        """(etiqueta, distancia) del nodo más cercano a (x, y)"""
+        ids, distancias = self.ajustar_ids([x], [y])
+        return self.g.etiquetas[int(ids[0])], float(distancias[0])
+
+    def k_mas_cercanos(self, x, y, k):
+        """[(etiqueta, distancia)] de los k nodos más cercanos, del más cercano al más lejano"""
+        ids, distancias = self.k_mas_cercanos_ids([x], [y], k)
+        return [(self.g.etiquetas[int(u)], float(d))
+                for u, d in zip(ids[0], distancias[0]) if u >= 0]
+
+    def arista_mas_cercana(self, x, y):
+        """
+        (u, v, fraccion, distancia, (px, py)) de la arista más cercana a (x, y);
+        (px, py) es la proyección en las coordenadas planas del índice
+        """
+        u, v, t, d, px, py = self.ajustar_aristas_ids([x], [y])
+        etiquetas = self.g.etiquetas
+        return (etiquetas[int(u[0])], etiquetas[int(v[0])], float(t[0]), float(d[0]),
+                (float(px[0]), float(py[0])))
+
+
+def _desplazada(distancia, desde):
+    """La función de distancia con los índices de punto relativos a un lote"""
+    return lambda puntos, elementos: distancia(puntos + desde, elementos)
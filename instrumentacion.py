@@ -0,0 +1,202 @@
+"""
+Instrumentación de las búsquedas de Dijkstra
+Con una Instrumentacion, dijkstra_csr() y dijkstra() cuentan en su mismo bucle
+inserciones, extracciones, extracciones obsoletas, relajaciones, nodos
+asentados y tamaño máximo de la cola, miden el tiempo de cada fase y entregan el
+resultado de cada consulta (y, si se pide, un evento por nodo asentado) a los
+sumideros. Sin instrumentación el costo es una comparación por nodo asentado
+
+Sumideros incluidos:
+- TrazaChrome: JSON de eventos de traza que abren chrome://tracing y Perfetto
+- HistogramaConsultas: histogramas logarítmicos de tiempo, asentados, etc.,
+  percentiles y las consultas más lentas
+"""
+
+import heapq
+import json
+import math
+import time
+
+# Contadores de cada consulta, en el orden en que se informan
+CONTADORES = ('inserciones', 'extracciones', 'obsoletas', 'relajaciones', 'mejoras',
+              'asentados', 'tamano_maximo')
+
+
+class MedicionConsulta:
+    """Contadores y tiempos por fase de una consulta"""
+
+    def __init__(self, numero, origen, destino, inicio):
+        self.numero = numero
+        self.origen = origen
+        self.destino = destino
+        self.inicio = inicio        # time.perf_counter() al comenzar
+        self.fases = {}             # nombre -> segundos, en orden de ejecución
+        for contador in CONTADORES:
+            setattr(self, contador, 0)
+
+    @property
+    def segundos(self):
+        return sum(self.fases.values())
+
+    def como_diccionario(self):
+        datos = {'consulta': self.numero, 'origen': self.origen, 'destino': self.destino}
+        datos.update((contador, getattr(self, contador)) for contador in CONTADORES)
+        datos['fases'] = dict(self.fases)
+        datos['segundos'] = self.segundos
+        return datos
+
+
+class Sumidero:
+    """Interfaz de los sumideros; los métodos no redefinidos no hacen nada"""
+
+    def evento(self, medicion, tipo, nodo, distancia, tamano_cola, instante):
+        """Un nodo asentado ('asentar') o una extracción obsoleta ('obsoleta')"""
+
+    def consulta(self, medicion):
+        """La consulta terminó: medicion tiene los contadores y las fases"""
+
+
+class Instrumentacion:
+    """
+    Se pasa a dijkstra_csr() o dijkstra() para medir sus consultas
+    eventos=True entrega además a los sumideros un evento por extracción de la
+    cola (mucho más costoso: sólo para diagnosticar una consulta puntual)
+    """
+
+    def __init__(self, sumideros=(), eventos=False):
+        self.sumideros = list(sumideros)
+        self.eventos = eventos
+        self.consultas = 0
+        self.ultima = None
+
+    def comenzar(self, origen, destino):
+        self.consultas += 1
+        return MedicionConsulta(self.consultas, origen, destino, time.perf_counter())
+
+    def terminar(self, medicion):
+        self.ultima = medicion
+        for sumidero in self.sumideros:
+            sumidero.consulta(medicion)
+
+
+# --- Sumideros ---
+
+class TrazaChrome(Sumidero):
+    """
+    Eventos en el formato Trace Event de Chrome (chrome://tracing, ui.perfetto.dev)
+    Cada consulta es un evento con sus fases anidadas y los contadores como
+    argumentos; con eventos=True en la Instrumentacion se agregan los nodos
+    asentados como eventos instantáneos y el tamaño de la cola como contador
+    """
+
+    def __init__(self, proceso=1, hilo=1):
+        self.proceso = proceso
+        self.hilo = hilo
+        self.origen_tiempo = time.perf_counter()
+        self.eventos = []
+
+    def _microsegundos(self, instante):
+        return (instante - self.origen_tiempo) * 1e6
+
+    def evento(self, medicion, tipo, nodo, distancia, tamano_cola, instante):
+        ts = self._microsegundos(instante)
+        self.eventos.append({'name': tipo, 'ph': 'i', 's': 't', 'ts': ts,
+                             'pid': self.proceso, 'tid': self.hilo,
+                             'args': {'nodo': nodo, 'distancia': distancia}})
+        self.eventos.append({'name': 'cola', 'ph': 'C', 'ts': ts, 'pid': self.proceso,
+                             'tid': self.hilo, 'args': {'entradas': tamano_cola}})
+
+    def consulta(self, medicion):
+        inicio = self._microsegundos(medicion.inicio)
+        datos = medicion.como_diccionario()
+        del datos['fases']
+        self.eventos.append({'name': f'dijkstra {medicion.origen}->{medicion.destino}',
+                             'cat': 'consulta', 'ph': 'X', 'ts': inicio,
+                             'dur': medicion.segundos * 1e6, 'pid': self.proceso,
+                             'tid': self.hilo, 'args': datos})
+        for fase, segundos in medicion.fases.items():
+            self.eventos.append({'name': fase, 'cat': 'fase', 'ph': 'X', 'ts': inicio,
+                                 'dur': segundos * 1e6, 'pid': self.proceso,
+                                 'tid': self.hilo})
+            inicio += segundos * 1e6
+
+    def como_diccionario(self):
+        return {'traceEvents': self.eventos, 'displayTimeUnit': 'ms'}
+
+    def guardar(self, ruta):
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            json.dump(self.como_diccionario(), archivo)
+
+
+class HistogramaConsultas(Sumidero):
+    """
+    Histogramas de las consultas con cubetas en potencias de 2 (microsegundos
+    para el tiempo), memoria constante sin importar la cantidad de consultas,
+    y las `peores` consultas más lentas para revisarlas
+    """
+
+    def __init__(self, peores=10):
+        self.cantidad = 0
+        self.cubetas = {}     # métrica -> {exponente: cantidad}
+        self.maximos = {}
+        self.sumas = {}
+        self.peores = peores
+        self._lentas = []     # montículo de (segundos, número, medición)
+
+    def _agregar(self, metrica, valor):
+        exponente = max(0, math.frexp(valor)[1])  # valor < 2 ** exponente (o menor que 1)
+        cubetas = self.cubetas.setdefault(metrica, {})
+        cubetas[exponente] = cubetas.get(exponente, 0) + 1
+        self.sumas[metrica] = self.sumas.get(metrica, 0) + valor
+        self.maximos[metrica] = max(self.maximos.get(metrica, 0), valor)
+
+    def consulta(self, medicion):
+        self.cantidad += 1
+        self._agregar('microsegundos', medicion.segundos * 1e6)
+        for contador in CONTADORES:
+            self._agregar(contador, getattr(medicion, contador))
+        entrada = (medicion.segundos, medicion.numero, medicion)
+        if len(self._lentas) < self.peores:
+            heapq.heappush(self._lentas, entrada)
+        elif entrada > self._lentas[0]:
+            heapq.heapreplace(self._lentas, entrada)
+
+    def percentil(self, metrica, p):
+        """Cota superior (límite de su cubeta) del percentil p (0-100) de la métrica"""
+        cubetas = self.cubetas.get(metrica)
+        if not cubetas:
+            return 0
+        umbral = p / 100 * self.cantidad
+        acumulado = 0
+        for exponente in sorted(cubetas):
+            acumulado += cubetas[exponente]
+            if acumulado >= umbral:
+                return min(2.0 ** exponente, self.maximos[metrica])
+        return self.maximos[metrica]
+
+    def lentas(self):
+        """Las consultas más lentas, de la peor a la mejor"""
+        return [medicion for _, _, medicion in sorted(self._lentas, reverse=True)]
+
+    def resumen(self):
+        """{métrica: {media, p50, p90, p99, max}}"""
+        return {metrica: {'media': self.sumas[metrica] / self.cantidad,
+                          'p50': self.percentil(metrica, 50),
+                          'p90': self.percentil(metrica, 90),
+                          'p99': self.percentil(metrica, 99),
+                          'max': self.maximos[metrica]}
+                for metrica in self.cubetas}
+
+    def texto(self, metrica='microsegundos', ancho=40):
+        """Histograma de barras de una métrica"""
+        cubetas = self.cubetas.get(metrica, {})
+        if not cubetas:
+            return f"{metrica}: sin consultas"
+        mayor = max(cubetas.values())
+        lineas = [f"{metrica} ({self.cantidad} consultas)"]
+        for exponente in range(min(cubetas), max(cubetas) + 1):
+            cantidad = cubetas.get(exponente, 0)
+            desde = 2 ** (exponente - 1) if exponente > 0 else 0
+            barra = '█' * math.ceil(ancho * cantidad / mayor)
+            lineas.append(f"  [{desde:>10g}, {2 ** exponente:>10g}) {cantidad:8d} {barra}")
+        return "\n".join(lineas)
@@ -0,0 +1,178 @@
+"""
+Isocronas: todos los nodos alcanzables desde un origen dentro de un presupuesto
+La búsqueda se corta en cuanto la distancia extraída supera el presupuesto y
+guarda su estado en diccionarios, por lo que el costo depende del tamaño de la
+región alcanzada y no del grafo. El resultado son arreglos compactos con sólo
+los nodos alcanzados, en orden de distancia
+"""
+
+from array import array
+import heapq
+import os
+
+import numpy as np
+
+from grafo_csr import INF, como_csr
+from paralelo import mapear_en_procesos
+
+# Cantidad de orígenes a partir de la cual conviene repartir las isocronas entre procesos
+UMBRAL_PARALELO = 64
+
+
+def isocrona_csr(g, origen, presupuesto):
+    """
+    Nodos a distancia <= presupuesto de origen (id)
+    Devuelve (nodos, distancias, previos) como array('i'), array('d') y array('i')
+    alineados, en orden de distancia; previos[k] es el id anterior a nodos[k]
+    en su camino mínimo (-1 para el origen)
+    """
+    desp = g.desplazamientos
+    dest = g.destinos
+    pesos = g.pesos
+
+    nodos = array('i')
+    alcanzadas = array('d')
+    anteriores = array('i')
+    if presupuesto < 0:
+        return nodos, alcanzadas, anteriores
+
+    distancias = {origen: 0.0}
+    previos = {origen: -1}
+    cerrados = set()
+    cola = [(0.0, origen)]
+    heappop = heapq.heappop
+    heappush = heapq.heappush
+
+    while cola:
+        distancia_actual, u = heappop(cola)
+        if distancia_actual > presupuesto:
+            break
+        if u in cerrados:
+            continue
+        cerrados.add(u)
+        nodos.append(u)
+        alcanzadas.append(distancia_actual)
+        anteriores.append(previos[u])
+
+        for i in range(desp[u], desp[u + 1]):
+            v = dest[i]
+            if v in cerrados:
+                continue
+            nueva_distancia = distancia_actual + pesos[i]
+            # Lo que queda fuera del presupuesto ni siquiera entra a la cola
+            if nueva_distancia <= presupuesto and nueva_distancia < distancias.get(v, INF):
+                distancias[v] = nueva_distancia
+                previos[v] = u
+                heappush(cola, (nueva_distancia, v))
+
+    return nodos, alcanzadas, anteriores
+
+
+def aristas_frontera(g, nodos, distancias, presupuesto):
+    """
+    Aristas u -> v que salen de un nodo alcanzado y no se pueden recorrer
+    enteras dentro del presupuesto (distancia[u] + peso > presupuesto)
+    Se omiten las que quedan cubiertas desde ambos extremos: v alcanzado, con
+    una arista v -> u de vuelta y (presupuesto - d[u]) / peso +
+    (presupuesto - d[v]) / peso(v -> u) >= 1. En una arista de un solo sentido
+    no se llega desde v, así que el corte se mantiene
+    Devuelve (origenes, destinos, fracciones) como arreglos de NumPy: el corte
+    de la isocrona está a fraccion del largo de la arista, medido desde u
+    El costo depende sólo de los nodos alcanzados y sus aristas
+    """
+    nodos = np.asarray(nodos, dtype=np.int64)
+    distancias = np.asarray(distancias, dtype=np.float64)
+    desplazamientos = np.frombuffer(g.desplazamientos, dtype=np.int64)
+    inicio = desplazamientos[nodos]
+    cuentas = desplazamientos[nodos + 1] - inicio
+    # Índice de cada arista: inicio de su nodo más su posición dentro del grupo
+    base = np.repeat(inicio - (np.cumsum(cuentas) - cuentas), cuentas)
+    indices = base + np.arange(int(cuentas.sum()))
+
+    origenes = np.repeat(nodos, cuentas)
+    destinos = np.frombuffer(g.destinos, dtype=np.int32)[indices].astype(np.int64)
+    pesos = np.frombuffer(g.pesos, dtype=np.float64)[indices]
+    restante = presupuesto - np.repeat(distancias, cuentas)
+    corta = pesos > restante
+    if len(pesos):
+        # Lo que falta recorrer desde v: búsqueda binaria entre los nodos alcanzados
+        orden = np.argsort(nodos)
+        alcanzados = nodos[orden]
+        k = np.minimum(np.searchsorted(alcanzados, destinos), len(alcanzados) - 1)
+        v_alcanzado = alcanzados[k] == destinos
+        restante_destino = presupuesto - distancias[orden][k]
+
+        # Arista de vuelta v -> u: si v fue alcanzado, está entre las aristas
+        # recorridas; con aristas paralelas cuenta la más corta
+        n = g.num_nodos
+        claves = origenes * n + destinos
+        por_clave = np.lexsort((pesos, claves))
+        claves_ordenadas = claves[por_clave]
+        vuelta = destinos * n + origenes
+        j = np.minimum(np.searchsorted(claves_ordenadas, vuelta), len(claves_ordenadas) - 1)
+        hay_vuelta = v_alcanzado & (claves_ordenadas[j] == vuelta)
+        peso_vuelta = pesos[por_clave][j]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            desde_v = np.where(peso_vuelta > 0, restante_destino / peso_vuelta, np.inf)
+            cubierta = hay_vuelta & (restante / pesos + desde_v >= 1)
+        corta &= ~cubierta
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fracciones = np.where(pesos[corta] > 0, restante[corta] / pesos[corta], 0.0)
+    return origenes[corta], destinos[corta], fracciones
+
+
+def puntos_corte(origenes, destinos, fracciones, xs, ys):
+    """Coordenadas (x, y) de los cortes interpolando linealmente sobre cada arista"""
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    return (xs[origenes] + fracciones * (xs[destinos] - xs[origenes]),
+            ys[origenes] + fracciones * (ys[destinos] - ys[origenes]))
+
+
+def _isocrona_tarea(g, origen, presupuesto):
+    return isocrona_csr(g, origen, presupuesto)
+
+
+def isocronas_lote(g, origenes, presupuestos, procesos=None):
+    """
+    isocrona_csr() para cada origen (ids); presupuestos es un número para
+    todos o una lista alineada con origenes. Con muchos orígenes se reparten
+    entre procesos. Devuelve una lista de (nodos, distancias, previos)
+    """
+    if not isinstance(presupuestos, (list, tuple)):
+        presupuestos = [presupuestos] * len(origenes)
+    elif len(presupuestos) != len(origenes):
+        raise ValueError("Se necesita un presupuesto por origen")
+    tareas = list(zip(origenes, presupuestos))
+    if procesos == 1 or len(tareas) < UMBRAL_PARALELO:
+        return [isocrona_csr(g, origen, presupuesto) for origen, presupuesto in tareas]
+    procesos = procesos or os.cpu_count()
+    tam_lote = max(1, len(tareas) // (4 * procesos))
+    return list(mapear_en_procesos(g, _isocrona_tarea, tareas, procesos, tam_lote))
+
+
+def isocrona(grafo, inicio, presupuesto):
+    """{nodo: distancia} de los nodos a distancia <= presupuesto de inicio"""
+    g = como_csr(grafo)
+    nodos, distancias, _ = isocrona_csr(g, g.id_de(inicio), presupuesto)
+    etiquetas = g.etiquetas
+    return {etiquetas[v]: d for v, d in zip(nodos, distancias)}
+
+
+def frontera_isocrona(grafo, inicio, presupuesto, posiciones=None):
+    """
+    [(u, v, fraccion, punto)] de las aristas donde corta la isocrona de inicio
+    punto es la coordenada interpolada del corte si se indican posiciones
+    {nodo: (x, y)} y None si no
+    """
+    g = como_csr(grafo)
+    nodos, distancias, _ = isocrona_csr(g, g.id_de(inicio), presupuesto)
+    origenes, destinos, fracciones = aristas_frontera(g, nodos, distancias, presupuesto)
+    etiquetas = g.etiquetas
+    if posiciones is None:
+        puntos = [None] * len(origenes)
+    else:
+        xs, ys = zip(*(posiciones[etiquetas[i]] for i in range(g.num_nodos)))
+        puntos = list(zip(*(c.tolist() for c in puntos_corte(origenes, destinos, fracciones, xs, ys))))
+    return [(etiquetas[u], etiquetas[v], f, punto)
+            for u, v, f, punto in zip(origenes.tolist(), destinos.tolist(), fracciones.tolist(), puntos)]
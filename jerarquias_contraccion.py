@@ -0,0 +1,268 @@
+"""
+Jerarquías de contracción (Contraction Hierarchies)
+El preprocesamiento contrae los nodos uno a uno en orden de importancia y
+agrega atajos (shortcuts) donde no hay un camino testigo. Las consultas son
+una búsqueda bidireccional que sólo sube en la jerarquía, y los atajos se
+desempaquetan de vuelta al camino original
+"""
+
+from array import array
+import heapq
+
+from grafo_csr import INF, como_csr
+
+# Límite de nodos asentados en cada búsqueda de testigos
+LIMITE_TESTIGOS = 500
+
+
+def _buscar_testigos(salientes, origen, excluido, limite_distancia, limite_asentados):
+    """Dijkstra acotado desde origen que evita el nodo excluido"""
+    distancias = {origen: 0.0}
+    visitados = set()
+    cola = [(0.0, origen)]
+
+    while cola and len(visitados) < limite_asentados:
+        distancia_actual, u = heapq.heappop(cola)
+
+        if u in visitados:
+            continue
+        if distancia_actual > limite_distancia:
+            break
+
+        visitados.add(u)
+
+        for vecino, (peso, _) in salientes[u].items():
+            if vecino == excluido or vecino in visitados:
+                continue
+            nueva_distancia = distancia_actual + peso
+            if nueva_distancia < distancias.get(vecino, INF):
+                distancias[vecino] = nueva_distancia
+                heapq.heappush(cola, (nueva_distancia, vecino))
+
+    return distancias
+
+
+def _atajos_necesarios(salientes, entrantes, v, limite_asentados):
+    """Lista de atajos (u, w, peso) que requiere la contracción de v"""
+    atajos = []
+    for u, (peso_entrada, _) in entrantes[v].items():
+        objetivos = {w: peso_entrada + peso_salida
+                     for w, (peso_salida, _) in salientes[v].items() if w != u}
+        if not objetivos:
+            continue
+
+        testigos = _buscar_testigos(salientes, u, v, max(objetivos.values()), limite_asentados)
+        for w, peso in objetivos.items():
+            if testigos.get(w, INF) > peso:
+                atajos.append((u, w, peso))
+    return atajos
+
+
+def _aplanar(listas, n):
+    """Convierte listas por nodo de (vecino, peso, medio) a arreglos CSR"""
+    desplazamientos = array('q', [0])
+    destinos = array('i')
+    pesos = array('d')
+    medios = array('i')
+    for u in range(n):
+        for vecino, peso, medio in listas[u]:
+            destinos.append(vecino)
+            pesos.append(peso)
+            medios.append(medio)
+        desplazamientos.append(len(destinos))
+    return desplazamientos, destinos, pesos, medios
+
+
+class JerarquiaContraccion:
+    """Grafo ascendente (hacia adelante y hacia atrás) con el rango de cada nodo"""
+
+    def __init__(self, etiquetas, rango, adelante, atras):
+        self.etiquetas = etiquetas
+        self.rango = rango          # posición de cada nodo en el orden de contracción
+        self.adelante = adelante    # aristas u -> w con rango[w] > rango[u]
+        self.atras = atras          # aristas invertidas: w <- u con rango[u] > rango[w]
+        self.indices = {nodo: i for i, nodo in enumerate(etiquetas)}
+
+    @classmethod
+    def preprocesar(cls, grafo, limite_testigos=LIMITE_TESTIGOS):
+        """
+        Ordena los nodos por diferencia de aristas + vecinos eliminados,
+        los contrae y guarda las aristas hacia nodos de mayor rango
+        """
+        g = como_csr(grafo)
+        n = g.num_nodos
+
+        # Grafo de trabajo: salientes[u][w] = (peso, medio); medio = -1 si es arista original
+        salientes = [{} for _ in range(n)]
+        entrantes = [{} for _ in range(n)]
+        for u in range(n):
+            for w, peso in g.vecinos(u):
+                if u != w and peso < salientes[u].get(w, (INF, -1))[0]:
+                    salientes[u][w] = (peso, -1)
+                    entrantes[w][u] = (peso, -1)
+
+        vecinos_eliminados = [0] * n
+
+        def prioridad(v):
+            atajos = _atajos_necesarios(salientes, entrantes, v, limite_testigos)
+            diferencia = len(atajos) - len(salientes[v]) - len(entrantes[v])
+            return diferencia + vecinos_eliminados[v]
+
+        cola = [(prioridad(v), v) for v in range(n)]
+        heapq.heapify(cola)
+
+        rango = array('i', [0]) * n
+        lista_adelante = [[] for _ in range(n)]
+        lista_atras = [[] for _ in range(n)]
+        siguiente_rango = 0
+
+        while cola:
+            _, v = heapq.heappop(cola)
+
+            # Actualización perezosa: si ya no es el mínimo, se reinserta
+            nueva_prioridad = prioridad(v)
+            if cola and nueva_prioridad > cola[0][0]:
+                heapq.heappush(cola, (nueva_prioridad, v))
+                continue
+
+            atajos = _atajos_necesarios(salientes, entrantes, v, limite_testigos)
+
+            # Las aristas que quedan en v van a nodos de mayor rango
+            rango[v] = siguiente_rango
+            siguiente_rango += 1
+            for w, (peso, medio) in salientes[v].items():
+                lista_adelante[v].append((w, peso, medio))
+                del entrantes[w][v]
+                vecinos_eliminados[w] += 1
+            for u, (peso, medio) in entrantes[v].items():
+                lista_atras[v].append((u, peso, medio))
+                del salientes[u][v]
+                vecinos_eliminados[u] += 1
+            salientes[v] = {}
+            entrantes[v] = {}
+
+            for u, w, peso in atajos:
+                if peso < salientes[u].get(w, (INF, -1))[0]:
+                    salientes[u][w] = (peso, v)
+                    entrantes[w][u] = (peso, v)
+
+        return cls(list(g.etiquetas), rango,
+                   _aplanar(lista_adelante, n), _aplanar(lista_atras, n))
+
+    @property
+    def num_atajos(self):
+        """Cantidad de aristas de la jerarquía que son atajos"""
+        return sum(1 for _, _, _, medios in (self.adelante, self.atras)
+                   for medio in medios if medio != -1)
+
+    def _arista(self, lado, nodo, vecino):
+        """(medio, peso) de la arista guardada en la lista de nodo hacia vecino"""
+        desp, dest, pesos, medios = lado
+        for i in range(desp[nodo], desp[nodo + 1]):
+            if dest[i] == vecino:
+                return medios[i], pesos[i]
+        raise KeyError((nodo, vecino))
+
+    def _desempacar(self, u, w, medio, peso):
+        """Expande la arista u -> w en los pares (nodo, peso) originales (sin incluir u)"""
+        pasos = []
+        pendientes = [(u, w, medio, peso)]
+        while pendientes:
+            a, b, m, p = pendientes.pop()
+            if m == -1:
+                pasos.append((b, p))
+                continue
+            # m tiene menor rango que a y b: a -> m está en atras[m], m -> b en adelante[m]
+            pendientes.append((m, b) + self._arista(self.adelante, m, b))
+            pendientes.append((a, m) + self._arista(self.atras, m, a))
+        return pasos
+
+    def consulta_ids(self, origen, destino):
+        """
+        Búsqueda bidireccional ascendente sobre ids enteros
+        Devuelve (distancia, pasos, asentados); pasos es la lista de
+        (nodo, peso de la arista que llega a él) del camino original
+        """
+        lados = (self.adelante, self.atras)
+        distancias = ({origen: 0.0}, {destino: 0.0})
+        previos = ({origen: None}, {destino: None})
+        visitados = (set(), set())
+        colas = ([(0.0, origen)], [(0.0, destino)])
+
+        mu = INF
+        encuentro = -1
+        asentados = 0
+
+        while True:
+            # Cada lado se detiene cuando su mínimo ya no puede mejorar μ
+            for cola in colas:
+                if cola and cola[0][0] >= mu:
+                    cola.clear()
+            if not colas[0] and not colas[1]:
+                break
+
+            lado = 0 if colas[0] and (not colas[1] or colas[0][0][0] <= colas[1][0][0]) else 1
+            dist = distancias[lado]
+            distancia_actual, u = heapq.heappop(colas[lado])
+            if u in visitados[lado]:
+                continue
+
+            visitados[lado].add(u)
+            asentados += 1
+
+            otra = distancias[1 - lado].get(u, INF)
+            if distancia_actual + otra < mu:
+                mu = distancia_actual + otra
+                encuentro = u
+
+            desp, dest, pesos, medios = lados[lado]
+            for i in range(desp[u], desp[u + 1]):
+                v = dest[i]
+                nueva_distancia = distancia_actual + pesos[i]
+                if nueva_distancia < dist.get(v, INF):
+                    dist[v] = nueva_distancia
+                    previos[lado][v] = (u, medios[i], pesos[i])
+                    heapq.heappush(colas[lado], (nueva_distancia, v))
+
+        if encuentro == -1:
+            return INF, [(destino, INF)], asentados
+
+        # Mitad hacia adelante: origen ... encuentro
+        tramos = []
+        nodo = encuentro
+        while previos[0][nodo] is not None:
+            padre, medio, peso = previos[0][nodo]
+            tramos.append((padre, nodo, medio, peso))
+            nodo = padre
+        pasos = [(origen, 0.0)]
+        for tramo in reversed(tramos):
+            pasos.extend(self._desempacar(*tramo))
+
+        # Mitad hacia atrás: encuentro ... destino
+        nodo = encuentro
+        while previos[1][nodo] is not None:
+            siguiente, medio, peso = previos[1][nodo]
+            pasos.extend(self._desempacar(nodo, siguiente, medio, peso))
+            nodo = siguiente
+
+        return mu, pasos, asentados
+
+
+def dijkstra_ch(jerarquia, inicio, fin):
+    """
+    Consulta sobre la jerarquía con la salida de dijkstra(): (camino, distancia, distancias)
+    Las distancias sólo se reportan para los nodos del camino
+    """
+    origen = jerarquia.indices[inicio]
+    destino = jerarquia.indices[fin]
+
+    distancia, pasos, _ = jerarquia.consulta_ids(origen, destino)
+    camino = [jerarquia.etiquetas[nodo] for nodo, _ in pasos]
+
+    distancias = {}
+    acumulada = 0.0
+    for nodo, peso in pasos:
+        acumulada += peso
+        distancias[jerarquia.etiquetas[nodo]] = acumulada
+    distancias[fin] = distancia
+    return camino, distancia, distancias
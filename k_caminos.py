@@ -0,0 +1,171 @@
+"""
+K caminos más cortos sin ciclos entre un par de nodos (algoritmo de Yen)
+En lugar de un Dijkstra completo por nodo de desvío:
+- Se calcula una sola vez el árbol inverso de caminos mínimos hacia el destino;
+  si el camino del árbol desde el nodo de desvío no toca la raíz ni una arista
+  prohibida, es el desvío óptimo y no hace falta buscar.
+- Si hay que buscar, es un A* cuya heurística es la distancia del árbol
+  (cota inferior exacta en el grafo sin restricciones), podado por el costo
+  del peor candidato que todavía podría entrar entre los K.
+- Las aristas prohibidas de cada raíz salen de un trie de prefijos de los
+  caminos ya aceptados, recorrido a la par del camino, sin comparar listas.
+"""
+
+from bisect import insort
+import heapq
+
+from grafo_csr import INF, como_csr
+from delta_stepping import arbol_completo
+
+
+def _peso_arista(g, u, v):
+    """Menor peso entre las aristas u -> v"""
+    return min(g.pesos[i] for i in range(g.desplazamientos[u], g.desplazamientos[u + 1])
+               if g.destinos[i] == v)
+
+
+def _acumulados(g, camino):
+    """Costo desde el origen hasta cada nodo del camino"""
+    acumulados = [0.0]
+    for u, v in zip(camino, camino[1:]):
+        acumulados.append(acumulados[-1] + _peso_arista(g, u, v))
+    return acumulados
+
+
+def _camino_arbol(siguiente, nodo, bloqueados=None, prohibidos=()):
+    """
+    Camino de nodo al destino siguiendo el árbol inverso; None si su primera
+    arista está prohibida o si pasa por un nodo bloqueado
+    """
+    if siguiente[nodo] in prohibidos:
+        return None
+    camino = [nodo]
+    nodo = siguiente[nodo]
+    while nodo != -1:
+        if bloqueados is not None and bloqueados[nodo]:
+            return None
+        camino.append(nodo)
+        nodo = siguiente[nodo]
+    return camino
+
+
+def _desvio(g, inicio, destino, costo_raiz, cota, bloqueados, prohibidos, limite):
+    """
+    A* desde inicio hasta destino sin pasar por nodos bloqueados ni por las
+    aristas inicio -> prohibidos. Descarta todo lo que no baje de limite
+    Devuelve (costo total, camino) o None
+    """
+    desp = g.desplazamientos
+    dest = g.destinos
+    pesos = g.pesos
+
+    distancias = {inicio: costo_raiz}
+    previos = {inicio: -1}
+    cerrados = set()
+    cola = [(costo_raiz + cota[inicio], costo_raiz, inicio)]
+
+    while cola:
+        _, distancia_actual, u = heapq.heappop(cola)
+        if u in cerrados:
+            continue
+        if u == destino:
+            camino = []
+            while u != -1:
+                camino.append(u)
+                u = previos[u]
+            camino.reverse()
+            return distancia_actual, camino
+        cerrados.add(u)
+
+        for i in range(desp[u], desp[u + 1]):
+            v = dest[i]
+            if bloqueados[v] or v in cerrados or (u == inicio and v in prohibidos):
+                continue
+            nueva_distancia = distancia_actual + pesos[i]
+            estimada = nueva_distancia + cota[v]
+            if estimada >= limite:
+                continue
+            if nueva_distancia < distancias.get(v, INF):
+                distancias[v] = nueva_distancia
+                previos[v] = u
+                heapq.heappush(cola, (estimada, nueva_distancia, v))
+    return None
+
+
+def k_caminos_csr(g, origen, destino, k):
+    """
+    Hasta k caminos sin ciclos de origen a destino (ids), de menor a mayor costo
+    Devuelve [(distancia, camino_ids)]
+    """
+    # Árbol inverso: cota[v] = distancia de v al destino, siguiente[v] = próximo salto
+    cota, siguiente, _ = arbol_completo(g.invertido(), destino)
+    if cota[origen] == INF or k < 1:
+        return []
+
+    primero = _camino_arbol(siguiente, origen)
+    aceptados = [(_acumulados(g, primero), primero)]
+    trie = {}       # prefijos de los caminos aceptados: nodo -> {siguiente nodo: subárbol}
+    vistos = {tuple(primero)}
+    candidatos = []  # (costo, camino), ordenados; nunca más de los que aún faltan
+    bloqueados = bytearray(g.num_nodos)
+
+    while len(aceptados) < k:
+        acumulados, camino = aceptados[-1]
+
+        # Agregar el último camino al trie
+        rama = trie
+        for nodo in camino:
+            rama = rama.setdefault(nodo, {})
+
+        faltan = k - len(aceptados)
+        rama = trie
+        for i, nodo in enumerate(camino[:-1]):
+            rama = rama[nodo]
+            prohibidos = rama.keys()  # siguientes nodos de los aceptados con esta raíz
+            costo_raiz = acumulados[i]
+            limite = candidatos[-1][0] if len(candidatos) >= faltan else INF
+
+            # Ningún desvío desde aquí cuesta menos que la raíz más la cota
+            if cota[nodo] != INF and costo_raiz + cota[nodo] < limite:
+                desvio = _camino_arbol(siguiente, nodo, bloqueados, prohibidos)
+                if desvio is not None:
+                    resultado = (costo_raiz + cota[nodo], desvio)
+                else:
+                    resultado = _desvio(g, nodo, destino, costo_raiz, cota, bloqueados,
+                                        prohibidos, limite)
+
+                if resultado is not None:
+                    costo, desvio = resultado
+                    nuevo = camino[:i] + desvio
+                    clave = tuple(nuevo)
+                    if clave not in vistos:
+                        vistos.add(clave)
+                        insort(candidatos, (costo, nuevo))
+                        del candidatos[faltan:]
+
+            # La raíz del siguiente desvío incluye este nodo
+            bloqueados[nodo] = 1
+
+        for nodo in camino:
+            bloqueados[nodo] = 0
+
+        if not candidatos:
+            break
+        _, mejor = candidatos.pop(0)
+        aceptados.append((_acumulados(g, mejor), mejor))
+
+    return [(acumulados[-1], camino) for acumulados, camino in aceptados]
+
+
+def k_caminos_mas_cortos(grafo, inicio, fin, k=3):
+    """Hasta k caminos sin ciclos de inicio a fin como [(camino, distancia)], del mejor al peor"""
+    g = como_csr(grafo)
+    etiquetas = g.etiquetas
+    return [([etiquetas[i] for i in camino], distancia)
+            for distancia, camino in k_caminos_csr(g, g.id_de(inicio), g.id_de(fin), k)]
+
+
+def rutas_alternativas(grafo, inicio, fin, k=3):
+    """Las k mejores rutas de inicio a fin en el formato de comparar_rutas"""
+    return [(inicio, fin, camino, distancia)
+            for camino, distancia in k_caminos_mas_cortos(grafo, inicio, fin, k)]
@@ -0,0 +1,216 @@
+"""
+Heurística ALT (A*, Landmarks y desigualdad Triangular)
+Se eligen algunos nodos de referencia (landmarks), se guardan sus árboles de
+distancias completos en arreglos float32 y se usan como cota inferior en A*.
+No necesita coordenadas ni pesos parecidos a distancias
+"""
+
+from array import array
+import random
+import struct
+
+from grafo_csr import INF, como_csr, traducir_resultado
+from a_estrella import a_estrella_csr
+from delta_stepping import arbol_completo
+
+MAGICO = b'ALT1'
+CABECERA = struct.Struct('<4s32sqq')
+
+# Error relativo máximo al redondear a float32 (dos veces 2**-24, con margen)
+HOLGURA = 2.0 ** -22
+
+
+class PreprocesoALT:
+    """Tablas de distancias desde y hacia cada landmark"""
+
+    def __init__(self, huella, landmarks, dist_desde, dist_hasta):
+        self.huella = huella
+        self.landmarks = landmarks      # array('i') con los ids de los landmarks
+        self.dist_desde = dist_desde    # array('f') de k * n: d(L, v)
+        self.dist_hasta = dist_hasta    # array('f') de k * n: d(v, L)
+
+    @property
+    def num_nodos(self):
+        return len(self.dist_desde) // max(len(self.landmarks), 1)
+
+    def hacia(self, destino):
+        """Devuelve la cota h(v) <= d(v, destino) a partir de los landmarks"""
+        n = self.num_nodos
+        desde = self.dist_desde
+        hasta = self.dist_hasta
+
+        # Por landmark: (desplazamiento, d(L, destino), d(destino, L))
+        referencias = [(k * n, desde[k * n + destino], hasta[k * n + destino])
+                       for k in range(len(self.landmarks))]
+
+        def h(v):
+            mejor = 0.0
+            for base, desde_t, hasta_t in referencias:
+                desde_v = desde[base + v]
+                hasta_v = hasta[base + v]
+                # d(L, t) - d(L, v) <= d(v, t)
+                if desde_t != INF and desde_v != INF:
+                    cota = desde_t - desde_v - HOLGURA * (desde_t + desde_v)
+                    if cota > mejor:
+                        mejor = cota
+                # d(v, L) - d(t, L) <= d(v, t)
+                if hasta_v != INF and hasta_t != INF:
+                    cota = hasta_v - hasta_t - HOLGURA * (hasta_v + hasta_t)
+                    if cota > mejor:
+                        mejor = cota
+            return mejor
+
+        return h
+
+    def guardar(self, ruta):
+        """Guarda las tablas en disco junto con la huella del grafo"""
+        with open(ruta, 'wb') as archivo:
+            archivo.write(CABECERA.pack(MAGICO, self.huella, len(self.landmarks), self.num_nodos))
+            self.landmarks.tofile(archivo)
+            self.dist_desde.tofile(archivo)
+            self.dist_hasta.tofile(archivo)
+
+    @classmethod
+    def cargar(cls, ruta, grafo):
+        """Carga tablas guardadas; ValueError si fueron calculadas para otra versión del grafo"""
+        g = como_csr(grafo)
+        with open(ruta, 'rb') as archivo:
+            magico, huella, k, n = CABECERA.unpack(archivo.read(CABECERA.size))
+            if magico != MAGICO:
+                raise ValueError(f"{ruta} no es un archivo de landmarks ALT")
+            if huella != g.huella() or n != g.num_nodos:
+                raise ValueError(f"{ruta} corresponde a otra versión del grafo")
+
+            landmarks = array('i')
+            landmarks.fromfile(archivo, k)
+            dist_desde = array('f')
+            dist_desde.fromfile(archivo, k * n)
+            dist_hasta = array('f')
+            dist_hasta.fromfile(archivo, k * n)
+
+        return cls(huella, landmarks, dist_desde, dist_hasta)
+
+
+def _cota_desde_landmarks(dist_desde, n, num_landmarks, origen, v):
+    """Mejor cota inferior de d(origen, v) usando sólo las distancias desde los landmarks"""
+    mejor = 0.0
+    for k in range(num_landmarks):
+        a = dist_desde[k * n + v]
+        b = dist_desde[k * n + origen]
+        if a != INF and b != INF and a - b > mejor:
+            mejor = a - b
+    return mejor
+
+
+def _mas_lejano(n, dist_desde, elegidos):
+    """Nodo cuya distancia mínima desde los landmarks elegidos es la mayor"""
+    num_landmarks = len(dist_desde) // n
+    elegidos = set(elegidos)
+    mejor, mejor_distancia = -1, -1.0
+
+    # Los nodos inalcanzables tienen prioridad: cubren otra componente
+    for v in range(n):
+        if v in elegidos:
+            continue
+        minimo = min((dist_desde[k * n + v] for k in range(num_landmarks)), default=INF)
+        if minimo > mejor_distancia:
+            mejor, mejor_distancia = v, minimo
+    return mejor
+
+
+def _landmark_evitando(g, elegidos, dist_desde, generador):
+    """
+    Selección "avoid" de Goldberg y Harrelson: en el árbol de caminos mínimos
+    de una raíz aleatoria busca el subárbol peor cubierto por los landmarks actuales
+    """
+    n = g.num_nodos
+    raiz = generador.randrange(n)
+    distancias, previos, _ = arbol_completo(g, raiz)
+
+    # Peso de cada nodo: cuánto se equivoca la cota actual
+    alcanzados = [v for v in range(n) if distancias[v] != INF]
+    tamano = [0.0] * n
+    tiene_landmark = bytearray(n)
+    for v in alcanzados:
+        cota = _cota_desde_landmarks(dist_desde, n, len(elegidos), raiz, v)
+        tamano[v] = distancias[v] - cota
+    for landmark in elegidos:
+        tiene_landmark[landmark] = 1
+
+    # Acumular pesos de hijos a padres (de mayor a menor distancia)
+    hijos = [[] for _ in range(n)]
+    for v in sorted(alcanzados, key=lambda v: distancias[v], reverse=True):
+        padre = previos[v]
+        if padre != -1:
+            hijos[padre].append(v)
+            tamano[padre] += tamano[v]
+            if tiene_landmark[v]:
+                tiene_landmark[padre] = 1
+    for v in alcanzados:
+        if tiene_landmark[v]:
+            tamano[v] = 0.0
+
+    # Bajar desde el nodo de mayor tamaño hasta una hoja
+    actual = max(alcanzados, key=lambda v: tamano[v])
+    if tamano[actual] <= 0:
+        return _mas_lejano(n, dist_desde, elegidos)
+    while hijos[actual]:
+        actual = max(hijos[actual], key=lambda v: tamano[v])
+    return actual
+
+
+def seleccionar_landmarks(g, k, metodo='avoid', semilla=0):
+    """
+    Elige k landmarks con el método 'farthest' o 'avoid'
+    En ambos casos el primero es el nodo más lejano a una raíz aleatoria
+    """
+    if metodo not in ('farthest', 'avoid'):
+        raise ValueError(f"Método de selección desconocido: {metodo}")
+
+    n = g.num_nodos
+    k = min(k, n)
+    if k == 0:
+        return array('i')
+
+    generador = random.Random(semilla)
+    distancias, _, _ = arbol_completo(g, generador.randrange(n))
+    elegidos = [_mas_lejano(n, array('f', distancias), [])]
+    dist_desde = array('f')
+
+    while len(elegidos) < k:
+        distancias, _, _ = arbol_completo(g, elegidos[-1])
+        dist_desde.extend(array('f', distancias))
+
+        if metodo == 'farthest':
+            elegidos.append(_mas_lejano(n, dist_desde, elegidos))
+        else:
+            elegidos.append(_landmark_evitando(g, elegidos, dist_desde, generador))
+
+    return array('i', elegidos)
+
+
+def preprocesar_alt(grafo, num_landmarks=4, metodo='avoid', semilla=0):
+    """Elige los landmarks y calcula un árbol de Dijkstra completo por landmark en cada sentido"""
+    g = como_csr(grafo)
+    invertido = g.invertido()
+    landmarks = seleccionar_landmarks(g, num_landmarks, metodo, semilla)
+
+    dist_desde = array('f')
+    dist_hasta = array('f')
+    for landmark in landmarks:
+        distancias, _, _ = arbol_completo(g, landmark)
+        dist_desde.extend(array('f', distancias))
+        distancias, _, _ = arbol_completo(invertido, landmark)
+        dist_hasta.extend(array('f', distancias))
+
+    return PreprocesoALT(g.huella(), landmarks, dist_desde, dist_hasta)
+
+
+def dijkstra_alt(grafo, inicio, fin, preproceso):
+    """Consulta ALT con la misma salida que dijkstra(): (camino, distancia, distancias)"""
+    g = como_csr(grafo)
+    origen = g.id_de(inicio)
+    destino = g.id_de(fin)
+
+    _, camino_ids, distancias, _ = a_estrella_csr(g, origen, destino, preproceso.hacia(destino))
+    return traducir_resultado(g, camino_ids, distancias, destino)
@@ -0,0 +1,86 @@
+"""
+Consultas por lotes muchos-a-muchos
+Las consultas se agrupan por origen: se hace una sola búsqueda por origen
+distinto, que se detiene al asentar todos sus destinos, y los orígenes se
+reparten entre procesos cuando el lote es grande
+"""
+
+from array import array
+import os
+
+from grafo_csr import INF, como_csr, dijkstra_csr, reconstruir_camino
+from paralelo import mapear_en_procesos
+
+# Cantidad de orígenes distintos a partir de la cual conviene usar procesos
+UMBRAL_PARALELO = 64
+
+
+def _fila_distancias(g, origen, objetivos):
+    """Distancias desde origen a cada objetivo con una sola búsqueda"""
+    distancias, _, _ = dijkstra_csr(g, origen, objetivos=objetivos)
+    return array('d', (distancias[t] for t in objetivos))
+
+
+def _caminos_desde(g, origen, objetivos):
+    """(distancia, camino_ids) desde origen a cada objetivo con una sola búsqueda"""
+    distancias, previos, _ = dijkstra_csr(g, origen, objetivos=objetivos)
+    return [(distancias[t], reconstruir_camino(previos, t)) for t in objetivos]
+
+
+def _por_origen(g, funcion, grupos, procesos):
+    """Aplica funcion a cada (origen, objetivos), en paralelo si el lote lo justifica"""
+    tareas = list(grupos.items())
+    if procesos == 1 or len(tareas) < UMBRAL_PARALELO:
+        resultados = [funcion(g, origen, objetivos) for origen, objetivos in tareas]
+    else:
+        procesos = procesos or os.cpu_count()
+        tam_lote = max(1, len(tareas) // (4 * procesos))
+        resultados = list(mapear_en_procesos(g, funcion, tareas, procesos, tam_lote))
+    return dict(zip(grupos, resultados))
+
+
+def matriz_distancias_ids(g, origenes, destinos, procesos=None):
+    """
+    Matriz de distancias entre listas de ids
+    Devuelve una fila array('d') por cada elemento de origenes, alineada con destinos
+    """
+    objetivos = tuple(dict.fromkeys(destinos))
+    columna = {t: j for j, t in enumerate(objetivos)}
+    grupos = {origen: objetivos for origen in origenes}
+
+    filas = _por_origen(g, _fila_distancias, grupos, procesos)
+    return [array('d', (filas[origen][columna[t]] for t in destinos)) for origen in origenes]
+
+
+def matriz_distancias(grafo, inicios, fines, procesos=None):
+    """Matriz de distancias (lista de listas) entre etiquetas de nodos"""
+    g = como_csr(grafo)
+    origenes = [g.id_de(inicio) for inicio in inicios]
+    destinos = [g.id_de(fin) for fin in fines]
+    return [list(fila) for fila in matriz_distancias_ids(g, origenes, destinos, procesos)]
+
+
+def calcular_rutas(grafo, pares, procesos=None):
+    """
+    Calcula (camino, distancia) para cada par (inicio, fin)
+    Los pares que comparten origen se resuelven con una única búsqueda
+    """
+    g = como_csr(grafo)
+    pares_ids = [(g.id_de(inicio), g.id_de(fin)) for inicio, fin in pares]
+
+    # columnas[origen][destino] = posición del destino en la búsqueda de ese origen
+    columnas = {}
+    for origen, destino in pares_ids:
+        destinos = columnas.setdefault(origen, {})
+        destinos.setdefault(destino, len(destinos))
+    grupos = {origen: tuple(destinos) for origen, destinos in columnas.items()}
+
+    resultados = _por_origen(g, _caminos_desde, grupos, procesos)
+
+    rutas = []
+    for origen, destino in pares_ids:
+        distancia, camino_ids = resultados[origen][columnas[origen][destino]]
+        if distancia == INF:
+            camino_ids = [destino]
+        rutas.append(([g.etiquetas[i] for i in camino_ids], distancia))
+    return rutas
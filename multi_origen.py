@@ -0,0 +1,130 @@
+"""
+Búsqueda desde varios orígenes a la vez e instalación más cercana
+La cola se siembra con todos los orígenes (a distancia 0 o con un desfase
+propio de cada uno) y cada nodo hereda el origen desde el que se lo alcanzó:
+una sola búsqueda da, para todos los nodos, el origen más cercano, su
+distancia y el camino, es decir, la partición de Voronoi del grafo
+"""
+
+from array import array
+import heapq
+
+from grafo_csr import INF, como_csr, reconstruir_camino
+
+
+def dijkstra_multi_origen_csr(g, origenes, desfases=None, objetivos=None):
+    """
+    Dijkstra desde todos los ids de origenes a la vez
+    desfases: distancia inicial de cada origen (alineada con origenes), p. ej. un
+    costo fijo por almacén; si un id se repite vale el menor desfase
+    Se detiene al asentar todos los objetivos, si se indican
+    Devuelve (distancias, previos, fuentes): fuentes[v] es el id del origen más
+    cercano a v (-1 si no se alcanza) y reconstruir_camino(previos, v) va de él a v
+    """
+    n = g.num_nodos
+    desp = g.desplazamientos
+    dest = g.destinos
+    pesos = g.pesos
+
+    distancias = array('d', [INF]) * n
+    previos = array('i', [-1]) * n
+    fuentes = array('i', [-1]) * n
+    visitados = bytearray(n)
+
+    if desfases is None:
+        desfases = [0.0] * len(origenes)
+    elif len(desfases) != len(origenes):
+        raise ValueError("Se necesita un desfase por origen")
+    cola = []
+    for origen, desfase in zip(origenes, desfases):
+        if desfase < distancias[origen]:
+            distancias[origen] = desfase
+            fuentes[origen] = origen
+            cola.append((desfase, origen))
+    heapq.heapify(cola)
+
+    marcados = None
+    if objetivos is not None:
+        marcados = bytearray(n)
+        for t in objetivos:
+            marcados[t] = 1
+        pendientes = sum(marcados)
+
+    heappop = heapq.heappop
+    heappush = heapq.heappush
+
+    while cola:
+        distancia_actual, u = heappop(cola)
+
+        if visitados[u]:
+            continue
+        visitados[u] = 1
+
+        if marcados is not None and marcados[u]:
+            pendientes -= 1
+            if pendientes == 0:
+                break
+
+        fuente = fuentes[u]
+        for i in range(desp[u], desp[u + 1]):
+            v = dest[i]
+            if not visitados[v]:
+                nueva_distancia = distancia_actual + pesos[i]
+
+                if nueva_distancia < distancias[v]:
+                    distancias[v] = nueva_distancia
+                    previos[v] = u
+                    fuentes[v] = fuente
+                    heappush(cola, (nueva_distancia, v))
+
+    return distancias, previos, fuentes
+
+
+def _ids_origenes(g, origenes, desfases):
+    """Ids de los orígenes y sus desfases, aceptando un diccionario {origen: desfase}"""
+    if isinstance(desfases, dict):
+        desfases = [desfases.get(origen, 0.0) for origen in origenes]
+    return [g.id_de(origen) for origen in origenes], desfases
+
+
+def origen_mas_cercano(grafo, origenes, desfases=None):
+    """
+    {nodo: (origen más cercano, distancia)} para todos los nodos alcanzables
+    desfases: lista alineada con origenes o diccionario {origen: desfase}
+    """
+    g = como_csr(grafo)
+    ids, desfases = _ids_origenes(g, origenes, desfases)
+    distancias, _, fuentes = dijkstra_multi_origen_csr(g, ids, desfases)
+    etiquetas = g.etiquetas
+    return {etiquetas[v]: (etiquetas[fuentes[v]], distancias[v])
+            for v in range(g.num_nodos) if fuentes[v] != -1}
+
+
+def instalacion_mas_cercana(grafo, instalaciones, clientes, desfases=None):
+    """
+    Para cada cliente, (instalación más cercana, distancia, camino desde ella)
+    con una sola búsqueda, que termina al alcanzar al último cliente
+    Los clientes inalcanzables quedan como (None, inf, [])
+    """
+    g = como_csr(grafo)
+    ids, desfases = _ids_origenes(g, instalaciones, desfases)
+    objetivos = [g.id_de(cliente) for cliente in clientes]
+    distancias, previos, fuentes = dijkstra_multi_origen_csr(g, ids, desfases, objetivos)
+
+    etiquetas = g.etiquetas
+    resultado = {}
+    for cliente, v in zip(clientes, objetivos):
+        if fuentes[v] == -1:
+            resultado[cliente] = (None, INF, [])
+        else:
+            camino = [etiquetas[i] for i in reconstruir_camino(previos, v)]
+            resultado[cliente] = (etiquetas[fuentes[v]], distancias[v], camino)
+    return resultado
+
+
+def particion_voronoi(grafo, origenes, desfases=None):
+    """{origen: [nodos cuyo origen más cercano es él]}; los inalcanzables no aparecen"""
+    regiones = {origen: [] for origen in origenes}
+    for nodo, (origen, _) in origen_mas_cercano(grafo, origenes, desfases).items():
+        regiones[origen].append(nodo)
+    return regiones
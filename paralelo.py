@@ -0,0 +1,51 @@
+"""
+Utilidades para repartir trabajo sobre un mismo grafo entre varios procesos
+El grafo se envía una sola vez a cada proceso trabajador
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+_grafo_trabajador = None
+
+
+def _inicializar_trabajador(g):
+    global _grafo_trabajador
+    _grafo_trabajador = g
+
+
+def _ejecutar_tarea(tarea):
+    funcion, argumentos = tarea
+    return funcion(_grafo_trabajador, *argumentos)
+
+
+def mapear_en_procesos(g, funcion, tareas, procesos=None, tam_lote=1):
+    """
+    Ejecuta funcion(g, *argumentos) para cada tupla de argumentos en un pool de procesos
+    Los resultados se devuelven en el mismo orden que las tareas
+    La función debe estar definida a nivel de módulo para poder enviarse a los procesos
+    """
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_trabajador,
+                             initargs=(g,)) as ejecutor:
+        yield from ejecutor.map(_ejecutar_tarea, ((funcion, argumentos) for argumentos in tareas),
+                                chunksize=tam_lote)
+
+
+def mapear_en_flujo(g, funcion, tareas, procesos=None, en_vuelo=None):
+    """
+    Como mapear_en_procesos, pero consume las tareas a medida que avanza:
+    nunca hay más de en_vuelo tareas pendientes, por lo que sirve para flujos
+    sin fin (p. ej. la entrada estándar). Los resultados salen en orden
+    """
+    procesos = procesos or os.cpu_count() or 1
+    en_vuelo = en_vuelo or 2 * procesos
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_trabajador,
+                             initargs=(g,)) as ejecutor:
+        pendientes = deque()
+        for argumentos in tareas:
+            pendientes.append(ejecutor.submit(_ejecutar_tarea, (funcion, argumentos)))
+            if len(pendientes) >= en_vuelo:
+                yield pendientes.popleft().result()
+        while pendientes:
+            yield pendientes.popleft().result()
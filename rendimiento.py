@@ -0,0 +1,363 @@
+"""
+Banco de pruebas de rendimiento de los motores de caminos mínimos
+Genera grafos sintéticos con semilla (rejilla, geométrico aleatorio y vial
+plano), mide tiempo de reloj y pico de memoria (tracemalloc) de cada motor en
+tres cargas (punto a punto, uno a todos y muchos a muchos), guarda los
+resultados en JSON y compara dos archivos marcando las regresiones
+
+Uso:
+    python rendimiento.py correr --generador rejilla vial --nodos 10000 100000 -o base.json
+    python rendimiento.py comparar base.json nuevo.json --umbral 0.10
+"""
+
+import argparse
+from datetime import datetime
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from grafo_csr import dijkstra_csr
+from carga_grafos import desde_aristas
+from a_estrella import HeuristicaEuclidiana, a_estrella_csr
+from colas_prioridad import dijkstra_cola
+from delta_stepping import delta_stepping_csr
+from dijkstra_bidireccional import dijkstra_bidireccional_csr
+from jerarquias_contraccion import JerarquiaContraccion
+from landmarks_alt import preprocesar_alt
+from matriz_distancias import matriz_distancias_ids
+
+# Separación media entre nodos vecinos, en metros (los pesos son metros enteros)
+CUADRA = 100
+# Nodos por encima de los cuales no se preprocesa la jerarquía de contracción (lenta)
+MAX_NODOS_CH = 20000
+
+
+# --- Generadores: devuelven (GrafoCSR, xs, ys) con etiquetas range(n) ---
+
+def _ambos_sentidos(u, v, pesos):
+    return np.concatenate((u, v)), np.concatenate((v, u)), np.concatenate((pesos, pesos))
+
+
+def _aristas_rejilla(lado):
+    """Pares (u, v) horizontales y verticales de una rejilla lado x lado"""
+    ids = np.arange(lado * lado, dtype=np.int64).reshape(lado, lado)
+    u = np.concatenate((ids[:, :-1].ravel(), ids[:-1, :].ravel()))
+    v = np.concatenate((ids[:, 1:].ravel(), ids[1:, :].ravel()))
+    return u, v
+
+
+def generar_rejilla(n, semilla=0):
+    """Rejilla cuadrada de calles de doble sentido con pesos de 1 a 2 cuadras"""
+    generador = np.random.default_rng(semilla)
+    lado = max(2, math.isqrt(n - 1) + 1)
+    u, v = _aristas_rejilla(lado)
+    pesos = np.round(CUADRA * generador.uniform(1, 2, len(u)))
+    filas, columnas = np.divmod(np.arange(lado * lado), lado)
+    return (desde_aristas(lado * lado, *_ambos_sentidos(u, v, pesos)),
+            columnas * float(CUADRA), filas * float(CUADRA))
+
+
+def generar_geometrico(n, semilla=0, grado=6, tam_lote=1 << 20):
+    """
+    Grafo geométrico aleatorio: n puntos uniformes con densidad de uno por
+    cuadra² unidos si están a menos del radio que da el grado medio pedido.
+    Los pares se buscan en celdas del tamaño del radio, por lotes de puntos
+    """
+    generador = np.random.default_rng(semilla)
+    lado = CUADRA * math.sqrt(n)
+    xs = generador.uniform(0, lado, n)
+    ys = generador.uniform(0, lado, n)
+    radio = CUADRA * math.sqrt(grado / math.pi)
+
+    celdas_lado = max(1, int(lado / radio))
+    cx = np.minimum((xs / radio).astype(np.int64), celdas_lado - 1)
+    cy = np.minimum((ys / radio).astype(np.int64), celdas_lado - 1)
+    celda = cx * celdas_lado + cy
+    orden = np.argsort(celda, kind='stable')
+    inicio_celda = np.searchsorted(celda[orden], np.arange(celdas_lado * celdas_lado + 1))
+
+    partes_u, partes_v = [], []
+    # Celdas vecinas "hacia adelante": cada par de celdas se revisa una sola vez
+    for dx, dy in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):
+        for desde in range(0, n, tam_lote):
+            puntos = np.arange(desde, min(n, desde + tam_lote))
+            ox, oy = cx[puntos] + dx, cy[puntos] + dy
+            valida = (ox < celdas_lado) & (oy >= 0) & (oy < celdas_lado)
+            puntos, otra = puntos[valida], (ox * celdas_lado + oy)[valida]
+            cuentas = inicio_celda[otra + 1] - inicio_celda[otra]
+            u = np.repeat(puntos, cuentas)
+            base = np.repeat(inicio_celda[otra] - (np.cumsum(cuentas) - cuentas), cuentas)
+            v = orden[base + np.arange(len(u))]
+            cerca = np.hypot(xs[u] - xs[v], ys[u] - ys[v]) < radio
+            if dx == 0 and dy == 0:
+                cerca &= u < v
+            partes_u.append(u[cerca])
+            partes_v.append(v[cerca])
+
+    u, v = np.concatenate(partes_u), np.concatenate(partes_v)
+    pesos = np.maximum(1.0, np.ceil(np.hypot(xs[u] - xs[v], ys[u] - ys[v])))
+    return desde_aristas(n, *_ambos_sentidos(u, v, pesos)), xs, ys
+
+
+def generar_vial(n, semilla=0, cada_avenida=10):
+    """
+    Red vial plana: rejilla con nodos desplazados, un 15 % de calles cortadas,
+    un 10 % de calles de un solo sentido y avenidas rápidas cada cierta
+    cantidad de cuadras. El peso es el largo en metros dividido por la velocidad
+    relativa (las avenidas valen 0.6 del largo)
+    """
+    generador = np.random.default_rng(semilla)
+    lado = max(2, math.isqrt(n - 1) + 1)
+    filas, columnas = np.divmod(np.arange(lado * lado), lado)
+    xs = (columnas + generador.uniform(-0.3, 0.3, lado * lado)) * CUADRA
+    ys = (filas + generador.uniform(-0.3, 0.3, lado * lado)) * CUADRA
+
+    u, v = _aristas_rejilla(lado)
+    avenida = (((filas[u] == filas[v]) & (filas[u] % cada_avenida == 0)) |
+               ((columnas[u] == columnas[v]) & (columnas[u] % cada_avenida == 0)))
+    sorteo = generador.random(len(u))
+    cortada = (sorteo < 0.15) & ~avenida
+    u, v, avenida, sorteo = u[~cortada], v[~cortada], avenida[~cortada], sorteo[~cortada]
+
+    largo = np.hypot(xs[u] - xs[v], ys[u] - ys[v])
+    pesos = np.maximum(1.0, np.ceil(largo * np.where(avenida, 0.6, 1.0)))
+    un_sentido = (sorteo >= 0.15) & (sorteo < 0.25) & ~avenida
+    vuelta = ~un_sentido
+    origenes = np.concatenate((u, v[vuelta]))
+    destinos = np.concatenate((v, u[vuelta]))
+    return desde_aristas(lado * lado, origenes, destinos, np.concatenate((pesos, pesos[vuelta]))), xs, ys
+
+
+GENERADORES = {
+    'rejilla': generar_rejilla,
+    'geometrico': generar_geometrico,
+    'vial': generar_vial,
+}
+
+
+# --- Motores: preparar(g, xs, ys) devuelve la función que ejecuta la carga ---
+
+def _motores_punto_a_punto(g, xs, ys):
+    """{motor: (preparar, consulta(origen, destino))}; la preparación se mide aparte"""
+    def euclidiana():
+        return HeuristicaEuclidiana(g, dict(zip(range(g.num_nodos), zip(xs, ys))))
+
+    motores = {
+        'dijkstra': (None, lambda _, o, d: dijkstra_csr(g, o, d)),
+        'bidireccional': (None, lambda _, o, d: dijkstra_bidireccional_csr(g, o, d)),
+        'a_estrella': (euclidiana, lambda h, o, d: a_estrella_csr(g, o, d, h.hacia(d))),
+        'alt': (lambda: preprocesar_alt(g, num_landmarks=8),
+                lambda p, o, d: a_estrella_csr(g, o, d, p.hacia(d))),
+        'cola_dial': (None, lambda _, o, d: dijkstra_cola(g, o, d, cola='dial')),
+        'cola_radix': (None, lambda _, o, d: dijkstra_cola(g, o, d, cola='radix')),
+    }
+    if g.num_nodos <= MAX_NODOS_CH:
+        motores['ch'] = (lambda: JerarquiaContraccion.preprocesar(g),
+                         lambda j, o, d: j.consulta_ids(o, d))
+    return motores
+
+
+def _cargas(g, xs, ys, semilla, consultas, origenes, matriz):
+    """
+    [(carga, motor, preparar o None, ejecutar(preparado))] con los pares,
+    orígenes y conjuntos elegidos con la semilla, iguales para todos los motores
+    """
+    generador = np.random.default_rng(semilla + 1)
+    n = g.num_nodos
+    pares = generador.integers(0, n, size=(consultas, 2)).tolist()
+    raices = generador.integers(0, n, size=origenes).tolist()
+    fuentes = generador.integers(0, n, size=matriz).tolist()
+    sumideros = generador.integers(0, n, size=matriz).tolist()
+
+    cargas = []
+    for motor, (preparar, consulta) in _motores_punto_a_punto(g, xs, ys).items():
+        def ejecutar(preparado, consulta=consulta):
+            for origen, destino in pares:
+                consulta(preparado, origen, destino)
+        cargas.append(('punto_a_punto', motor, preparar, ejecutar))
+
+    def por_raiz(arbol):
+        # Los resultados se descartan: la memoria medida es la de una búsqueda a la vez
+        def ejecutar(_):
+            for raiz in raices:
+                arbol(raiz)
+        return ejecutar
+
+    def por_par(_):
+        for fuente in fuentes:
+            for sumidero in sumideros:
+                dijkstra_csr(g, fuente, sumidero)
+
+    cargas += [
+        ('uno_a_todos', 'dijkstra', None, por_raiz(lambda r: dijkstra_csr(g, r))),
+        ('uno_a_todos', 'delta_stepping', None, por_raiz(lambda r: delta_stepping_csr(g, r))),
+        ('uno_a_todos', 'cola_dial', None, por_raiz(lambda r: dijkstra_cola(g, r, cola='dial'))),
+        ('muchos_a_muchos', 'por_par', None, por_par),
+        ('muchos_a_muchos', 'agrupado', None,
+         lambda _: matriz_distancias_ids(g, fuentes, sumideros, procesos=1)),
+    ]
+    return cargas, {'punto_a_punto': consultas, 'uno_a_todos': origenes,
+                    'muchos_a_muchos': matriz * matriz}
+
+
+def _medir(funcion, argumento, repeticiones, memoria=True):
+    """
+    (mediana y mínimo de segundos, pico de memoria en bytes de una ejecución
+    aparte o None si memoria=False)
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(argumento)
+        tiempos.append(time.perf_counter() - inicio)
+    if not memoria:
+        return statistics.median(tiempos), min(tiempos), None
+
+    # tracemalloc hace más lento el código: la memoria se mide en otra ejecución
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        funcion(argumento)
+        pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return statistics.median(tiempos), min(tiempos), pico
+
+
+def correr(generadores, tamanos, semilla=0, repeticiones=3, consultas=100, origenes=3,
+           matriz=20, motores=None, memoria=True, informar=print):
+    """
+    Ejecuta todas las combinaciones y devuelve el diccionario de resultados
+    Con memoria=False no se hace la ejecución extra bajo tracemalloc
+    """
+    resultados = []
+    grafos = []
+    for nombre in generadores:
+        for tamano in tamanos:
+            inicio = time.perf_counter()
+            g, xs, ys = GENERADORES[nombre](tamano, semilla)
+            grafos.append({'generador': nombre, 'nodos_pedidos': tamano, 'nodos': g.num_nodos,
+                           'aristas': g.num_aristas,
+                           'segundos_generacion': time.perf_counter() - inicio})
+            informar(f"{nombre} {g.num_nodos} nodos, {g.num_aristas} aristas")
+
+            cargas, cantidades = _cargas(g, xs, ys, semilla, consultas, origenes, matriz)
+            for carga, motor, preparar, ejecutar in cargas:
+                if motores and motor not in motores:
+                    continue
+                base = {'generador': nombre, 'nodos': tamano, 'motor': motor}
+                preparado = None
+                if preparar is not None:
+                    preparados = []
+                    medicion = _medir(lambda _: preparados.append(preparar()), None, 1, memoria)
+                    resultados.append(_resultado(base, 'preproceso', medicion, 1, informar))
+                    preparado = preparados[0]
+                    del preparados[1:]
+                medicion = _medir(ejecutar, preparado, repeticiones, memoria)
+                resultados.append(_resultado(base, carga, medicion, cantidades[carga], informar))
+
+    return {
+        'meta': {'fecha': datetime.now().isoformat(timespec='seconds'),
+                 'python': platform.python_version(), 'plataforma': platform.platform(),
+                 'semilla': semilla, 'repeticiones': repeticiones},
+        'grafos': grafos,
+        'resultados': resultados,
+    }
+
+
+def _resultado(base, carga, medicion, operaciones, informar):
+    mediana, minimo, pico = medicion
+    informar(f"  {carga:16s} {base['motor']:15s} {mediana:9.4f} s  " +
+             (f"{pico / 1e6:8.2f} MB" if pico is not None else ""))
+    return dict(base, carga=carga, segundos=mediana, segundos_min=minimo,
+                memoria_pico_bytes=pico, operaciones=operaciones)
+
+
+def _clave(resultado):
+    return (resultado['generador'], resultado['nodos'], resultado['carga'], resultado['motor'])
+
+
+def comparar(base, nuevo, umbral=0.10):
+    """
+    [(clave, métrica, valor base, valor nuevo, cambio relativo, es_regresión)] de
+    las mediciones presentes en ambos; regresión si empeora más que el umbral
+    """
+    anteriores = {_clave(r): r for r in base['resultados']}
+    filas = []
+    for resultado in nuevo['resultados']:
+        anterior = anteriores.get(_clave(resultado))
+        if anterior is None:
+            continue
+        for metrica in ('segundos', 'memoria_pico_bytes'):
+            antes, ahora = anterior[metrica], resultado[metrica]
+            if antes is None or ahora is None:
+                continue
+            cambio = (ahora - antes) / antes if antes else 0.0
+            filas.append((_clave(resultado), metrica, antes, ahora, cambio, cambio > umbral))
+    return filas
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Banco de pruebas de rendimiento")
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    correr_cmd = subcomandos.add_parser('correr', help="medir y guardar los resultados en JSON")
+    correr_cmd.add_argument('--generador', nargs='+', default=['rejilla'],
+                            choices=list(GENERADORES))
+    correr_cmd.add_argument('--nodos', nargs='+', type=int, default=[1000])
+    correr_cmd.add_argument('--semilla', type=int, default=0)
+    correr_cmd.add_argument('--repeticiones', type=int, default=3)
+    correr_cmd.add_argument('--consultas', type=int, default=100,
+                            help="pares de la carga punto a punto")
+    correr_cmd.add_argument('--origenes', type=int, default=3,
+                            help="árboles completos de la carga uno a todos")
+    correr_cmd.add_argument('--matriz', type=int, default=20,
+                            help="orígenes y destinos de la carga muchos a muchos")
+    correr_cmd.add_argument('--motores', nargs='+', help="medir sólo estos motores")
+    correr_cmd.add_argument('--sin-memoria', action='store_true',
+                            help="no medir el pico de memoria (evita una ejecución extra)")
+    correr_cmd.add_argument('-o', '--salida', default='resultados_rendimiento.json')
+
+    comparar_cmd = subcomandos.add_parser('comparar', help="comparar dos archivos de resultados")
+    comparar_cmd.add_argument('base')
+    comparar_cmd.add_argument('nuevo')
+    comparar_cmd.add_argument('--umbral', type=float, default=0.10,
+                              help="empeoramiento relativo tolerado (0.10 = 10 %%)")
+
+    opciones = parser.parse_args(argumentos)
+
+    if opciones.comando == 'correr':
+        resultados = correr(opciones.generador, opciones.nodos, opciones.semilla,
+                            opciones.repeticiones, opciones.consultas, opciones.origenes,
+                            opciones.matriz, opciones.motores, not opciones.sin_memoria)
+        with open(opciones.salida, 'w', encoding='utf-8') as archivo:
+            json.dump(resultados, archivo, indent=2, ensure_ascii=False)
+        print(f"\nResultados guardados en {opciones.salida}")
+        return 0
+
+    with open(opciones.base, encoding='utf-8') as archivo:
+        base = json.load(archivo)
+    with open(opciones.nuevo, encoding='utf-8') as archivo:
+        nuevo = json.load(archivo)
+    filas = comparar(base, nuevo, opciones.umbral)
+    regresiones = 0
+    for (generador, nodos, carga, motor), metrica, antes, ahora, cambio, regresion in filas:
+        marca = '❌ REGRESIÓN' if regresion else ''
+        print(f"{generador:10s} {nodos:>9} {carga:16s} {motor:15s} {metrica:18s} "
+              f"{antes:14.4f} → {ahora:14.4f} ({cambio:+7.1%}) {marca}")
+        regresiones += regresion
+    if regresiones:
+        print(f"\n❌ {regresiones} mediciones empeoraron más de {opciones.umbral:.0%}")
+        return 1
+    print(f"\n✅ Ninguna medición empeoró más de {opciones.umbral:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
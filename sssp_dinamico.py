@@ -0,0 +1,137 @@
+"""
+Mantenimiento incremental de un árbol de caminos mínimos
+Cuando cambian algunos pesos (tráfico) el árbol se repara al estilo de
+Ramalingam y Reps: sólo se recalculan los subárboles afectados por aumentos
+y los nodos que mejoran por disminuciones, en lugar de repetir Dijkstra
+"""
+
+import heapq
+
+from grafo_csr import INF, como_csr, reconstruir_camino
+from delta_stepping import arbol_completo
+
+
+def _peso(g, u, v):
+    """Menor peso entre las aristas u -> v"""
+    return min(g.pesos[i] for i in range(g.desplazamientos[u], g.desplazamientos[u + 1])
+               if g.destinos[i] == v)
+
+
+def aplicar_pesos(g, actualizaciones):
+    """
+    Aplica una lista de (u, v, nuevo_peso) sobre ids al grafo
+    Devuelve {(u, v): peso_anterior} con el peso previo a todo el lote
+    """
+    originales = {}
+    for u, v, peso in actualizaciones:
+        if (u, v) not in originales:
+            originales[(u, v)] = _peso(g, u, v)
+        g.actualizar_peso(u, v, peso)
+    return originales
+
+
+def _subarbol(g, previos, raiz):
+    """Nodos del subárbol de raiz, recorriendo sólo aristas del árbol"""
+    previos[raiz] = -2  # marca temporal para no visitarlo dos veces
+    nodos = [raiz]
+    pila = [raiz]
+    while pila:
+        u = pila.pop()
+        for i in range(g.desplazamientos[u], g.desplazamientos[u + 1]):
+            v = g.destinos[i]
+            if previos[v] == u:
+                previos[v] = -2
+                nodos.append(v)
+                pila.append(v)
+    return nodos
+
+
+def reparar_arbol(g, distancias, previos, originales):
+    """
+    Repara en el lugar un árbol (distancias, previos) tras los cambios de peso
+    descritos por {(u, v): peso_anterior}, ya aplicados al grafo
+    Devuelve la cantidad de nodos cuya distancia se recalculó
+    """
+    # Primero los aumentos en aristas del árbol: todo el subárbol queda sin distancia
+    afectados = []
+    for (u, v), anterior in originales.items():
+        if _peso(g, u, v) > anterior and previos[v] == u:
+            afectados.extend(_subarbol(g, previos, v))
+
+    for x in afectados:
+        distancias[x] = INF
+        previos[x] = -1
+
+    # Luego las disminuciones que mejoran a su extremo
+    cola = []
+    for (u, v), anterior in originales.items():
+        actual = _peso(g, u, v)
+        if actual < anterior and distancias[u] + actual < distancias[v]:
+            distancias[v] = distancias[u] + actual
+            previos[v] = u
+            heapq.heappush(cola, (distancias[v], v))
+
+    # Cada nodo afectado toma la mejor arista entrante desde fuera del subárbol
+    invertido = g.invertido()
+    for x in afectados:
+        for i in range(invertido.desplazamientos[x], invertido.desplazamientos[x + 1]):
+            y = invertido.destinos[i]
+            candidata = distancias[y] + invertido.pesos[i]
+            if candidata < distancias[x]:
+                distancias[x] = candidata
+                previos[x] = y
+        if distancias[x] != INF:
+            heapq.heappush(cola, (distancias[x], x))
+
+    # Propagar las distancias nuevas como en Dijkstra
+    tocados = set(afectados)
+    while cola:
+        distancia_actual, u = heapq.heappop(cola)
+        if distancia_actual > distancias[u]:
+            continue
+        tocados.add(u)
+        for i in range(g.desplazamientos[u], g.desplazamientos[u + 1]):
+            v = g.destinos[i]
+            nueva_distancia = distancia_actual + g.pesos[i]
+            if nueva_distancia < distancias[v]:
+                distancias[v] = nueva_distancia
+                previos[v] = u
+                heapq.heappush(cola, (nueva_distancia, v))
+
+    return len(tocados)
+
+
+class ArbolDinamico:
+    """Árbol de caminos mínimos desde un origen que se repara ante cambios de peso"""
+
+    def __init__(self, grafo, origen):
+        self.g = como_csr(grafo)
+        self.origen = origen
+        self.distancias, self.previos, _ = arbol_completo(self.g, origen)
+        self.nodos_tocados = 0  # nodos recalculados en la última reparación
+
+    def reparar(self, originales):
+        """Repara el árbol tras cambios ya aplicados al grafo ({(u, v): peso_anterior})"""
+        self.nodos_tocados = reparar_arbol(self.g, self.distancias, self.previos, originales)
+        return self.nodos_tocados
+
+    def aplicar_actualizaciones(self, actualizaciones):
+        """
+        Aplica una lista de (u, v, nuevo_peso) sobre ids y repara el árbol
+        Devuelve la cantidad de nodos cuya distancia se recalculó
+        """
+        return self.reparar(aplicar_pesos(self.g, actualizaciones))
+
+    def consulta_ids(self, destino):
+        """Devuelve (distancia, camino_ids) desde el origen hasta destino"""
+        if self.distancias[destino] == INF:
+            return INF, [destino]
+        return self.distancias[destino], reconstruir_camino(self.previos, destino)
+
+
+def actualizar_arboles(arboles, actualizaciones):
+    """Aplica un lote de cambios una sola vez al grafo compartido y repara todos los árboles"""
+    if not arboles:
+        return 0
+    originales = aplicar_pesos(arboles[0].g, actualizaciones)
+    return sum(arbol.reparar(originales) for arbol in arboles)
@@ -0,0 +1,158 @@
+"""
+Tablas precalculadas de distancias y siguiente salto para todos los pares
+Se guardan en un archivo que se abre con numpy.memmap, de modo que varios
+procesos comparten las mismas páginas y la apertura es instantánea
+"""
+
+import struct
+
+import numpy as np
+
+from grafo_csr import como_csr, dijkstra_csr
+
+MAGICO = b'APSP'
+CABECERA = struct.Struct('<4s32sqB19x')  # 64 bytes, alinea las matrices
+
+# Por encima de esta densidad (aristas / n²) se usa Floyd–Warshall vectorizado
+DENSIDAD_FLOYD = 0.25
+MAX_NODOS_FLOYD = 2000
+
+
+def _tipo_salto(n):
+    """Tipo entero más pequeño que guarda los ids más un valor centinela"""
+    return np.uint16 if n < np.iinfo(np.uint16).max else np.uint32
+
+
+def _primer_salto(origen, previos, distancias, sin_salto):
+    """Para cada destino, el nodo que sigue al origen en su camino mínimo"""
+    previos = np.asarray(previos, dtype=np.int64)
+    alcanzable = np.isfinite(distancias)
+    saltos = np.full(len(previos), -1, dtype=np.int64)
+
+    hijos_directos = previos == origen
+    saltos[hijos_directos] = np.nonzero(hijos_directos)[0]
+    saltos[origen] = origen
+
+    # Cada pasada resuelve un nivel más del árbol de caminos mínimos
+    pendientes = np.nonzero(alcanzable & (saltos == -1))[0]
+    while len(pendientes):
+        saltos[pendientes] = saltos[previos[pendientes]]
+        pendientes = pendientes[saltos[pendientes] == -1]
+
+    saltos[~alcanzable] = sin_salto
+    return saltos
+
+
+def _floyd_warshall(g):
+    """Floyd–Warshall vectorizado con NumPy; devuelve (distancias, siguientes)"""
+    n = g.num_nodos
+    distancias = np.full((n, n), np.inf)
+    siguientes = np.full((n, n), -1, dtype=np.int64)
+    np.fill_diagonal(distancias, 0.0)
+    np.fill_diagonal(siguientes, np.arange(n))
+
+    for u in range(n):
+        for v, peso in g.vecinos(u):
+            if peso < distancias[u, v]:
+                distancias[u, v] = peso
+                siguientes[u, v] = v
+
+    for k in range(n):
+        por_k = distancias[:, k, None] + distancias[None, k, :]
+        mejora = por_k < distancias
+        distancias = np.where(mejora, por_k, distancias)
+        siguientes = np.where(mejora, siguientes[:, k, None], siguientes)
+
+    return distancias, siguientes
+
+
+class TablasTodosPares:
+    """Matrices de distancias (float32) y siguiente salto (uint16/uint32)"""
+
+    def __init__(self, etiquetas, distancias, siguientes):
+        self.etiquetas = etiquetas
+        self.indices = {nodo: i for i, nodo in enumerate(etiquetas)}
+        self.distancias = distancias
+        self.siguientes = siguientes
+        self.sin_salto = np.iinfo(siguientes.dtype).max
+
+    @classmethod
+    def abrir(cls, ruta, grafo):
+        """Abre las tablas con numpy.memmap; ValueError si son de otra versión del grafo"""
+        g = como_csr(grafo)
+        with open(ruta, 'rb') as archivo:
+            magico, huella, n, ancho = CABECERA.unpack(archivo.read(CABECERA.size))
+        if magico != MAGICO:
+            raise ValueError(f"{ruta} no es un archivo de tablas de todos los pares")
+        if huella != g.huella() or n != g.num_nodos:
+            raise ValueError(f"{ruta} corresponde a otra versión del grafo")
+
+        tipo = np.uint16 if ancho == 2 else np.uint32
+        distancias = np.memmap(ruta, dtype=np.float32, mode='r',
+                               offset=CABECERA.size, shape=(n, n))
+        siguientes = np.memmap(ruta, dtype=tipo, mode='r',
+                               offset=CABECERA.size + 4 * n * n, shape=(n, n))
+        return cls(g.etiquetas, distancias, siguientes)
+
+    def distancia_ids(self, origen, destino):
+        return float(self.distancias[origen, destino])
+
+    def camino_ids(self, origen, destino):
+        """Recorre la tabla de siguiente salto; lista vacía si no hay camino"""
+        if self.siguientes[origen, destino] == self.sin_salto:
+            return []
+        camino = [origen]
+        nodo = origen
+        while nodo != destino:
+            nodo = int(self.siguientes[nodo, destino])
+            camino.append(nodo)
+        return camino
+
+    def consulta(self, inicio, fin):
+        """Devuelve (camino, distancia) entre dos etiquetas en O(largo del camino)"""
+        origen = self.indices[inicio]
+        destino = self.indices[fin]
+        camino = self.camino_ids(origen, destino) or [destino]
+        return [self.etiquetas[i] for i in camino], self.distancia_ids(origen, destino)
+
+
+def precalcular_tablas(grafo, ruta, metodo='auto'):
+    """
+    Calcula las tablas de todos los pares y las escribe en ruta
+    metodo: 'dijkstra' (una búsqueda por nodo), 'floyd' (denso) o 'auto'
+    """
+    g = como_csr(grafo)
+    n = g.num_nodos
+    if metodo == 'auto':
+        denso = g.num_aristas > DENSIDAD_FLOYD * n * n and n <= MAX_NODOS_FLOYD
+        metodo = 'floyd' if denso else 'dijkstra'
+    if metodo not in ('dijkstra', 'floyd'):
+        raise ValueError(f"Método desconocido: {metodo}")
+
+    tipo = _tipo_salto(n)
+    sin_salto = np.iinfo(tipo).max
+    with open(ruta, 'wb') as archivo:
+        archivo.write(CABECERA.pack(MAGICO, g.huella(), n, np.dtype(tipo).itemsize))
+        archivo.truncate(CABECERA.size + (4 + np.dtype(tipo).itemsize) * n * n)
+
+    distancias = np.memmap(ruta, dtype=np.float32, mode='r+',
+                           offset=CABECERA.size, shape=(n, n))
+    siguientes = np.memmap(ruta, dtype=tipo, mode='r+',
+                           offset=CABECERA.size + 4 * n * n, shape=(n, n))
+
+    if metodo == 'floyd':
+        todas, saltos = _floyd_warshall(g)
+        distancias[:] = todas
+        siguientes[:] = np.where(saltos >= 0, saltos, sin_salto)
+    else:
+        # Fila a fila, sin tener nunca la matriz completa en float64
+        for origen in range(n):
+            fila, previos, _ = dijkstra_csr(g, origen)
+            fila = np.frombuffer(fila, dtype=np.float64)
+            distancias[origen] = fila
+            siguientes[origen] = _primer_salto(origen, previos, fila, sin_salto)
+
+    distancias.flush()
+    siguientes.flush()
+    del distancias, siguientes
+    return TablasTodosPares.abrir(ruta, g)
@@ -4,6 +4,31 @@ Ejecuta varios casos de prueba predefinidos
 """
 
 import heapq
+import json
+import os
+import random
+import tempfile
+
+from grafo_csr import (GrafoCSR, dijkstra as dijkstra_csr, dijkstra_csr as dijkstra_csr_ids,
+                       reconstruir_camino)
+from colas_prioridad import COLAS, dijkstra_cola
+from dijkstra_bidireccional import dijkstra_bidireccional
+from a_estrella import HeuristicaEuclidiana, a_estrella
+from landmarks_alt import preprocesar_alt, dijkstra_alt
+from jerarquias_contraccion import JerarquiaContraccion, dijkstra_ch
+from matriz_distancias import calcular_rutas
+from tablas_todos_pares import precalcular_tablas
+from cache_arboles import CacheArboles
+from sssp_dinamico import ArbolDinamico, actualizar_arboles
+from consultas_lote import resolver_bloque
+from k_caminos import k_caminos_mas_cortos
+from delta_stepping import delta_stepping_csr
+from multi_origen import instalacion_mas_cercana, particion_voronoi
+from carga_grafos import cargar_csv, cargar_dimacs, guardar_binario, abrir_binario
+from instrumentacion import Instrumentacion, TrazaChrome, HistogramaConsultas
+from isocronas import isocrona, frontera_isocrona, isocronas_lote
+from indice_espacial import IndiceEspacial
+from etiquetado_hubs import EtiquetadoHubs, dijkstra_hubs
 
 # Definir el grafo
 grafo = {
@@ -24,6 +49,25 @@ grafo = {
     'Ñ': [('J', 2.1), ('K', 1.4)]
 }
 
+# Posiciones de los nodos (para las heurísticas geométricas)
+posiciones = {
+    'A': (0, 5),
+    'B': (1.5, 6),
+    'C': (3.5, 6),
+    'D': (1.5, 4),
+    'E': (3.5, 3.5),
+    'F': (2, 2.5),
+    'G': (3.5, 2.5),
+    'H': (1, 1),
+    'I': (3.5, 1),
+    'J': (5.5, 0.5),
+    'K': (8, 2.5),
+    'L': (6, 5.5),
+    'M': (9, 4.5),
+    'N': (10, 6),
+    'Ñ': (9, 1)
+}
+
 def dijkstra(grafo, inicio, fin):
     """Implementa el algoritmo de Dijkstra"""
     distancias = {nodo: float('inf') for nodo in grafo}
@@ -135,6 +179,510 @@ def verificar_conectividad():
     else:
         print(f"  ✅ El grafo está completamente conectado.")
 
+def peso_camino(camino):
+    """Suma los pesos de un camino; devuelve None si usa una arista inexistente"""
+    total = 0
+    for nodo_actual, nodo_siguiente in zip(camino, camino[1:]):
+        pesos = [p for vecino, p in grafo[nodo_actual] if vecino == nodo_siguiente]
+        if not pesos:
+            return None
+        total += min(pesos)
+    return total
+
+def verificar_motor(nombre, consulta, tolerancia=1e-9):
+    """Compara un motor con la implementación de referencia en todos los pares"""
+    print("\n" + "="*60)
+    print(f"VERIFICACIÓN DEL MOTOR: {nombre}".center(60))
+    print("="*60)
+    
+    errores = []
+    
+    for inicio in grafo:
+        for fin in grafo:
+            _, distancia_ref = dijkstra(grafo, inicio, fin)
+            camino, distancia = consulta(inicio, fin)
+            peso = peso_camino(camino)
+            if (abs(distancia - distancia_ref) > tolerancia or camino[0] != inicio
+                    or camino[-1] != fin or peso is None or abs(peso - distancia) > tolerancia):
+                errores.append((inicio, fin, distancia_ref, distancia))
+    
+    print(f"\nPares comparados: {len(grafo) ** 2}")
+    
+    if errores:
+        print(f"  ❌ {len(errores)} pares no coinciden con la referencia:")
+        for inicio, fin, esperada, obtenida in errores:
+            print(f"     {inicio} → {fin}: esperado {esperada:.2f} km, obtenido {obtenida:.2f} km")
+    else:
+        print(f"  ✅ {nombre} coincide con la referencia en todos los pares.")
+    
+    print("\n" + "="*60)
+    return not errores
+
+def verificar_motores():
+    """Verifica todos los motores de búsqueda contra la referencia"""
+    g = GrafoCSR.desde_diccionario(grafo)
+    euclidiana = HeuristicaEuclidiana(g, posiciones)
+    alt = preprocesar_alt(g, num_landmarks=3)
+    jerarquia = JerarquiaContraccion.preprocesar(g)
+    pares = [(inicio, fin) for inicio in grafo for fin in grafo]
+    rutas_lote = dict(zip(pares, calcular_rutas(g, pares)))
+    cache = CacheArboles(g, presupuesto_bytes=1024)
+    
+    def consulta_lote(inicio, fin):
+        resultado = json.loads(resolver_bloque(g, [f'{inicio} {fin}'], 1, caminos=True))
+        distancia = resultado['distancia']
+        return resultado['camino'], float('inf') if distancia is None else distancia
+    
+    obsoletas = dict.fromkeys(COLAS, 0)
+    
+    def consulta_cola(nombre):
+        # Pesos con un decimal: escala=10 los vuelve enteros para radix y dial
+        def consulta(inicio, fin):
+            destino = g.id_de(fin)
+            distancias, previos, _, estadisticas = dijkstra_cola(
+                g, g.id_de(inicio), destino, cola=nombre, escala=10)
+            obsoletas[nombre] += estadisticas['obsoletas']
+            camino = [g.etiquetas[i] for i in reconstruir_camino(previos, destino)]
+            return camino, distancias[destino]
+        return consulta
+    
+    def consulta_delta(delta):
+        def consulta(inicio, fin):
+            destino = g.id_de(fin)
+            distancias, previos, _ = delta_stepping_csr(g, g.id_de(inicio), delta)
+            return [g.etiquetas[i] for i in reconstruir_camino(previos, destino)], distancias[destino]
+        return consulta
+    
+    print(f"\nGrafo CSR: {g.num_nodos} nodos, {g.num_aristas} aristas dirigidas, "
+          f"{g.memoria_bytes()} bytes de adyacencias")
+    
+    motores = [
+        ('Motor CSR', lambda i, f: dijkstra_csr(g, i, f)[:2]),
+        ('Dijkstra bidireccional', lambda i, f: dijkstra_bidireccional(g, i, f)[:2]),
+        ('A* euclidiano', lambda i, f: a_estrella(g, i, f, posiciones, euclidiana)[:2]),
+        ('ALT (landmarks)', lambda i, f: dijkstra_alt(g, i, f, alt)[:2]),
+        ('Jerarquías de contracción', lambda i, f: dijkstra_ch(jerarquia, i, f)[:2]),
+        ('Rutas por lotes', lambda i, f: rutas_lote[(i, f)]),
+        ('Caché de árboles (LRU)', cache.consulta),
+        ('Consultas por lotes (línea de comandos)', consulta_lote),
+        ('Delta-stepping (Δ automático)', consulta_delta(None)),
+        ('Delta-stepping (Δ = 0.5)', consulta_delta(0.5)),
+    ]
+    
+    motores += [(f'Cola de prioridad {nombre}', consulta_cola(nombre)) for nombre in COLAS]
+    
+    resultados = [verificar_motor(nombre, consulta) for nombre, consulta in motores]
+    
+    # Cada línea inválida da su propio registro de error sin cortar el bloque
+    lineas = ['A', '{"inicio": ["A"], "fin": "N"}', '{"inicio": {}, "fin": "N"}', 'A Z', 'A N']
+    registros = [json.loads(linea) for linea in resolver_bloque(g, lineas, 1).splitlines()]
+    resultados.append(['error' in registro for registro in registros] == [True] * 4 + [False])
+    print("\nEntradas obsoletas extraídas en todos los pares: " +
+          ", ".join(f"{nombre} {cantidad}" for nombre, cantidad in obsoletas.items()))
+    
+    # Las tablas de todos los pares guardan las distancias en float32
+    with tempfile.TemporaryDirectory() as carpeta:
+        tablas = precalcular_tablas(g, os.path.join(carpeta, 'tablas.bin'))
+        resultados.append(verificar_motor('Tablas de todos los pares', tablas.consulta,
+                                          tolerancia=1e-5))
+        del tablas
+        
+        # Etiquetas de hubs recién construidas y reabiertas con mmap: distancias exactas
+        ruta_hubs = os.path.join(carpeta, 'hubs.bin')
+        EtiquetadoHubs.preprocesar(g).guardar(ruta_hubs)
+        hubs = EtiquetadoHubs.abrir(ruta_hubs, g)
+        resultados.append(verificar_motor('Etiquetado de hubs (mmap)',
+                                          lambda i, f: dijkstra_hubs(hubs, i, f)[:2]))
+        del hubs
+        
+        # El mismo grafo leído desde CSV y DIMACS y reabierto desde el formato binario
+        ruta_csv = os.path.join(carpeta, 'grafo.csv')
+        ruta_gr = os.path.join(carpeta, 'grafo.gr')
+        numeros = {nodo: i + 1 for i, nodo in enumerate(grafo)}
+        with open(ruta_csv, 'w', encoding='utf-8') as csv, open(ruta_gr, 'w') as gr:
+            csv.write('origen,destino,peso\n')
+            gr.write(f'c grafo de prueba\np sp {len(grafo)} {g.num_aristas}\n')
+            for nodo, vecinos in grafo.items():
+                for vecino, peso in vecinos:
+                    csv.write(f'{nodo},{vecino},{peso}\n')
+                    gr.write(f'a {numeros[nodo]} {numeros[vecino]} {int(peso * 10)}\n')
+        
+        ruta_bin = os.path.join(carpeta, 'grafo.bin')
+        guardar_binario(cargar_csv(ruta_csv), ruta_bin)
+        binario = abrir_binario(ruta_bin)
+        resultados.append(verificar_motor('Grafo CSV → binario (mmap)',
+                                          lambda i, f: dijkstra_csr(binario, i, f)[:2]))
+        
+        dimacs, _ = cargar_dimacs(ruta_gr)
+        letras = list(grafo)
+        def consulta_dimacs(inicio, fin):
+            camino, distancia, _ = dijkstra_csr(dimacs, numeros[inicio], numeros[fin])
+            return [letras[i - 1] for i in camino], distancia / 10
+        resultados.append(verificar_motor('Grafo DIMACS', consulta_dimacs))
+        del binario
+    
+    return all(resultados)
+
+def verificar_sssp_dinamico(rondas=50, semilla=42):
+    """Compara la reparación incremental contra un Dijkstra completo en cambios aleatorios"""
+    print("\n" + "="*60)
+    print(" " * 12 + "VERIFICACIÓN DE SSSP DINÁMICO")
+    print("="*60)
+    
+    g = GrafoCSR.desde_diccionario(grafo)
+    generador = random.Random(semilla)
+    arboles = [ArbolDinamico(g, origen) for origen in range(g.num_nodos)]
+    aristas = [(u, v) for u in range(g.num_nodos) for v, _ in g.vecinos(u)]
+    errores = 0
+    tocados = 0
+    
+    for _ in range(rondas):
+        lote = [(u, v, round(generador.uniform(0.1, 5.0), 1))
+                for u, v in generador.sample(aristas, generador.randint(1, 4))]
+        tocados += actualizar_arboles(arboles, lote)
+        
+        for arbol in arboles:
+            distancias, _, _ = dijkstra_csr_ids(g, arbol.origen)
+            for destino in range(g.num_nodos):
+                if abs(distancias[destino] - arbol.distancias[destino]) > 1e-9:
+                    errores += 1
+    
+    print(f"\nRondas de cambios: {rondas}")
+    print(f"Árboles mantenidos: {len(arboles)}")
+    print(f"Nodos recalculados en total: {tocados} "
+          f"(un recálculo completo serían {rondas * len(arboles) * g.num_nodos})")
+    
+    if errores:
+        print(f"  ❌ {errores} distancias no coinciden con el recálculo completo.")
+    else:
+        print("  ✅ La reparación incremental coincide con el recálculo completo.")
+    
+    print("\n" + "="*60)
+    return not errores
+
+def verificar_multi_origen(rondas=30, semilla=7):
+    """Compara la búsqueda desde varios orígenes con el mínimo de una búsqueda por origen"""
+    print("\n" + "="*60)
+    print(" " * 10 + "VERIFICACIÓN DE BÚSQUEDA MULTI-ORIGEN")
+    print("="*60)
+    
+    generador = random.Random(semilla)
+    nodos = list(grafo)
+    errores = 0
+    
+    for _ in range(rondas):
+        almacenes = generador.sample(nodos, generador.randint(1, 5))
+        desfases = {almacen: round(generador.uniform(0, 2), 1) for almacen in almacenes}
+        resultado = instalacion_mas_cercana(grafo, almacenes, nodos, desfases)
+        
+        for cliente in nodos:
+            esperada = min(desfases[a] + dijkstra(grafo, a, cliente)[1] for a in almacenes)
+            almacen, distancia, camino = resultado[cliente]
+            peso = peso_camino(camino)
+            if (abs(distancia - esperada) > 1e-9 or camino[0] != almacen or camino[-1] != cliente
+                    or peso is None or abs(desfases[almacen] + peso - distancia) > 1e-9):
+                errores += 1
+        
+        regiones = particion_voronoi(grafo, almacenes, desfases)
+        if sorted(n for region in regiones.values() for n in region) != sorted(nodos):
+            errores += 1
+    
+    print(f"\nConjuntos de almacenes probados: {rondas}")
+    
+    if errores:
+        print(f"  ❌ {errores} clientes no coinciden con la búsqueda por almacén.")
+    else:
+        print("  ✅ Una sola búsqueda coincide con una búsqueda por almacén.")
+    
+    print("\n" + "="*60)
+    return not errores
+
+def verificar_instrumentacion():
+    """La búsqueda instrumentada da el mismo resultado y contadores coherentes"""
+    print("\n" + "="*60)
+    print(" " * 10 + "VERIFICACIÓN DE INSTRUMENTACIÓN")
+    print("="*60)
+    
+    traza = TrazaChrome()
+    histograma = HistogramaConsultas(peores=3)
+    instrumentacion = Instrumentacion([traza, histograma], eventos=True)
+    g = GrafoCSR.desde_diccionario(grafo)
+    nodos = list(grafo)
+    errores = 0
+    
+    for inicio in nodos:
+        for fin in nodos:
+            camino, distancia, _ = dijkstra_csr(grafo, inicio, fin, instrumentacion=instrumentacion)
+            esperado = dijkstra(grafo, inicio, fin)
+            m = instrumentacion.ultima
+            if (camino, distancia) != esperado:
+                errores += 1
+            # Cada extracción asienta un nodo o descarta una entrada obsoleta
+            if (m.extracciones != m.asentados + m.obsoletas or m.inserciones < m.extracciones
+                    or m.tamano_maximo > m.inserciones or m.relajaciones < m.mejoras
+                    or set(m.fases) != {'inicializacion', 'busqueda', 'reconstruccion'}):
+                errores += 1
+        
+        # Sin destino se asientan todos los nodos, igual que sin instrumentar
+        _, _, asentados = dijkstra_csr_ids(g, g.id_de(inicio), instrumentacion=instrumentacion)
+        if asentados != len(nodos) or instrumentacion.ultima.asentados != len(nodos):
+            errores += 1
+    
+    consultas = len(nodos) * (len(nodos) + 1)
+    eventos = json.loads(json.dumps(traza.como_diccionario()))['traceEvents']
+    asentar = sum(1 for e in eventos if e['name'] == 'asentar')
+    if (histograma.cantidad != consultas or len(histograma.lentas()) != 3
+            or asentar != sum(e['args']['asentados'] for e in eventos if e.get('cat') == 'consulta')):
+        errores += 1
+    
+    print(f"\nConsultas instrumentadas: {consultas} ({len(eventos)} eventos de traza)")
+    print(histograma.texto('asentados'))
+    
+    if errores:
+        print(f"  ❌ {errores} consultas con resultados o contadores incorrectos.")
+    else:
+        print("  ✅ Resultados iguales a la búsqueda sin instrumentar y contadores coherentes.")
+    
+    print("\n" + "="*60)
+    return not errores
+
+def cortes_esperados(grafo_prueba, alcanzados, presupuesto):
+    """Aristas (u, v) cortadas por la isocrona, recorriendo el diccionario arista por arista"""
+    cortes = set()
+    for u, d_u in alcanzados.items():
+        for v, peso in grafo_prueba[u]:
+            if d_u + peso <= presupuesto:
+                continue
+            # Sólo se llega desde v si hay arista de vuelta v -> u
+            vuelta = [p for w, p in grafo_prueba.get(v, ()) if w == u]
+            if v in alcanzados and vuelta and ((presupuesto - d_u) / peso +
+                    ((presupuesto - alcanzados[v]) / min(vuelta) if min(vuelta) > 0 else float('inf')) >= 1):
+                continue
+            cortes.add((u, v))
+    return cortes
+
+def verificar_isocronas(presupuestos=(0.0, 1.0, 2.5, 4.0, 100.0)):
+    """Compara las isocronas con las distancias de Dijkstra y revisa los cortes de la frontera"""
+    print("\n" + "="*60)
+    print(" " * 10 + "VERIFICACIÓN DE ISOCRONAS")
+    print("="*60)
+    
+    g = GrafoCSR.desde_diccionario(grafo)
+    nodos = list(grafo)
+    errores = 0
+    
+    for inicio in nodos:
+        todas = {fin: dijkstra(grafo, inicio, fin)[1] for fin in nodos}
+        for presupuesto in presupuestos:
+            alcanzados = isocrona(grafo, inicio, presupuesto)
+            esperados = {n: d for n, d in todas.items() if d <= presupuesto}
+            if alcanzados.keys() != esperados.keys() or any(
+                    abs(alcanzados[n] - esperados[n]) > 1e-9 for n in esperados):
+                errores += 1
+            
+            # Están todos los cortes, y sólo ellos
+            frontera = frontera_isocrona(grafo, inicio, presupuesto, posiciones)
+            if {(u, v) for u, v, _, _ in frontera} != cortes_esperados(grafo, alcanzados, presupuesto):
+                errores += 1
+            for u, v, fraccion, punto in frontera:
+                peso = dict(grafo[u])[v]
+                (x0, y0), (x1, y1) = posiciones[u], posiciones[v]
+                if (abs(alcanzados[u] + fraccion * peso - presupuesto) > 1e-9
+                        or abs(punto[0] - (x0 + fraccion * (x1 - x0))) > 1e-9):
+                    errores += 1
+    
+    # Dirigido: A -> B es de un solo sentido, desde B no se vuelve a cubrir
+    dirigido = {'A': [('B', 7.0), ('C', 1.0)], 'B': [], 'C': [('B', 1.0)]}
+    if [(u, v, round(f, 12)) for u, v, f, _ in frontera_isocrona(dirigido, 'A', 5.0)] != \
+            [('A', 'B', round(5 / 7, 12))]:
+        errores += 1
+    generador = random.Random(23)
+    for _ in range(20):
+        n = generador.randint(2, 25)
+        aleatorio = {i: [(generador.randrange(n), float(generador.randint(1, 9)))
+                         for _ in range(generador.randint(0, 3))] for i in range(n)}
+        for presupuesto in (3.0, 7.5, 12.0):
+            alcanzados = isocrona(aleatorio, 0, presupuesto)
+            frontera = frontera_isocrona(aleatorio, 0, presupuesto)
+            if {(u, v) for u, v, _, _ in frontera} != cortes_esperados(aleatorio, alcanzados, presupuesto):
+                errores += 1
+    
+    # El lote en procesos da lo mismo que uno por uno
+    ids = [g.id_de(n) for n in nodos] * 5
+    secuencial = isocronas_lote(g, ids, 3.0, procesos=1)
+    paralelo = isocronas_lote(g, ids, [3.0] * len(ids), procesos=2)
+    if [tuple(map(list, r)) for r in secuencial] != [tuple(map(list, r)) for r in paralelo]:
+        errores += 1
+    
+    print(f"\nIsocronas probadas: {len(nodos) * len(presupuestos)} (+ lote de {len(ids)} en 2 procesos)")
+    
+    if errores:
+        print(f"  ❌ {errores} isocronas o cortes incorrectos.")
+    else:
+        print("  ✅ Nodos y distancias coinciden con Dijkstra y los cortes caen en el presupuesto.")
+    
+    print("\n" + "="*60)
+    return not errores
+
+def verificar_indice_espacial(puntos=400, semilla=11):
+    """Compara el índice espacial con la búsqueda exhaustiva sobre posiciones"""
+    print("\n" + "="*60)
+    print(" " * 10 + "VERIFICACIÓN DE ÍNDICE ESPACIAL")
+    print("="*60)
+    
+    generador = random.Random(semilla)
+    indice = IndiceEspacial(GrafoCSR.desde_diccionario(grafo), posiciones)
+    aristas = [(u, v) for u in grafo for v, _ in grafo[u]]
+    errores = 0
+    
+    def distancia_segmento(x, y, u, v):
+        (x0, y0), (x1, y1) = posiciones[u], posiciones[v]
+        dx, dy = x1 - x0, y1 - y0
+        t = max(0.0, min(1.0, ((x - x0) * dx + (y - y0) * dy) / (dx * dx + dy * dy)))
+        return ((x0 + t * dx - x) ** 2 + (y0 + t * dy - y) ** 2) ** 0.5
+    
+    xs = [generador.uniform(-2, 12) for _ in range(puntos)]
+    ys = [generador.uniform(-2, 8) for _ in range(puntos)]
+    for x, y in zip(xs, ys):
+        exhaustiva = sorted(((px - x) ** 2 + (py - y) ** 2) ** 0.5 for px, py in posiciones.values())
+        cercanos = indice.k_mas_cercanos(x, y, 4)
+        if any(abs(d - e) > 1e-9 for (_, d), e in zip(cercanos, exhaustiva)) or len(cercanos) != 4:
+            errores += 1
+        nodo, distancia = indice.mas_cercano(x, y)
+        px, py = posiciones[nodo]
+        if abs(distancia - exhaustiva[0]) > 1e-9 or abs(((px - x) ** 2 + (py - y) ** 2) ** 0.5 - distancia) > 1e-9:
+            errores += 1
+        
+        u, v, fraccion, distancia, punto = indice.arista_mas_cercana(x, y)
+        (x0, y0), (x1, y1) = posiciones[u], posiciones[v]
+        if (abs(distancia - min(distancia_segmento(x, y, a, b) for a, b in aristas)) > 1e-9
+                or abs(punto[0] - (x0 + fraccion * (x1 - x0))) > 1e-9):
+            errores += 1
+    
+    # El ajuste masivo da lo mismo que de a un punto
+    ids, _ = indice.ajustar_ids(xs, ys)
+    if [indice.g.etiquetas[i] for i in ids] != [indice.mas_cercano(x, y)[0] for x, y in zip(xs, ys)]:
+        errores += 1
+    
+    print(f"\nPuntos ajustados: {puntos} (nodo, 4 vecinos y arista más cercanos)")
+    
+    if errores:
+        print(f"  ❌ {errores} puntos no coinciden con la búsqueda exhaustiva.")
+    else:
+        print("  ✅ El índice coincide con la búsqueda exhaustiva.")
+    
+    print("\n" + "="*60)
+    return not errores
+
+def verificar_etiquetado_hubs(rondas=30, semilla=5):
+    """Distancias y caminos del etiquetado de hubs contra Dijkstra en grafos dirigidos aleatorios"""
+    print("\n" + "="*60)
+    print(" " * 10 + "VERIFICACIÓN DE ETIQUETADO DE HUBS")
+    print("="*60)
+    
+    generador = random.Random(semilla)
+    errores = 0
+    entradas = nodos_totales = 0
+    
+    for ronda in range(rondas):
+        # Pesos enteros (con ceros) y nodos inalcanzables: las sumas son exactas
+        n = generador.randint(2, 40)
+        aleatorio = {i: [(generador.randrange(n), float(generador.choice([0, 1, 2, 3, 5, 8])))
+                         for _ in range(generador.randint(0, 4))] for i in range(n)}
+        g = GrafoCSR.desde_diccionario(aleatorio)
+        etiquetado = EtiquetadoHubs.preprocesar(g, 'grado' if ronda % 2 else None)
+        entradas += etiquetado.num_entradas
+        nodos_totales += n
+        
+        for origen in range(n):
+            distancias, _, _ = dijkstra_csr_ids(g, origen)
+            for destino in range(n):
+                camino = etiquetado.camino_ids(origen, destino)
+                if etiquetado.distancia_ids(origen, destino) != distancias[destino]:
+                    errores += 1
+                elif camino:
+                    peso = sum(min(p for v, p in aleatorio[a] if v == b)
+                               for a, b in zip(camino, camino[1:]))
+                    if camino[0] != origen or camino[-1] != destino or peso != distancias[destino]:
+                        errores += 1
+                elif distancias[destino] != float('inf'):
+                    errores += 1
+    
+    # Pesos con un decimal y muchos empates: el camino del hub puede ser otro de
+    # igual costo y su suma diferir de Dijkstra sólo en el redondeo
+    for ronda in range(rondas // 2):
+        n = generador.randint(2, 40)
+        aleatorio = {i: [(generador.randrange(n), generador.choice([0.1, 0.2, 0.3, 0.7, 1.1]))
+                         for _ in range(generador.randint(0, 4))] for i in range(n)}
+        g = GrafoCSR.desde_diccionario(aleatorio)
+        etiquetado = EtiquetadoHubs.preprocesar(g)
+        nodos_totales += n
+        entradas += etiquetado.num_entradas
+        for origen in range(n):
+            distancias, _, _ = dijkstra_csr_ids(g, origen)
+            for destino in range(n):
+                camino, distancia, _ = dijkstra_hubs(etiquetado, origen, destino)
+                esperada = distancias[destino]
+                tolerancia = 1e-9 * max(1.0, esperada) if esperada != float('inf') else 0
+                if (abs(etiquetado.distancia_ids(origen, destino) - esperada) > tolerancia
+                        if esperada != float('inf') else distancia != esperada):
+                    errores += 1
+                elif esperada != float('inf') and (abs(distancia - esperada) > tolerancia
+                                                    or camino[0] != origen or camino[-1] != destino):
+                    errores += 1
+    
+    print(f"\nGrafos probados: {rondas + rondas // 2} (etiqueta media de {entradas / (2 * nodos_totales):.1f} hubs)")
+    
+    if errores:
+        print(f"  ❌ {errores} pares no coinciden con Dijkstra.")
+    else:
+        print("  ✅ Distancias y caminos coinciden con Dijkstra.")
+    
+    print("\n" + "="*60)
+    return not errores
+
+def caminos_simples(inicio, fin):
+    """Todos los caminos sin ciclos de inicio a fin (búsqueda exhaustiva)"""
+    caminos = []
+    pila = [[inicio]]
+    while pila:
+        camino = pila.pop()
+        if camino[-1] == fin:
+            caminos.append(camino)
+            continue
+        for vecino, _ in grafo[camino[-1]]:
+            if vecino not in camino:
+                pila.append(camino + [vecino])
+    return caminos
+
+def verificar_k_caminos(k=6):
+    """Compara los K caminos de Yen con la enumeración de todos los caminos simples"""
+    print("\n" + "="*60)
+    print(" " * 12 + "VERIFICACIÓN DE K CAMINOS (YEN)")
+    print("="*60)
+    
+    errores = 0
+    for inicio in grafo:
+        for fin in grafo:
+            esperadas = sorted(peso_camino(c) for c in caminos_simples(inicio, fin))[:k]
+            rutas = k_caminos_mas_cortos(grafo, inicio, fin, k)
+            distintos = len({tuple(camino) for camino, _ in rutas}) == len(rutas)
+            if (not distintos or len(rutas) != len(esperadas) or any(
+                    abs(distancia - esperada) > 1e-9 or len(set(camino)) != len(camino)
+                    or abs(peso_camino(camino) - distancia) > 1e-9
+                    for (camino, distancia), esperada in zip(rutas, esperadas))):
+                errores += 1
+    
+    print(f"\nPares comparados: {len(grafo) ** 2} (K = {k})")
+    
+    if errores:
+        print(f"  ❌ {errores} pares no coinciden con la enumeración exhaustiva.")
+    else:
+        print("  ✅ Los K caminos coinciden con la enumeración exhaustiva.")
+    
+    print("\n" + "="*60)
+    return not errores
+
 def ejecutar_pruebas():
     """Ejecuta todas las pruebas"""
     print("\n" + "="*60)
@@ -244,6 +792,14 @@ if __name__ == "__main__":
     # Ejecutar todas las pruebas
     estadisticas_grafo()
     ejecutar_pruebas()
+    verificar_motores()
+    verificar_sssp_dinamico()
+    verificar_multi_origen()
+    verificar_k_caminos()
+    verificar_instrumentacion()
+    verificar_isocronas()
+    verificar_indice_espacial()
+    verificar_etiquetado_hubs()
     
     print("\n✅ Todas las pruebas han finalizado.")
     print("=" * 60)
\ No newline at end of file
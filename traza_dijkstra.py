@@ -0,0 +1,102 @@
+"""
+Traza compacta de una ejecución de Dijkstra
+Cada paso se guarda como una secuencia de eventos en arreglos (asentar,
+relajar, insertar en la cola, extracción obsoleta) con puntos de control
+periódicos; el estado de cualquier paso se reconstruye reproduciendo los
+eventos desde el punto de control más cercano
+"""
+
+from array import array
+
+from grafo_csr import INF
+
+# Tipos de evento
+ASENTAR = 0     # se extrae un nodo no visitado: comienza un paso
+RELAJAR = 1     # se examina la arista previo -> nodo con distancia candidata valor
+INSERTAR = 2    # la distancia de nodo mejora a valor por previo y entra a la cola
+OBSOLETO = 3    # se extrae de la cola una entrada de un nodo ya visitado
+
+
+class EstadoTraza:
+    """Estado de la búsqueda en un momento de la traza (por ids)"""
+
+    def __init__(self, n):
+        self.nodo_actual = -1
+        self.distancias = array('d', [INF]) * n
+        self.previos = array('i', [-1]) * n
+        self.visitados = bytearray(n)
+        self.en_cola = array('i', [0]) * n  # entradas de cada nodo en la cola
+
+    def copiar(self):
+        copia = EstadoTraza.__new__(EstadoTraza)
+        copia.nodo_actual = self.nodo_actual
+        copia.distancias = array('d', self.distancias)
+        copia.previos = array('i', self.previos)
+        copia.visitados = bytearray(self.visitados)
+        copia.en_cola = array('i', self.en_cola)
+        return copia
+
+    def aplicar(self, tipo, nodo, valor, previo):
+        """Aplica un evento al estado"""
+        if tipo == ASENTAR:
+            self.nodo_actual = nodo
+            self.visitados[nodo] = 1
+            self.en_cola[nodo] -= 1
+        elif tipo == INSERTAR:
+            self.distancias[nodo] = valor
+            self.previos[nodo] = previo
+            self.en_cola[nodo] += 1
+        elif tipo == OBSOLETO:
+            self.en_cola[nodo] -= 1
+
+
+class TrazaDijkstra:
+    """Flujo de eventos con puntos de control cada `intervalo` pasos"""
+
+    def __init__(self, n, intervalo=None):
+        self.n = n
+        # Con el intervalo por defecto hay a lo sumo ~8 puntos de control: memoria O(V + E)
+        self.intervalo = intervalo or max(32, n // 8)
+        self.tipos = array('b')
+        self.nodos = array('i')
+        self.valores = array('d')
+        self.previos = array('i')
+        self.inicio_paso = array('q')   # índice del evento ASENTAR de cada paso
+        self.puntos_control = []        # (índice de evento, EstadoTraza)
+        self._estado = EstadoTraza(n)
+
+    def __len__(self):
+        """Cantidad de pasos (nodos asentados)"""
+        return len(self.inicio_paso)
+
+    def registrar(self, tipo, nodo, valor=0.0, previo=-1):
+        """Agrega un evento y guarda un punto de control cuando corresponde"""
+        self.tipos.append(tipo)
+        self.nodos.append(nodo)
+        self.valores.append(valor)
+        self.previos.append(previo)
+        self._estado.aplicar(tipo, nodo, valor, previo)
+
+        if tipo == ASENTAR:
+            paso = len(self.inicio_paso)
+            self.inicio_paso.append(len(self.tipos) - 1)
+            if paso % self.intervalo == 0:
+                self.puntos_control.append((len(self.tipos) - 1, self._estado.copiar()))
+
+    def estado_en(self, paso):
+        """Estado justo después de asentar el nodo del paso indicado (antes de relajar sus aristas)"""
+        if not 0 <= paso < len(self.inicio_paso):
+            raise IndexError(f"Paso fuera de rango: {paso}")
+
+        indice, estado = self.puntos_control[paso // self.intervalo]
+        estado = estado.copiar()
+        for i in range(indice + 1, self.inicio_paso[paso] + 1):
+            estado.aplicar(self.tipos[i], self.nodos[i], self.valores[i], self.previos[i])
+        return estado
+
+    def memoria_bytes(self):
+        """Bytes ocupados por los eventos y los puntos de control"""
+        eventos = sum(a.itemsize * len(a) for a in
+                      (self.tipos, self.nodos, self.valores, self.previos, self.inicio_paso))
+        por_punto = self.n * (8 + 4 + 1 + 4)
+        return eventos + por_punto * len(self.puntos_control)